@@ -0,0 +1,102 @@
+# bench_capture.py
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'Benchmarks'))
+
+
+
+
+
+'''
+>>> Escenarios
+'''
+def grab_rate(screen, width, height, frames):
+    """ Fotogramas por segundo capturando y liberando en el mismo hilo """
+    start = time.perf_counter()
+    for _ in range(frames):
+        screen.grab(0, 0, width, height).release()
+    elapsed = time.perf_counter() - start
+    return frames / elapsed
+
+
+def write_rate(screen, width, height, frames, directory, extension):
+    """ Fotogramas por segundo capturando y escribiendo en segundo plano """
+    from capture import FrameWriter
+
+    writer = FrameWriter()
+    start = time.perf_counter()
+    for index in range(frames):
+        writer.submit(screen.grab(0, 0, width, height), os.path.join(directory, f"{index}.{extension}"))
+    errors = writer.flush()
+    elapsed = time.perf_counter() - start
+    writer.close()
+    if errors:
+        raise RuntimeError(errors[0])
+    return frames / elapsed
+
+
+def report(display, frames, formats):
+    from capture import ScreenCapture
+
+    screen = ScreenCapture(display)
+    try:
+        width, height = screen.screen_size()
+        megabytes = width * height * 4 / 1e6
+        print(f"\nCaptura de {width}x{height} en {display} ({frames} fotogramas)")
+        rows = []
+        if screen.shm:
+            rows.append(('MIT-SHM', grab_rate(screen, width, height, frames)))
+        else:
+            print("  [WARN] El servidor no admite MIT-SHM")
+        screen.shm = False
+        rows.append(('XGetImage (copia)', grab_rate(screen, width, height, frames)))
+        for name, fps in rows:
+            print(f"  {name:24s} {fps:8.1f} fps {fps * megabytes:9.1f} MB/s")
+
+        screen.shm = rows[0][0] == 'MIT-SHM'
+        with tempfile.TemporaryDirectory() as tmp:
+            for extension in formats:
+                fps = write_rate(screen, width, height, frames, tmp, extension)
+                print(f"  {'captura + .' + extension:24s} {fps:8.1f} fps")
+    finally:
+        screen.close()
+
+
+
+
+
+'''
+>>> Programa
+'''
+def main():
+    parser = argparse.ArgumentParser(description='Rendimiento de la captura de pantalla (--capture)')
+    parser.add_argument('--frames', type=int, default=60)
+    parser.add_argument('--display', help='Servidor X existente (por defecto se arranca Xvfb)')
+    parser.add_argument('--formats', default='npy,ppm,png', help='Formatos de escritura a medir')
+    args = parser.parse_args()
+    formats = [f.strip() for f in args.formats.split(',') if f.strip()]
+
+    if args.display:
+        report(args.display, args.frames, formats)
+        return
+
+    from bench_operations import start_xvfb
+    display = ':96'
+    proc = start_xvfb(display)
+    if proc is None:
+        print("[WARN] Xvfb no está instalado; indicar --display para usar otro servidor")
+        sys.exit(1)
+    try:
+        report(display, args.frames, formats)
+    finally:
+        proc.terminate()
+
+
+if __name__ == '__main__':
+    main()
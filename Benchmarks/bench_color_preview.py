@@ -0,0 +1,91 @@
+# bench_color_preview.py
+import os
+import sys
+import time
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+
+
+
+'''
+>>> Escenarios
+'''
+def median_ms(fn, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def full_mean(pixels, width):
+    """ Referencia: promedio de todos los píxeles de cada bloque """
+    import numpy as np
+
+    factor = max(1, pixels.shape[1] // width)
+    height, width = pixels.shape[0] // factor, pixels.shape[1] // factor
+    blocks = pixels[:height * factor, :width * factor].reshape(height, factor, width, factor, 3)
+    return blocks.mean(axis=(1, 3), dtype=np.float32).astype(np.uint8)
+
+
+def per_pixel(image, lut):
+    """ Referencia: la LUT aplicada píxel a píxel desde Python """
+    out = image.copy()
+    for y in range(image.shape[0]):
+        for x in range(image.shape[1]):
+            for c in range(3):
+                out[y, x, c] = lut[c][image[y, x, c]]
+    return out
+
+
+
+
+
+'''
+>>> Programa
+'''
+def main():
+    parser = argparse.ArgumentParser(description='Coste de las miniaturas de la pestaña de color')
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--screen', default='3840x2160', help='Tamaño de la captura simulada')
+    args = parser.parse_args()
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+    import numpy as np
+    from PyQt5.QtWidgets import QApplication
+    from color_filters import PRESETS, parse_filter_spec
+    from color_preview import THUMBNAIL_WIDTH, apply_lut, color_lut, downscale, render
+
+    app = QApplication([])  # QImage/QPixmap necesitan una aplicación Qt
+    width, height = (int(value) for value in args.screen.split('x'))
+    capture = np.random.default_rng(0).integers(0, 255, (height, width, 4), dtype=np.uint8)[..., 2::-1]
+    snapshot = downscale(capture)
+    chains = [parse_filter_spec(spec) for spec in PRESETS.values()]
+
+    print(f"\nCaptura {width}x{height} -> miniatura {snapshot.shape[1]}x{snapshot.shape[0]} "
+          f"(mediana de {args.runs}, ms)")
+    rows = [
+        ('reducción: media completa', median_ms(lambda: full_mean(capture, THUMBNAIL_WIDTH), 5)),
+        ('reducción: rejilla de muestras', median_ms(lambda: downscale(capture), args.runs)),
+        ('LUT + QImage, por modo', median_ms(lambda: [render(snapshot, chain) for chain in chains],
+                                             args.runs) / len(chains)),
+    ]
+    # Parámetros nuevos en cada paso, como al arrastrar un slider (la rampa no está en caché)
+    steps = iter(range(10 ** 6))
+    rows.append(('slider (rampa nueva + LUT)', median_ms(
+        lambda: render(snapshot, parse_filter_spec(f"invert,contrast={1 + next(steps) / 1e4:g}")), args.runs)))
+    lut = color_lut(chains[0])
+    rows.append(('LUT píxel a píxel (Python)', median_ms(lambda: per_pixel(snapshot, lut), 3)))
+    assert (per_pixel(snapshot, lut) == apply_lut(snapshot, lut)).all()
+    for name, cost in rows:
+        print(f"  {name:34s} {cost:9.3f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+# bench_displays.py
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKES = os.path.join(ROOT, 'Benchmarks', 'fakes')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'Benchmarks'))
+
+
+
+
+
+'''
+>>> Escenarios
+'''
+def fan_out(displays, backend_name, runs, max_workers):
+    """ Aplicar y restaurar en todos los displays; ms por ronda """
+    from multi_display import MultiDisplayController
+
+    controller = MultiDisplayController(displays, backend_name, max_workers=max_workers)
+    try:
+        if controller.errors:
+            raise RuntimeError(f"No se pudieron abrir: {controller.errors}")
+        timings, slowest = [], []
+        for _ in range(runs):
+            start = time.perf_counter()
+            results = controller.apply_scale(1.5, 'all') + controller.restore()
+            timings.append((time.perf_counter() - start) * 1000)
+            failed = [r.display for r in results if not r.ok]
+            if failed:
+                raise RuntimeError(f"Fallo en {', '.join(failed)}: {results}")
+            # Lo más lento por display en esta ronda (aplicar + restaurar)
+            per_display = {}
+            for r in results:
+                per_display[r.display] = per_display.get(r.display, 0.0) + r.duration_ms
+            slowest.append(max(per_display.values()))
+        return statistics.median(timings), statistics.median(slowest)
+    finally:
+        controller.close()
+
+
+def report(title, displays, backend_name, runs):
+    concurrent, slowest = fan_out(displays, backend_name, runs, None)
+    serial, _ = fan_out(displays, backend_name, runs, 1)
+    print(f"\n{title} ({len(displays)} displays, mediana de {runs} rondas aplicar+restaurar)")
+    print(f"  {'en serie':22s} {serial:9.1f}ms")
+    print(f"  {'en paralelo':22s} {concurrent:9.1f}ms")
+    print(f"  {'display más lento':22s} {slowest:9.1f}ms")
+    print(f"  {'aceleración':22s} {serial / concurrent:9.2f}x")
+    return concurrent, slowest
+
+
+
+
+
+'''
+>>> Programa
+'''
+def main():
+    parser = argparse.ArgumentParser(description='Latencia de --display con varios servidores X')
+    parser.add_argument('--displays', type=int, default=4)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--latency-ms', type=float, default=20.0,
+                        help='Latencia simulada por invocación de xrandr/xcalib')
+    parser.add_argument('--xvfb', action='store_true',
+                        help='Medir además contra varias instancias de Xvfb con el backend por defecto')
+    args = parser.parse_args()
+
+    original_env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(PATH=FAKES + os.pathsep + os.environ.get('PATH', ''),
+                          SIMURES_BACKEND='xrandr',
+                          SIMURES_FAKE_STATE=os.path.join(tmp, 'state'),
+                          SIMURES_JOURNAL=os.path.join(tmp, 'journal'),
+                          SIMURES_FAKE_LATENCY_MS=str(args.latency_ms))
+        displays = [f":{90 + i}" for i in range(args.displays)]
+        concurrent, slowest = report("xrandr/xcalib simulados", displays, 'xrandr', args.runs)
+        # El reparto en paralelo debe costar como el display más lento, no la suma
+        if concurrent > slowest * 1.5:
+            print(f"\n[WARN] El reparto ({concurrent:.1f}ms) supera con holgura al display más lento")
+
+    if args.xvfb:
+        from bench_operations import start_xvfb
+        displays = [f":{80 + i}" for i in range(args.displays)]
+        procs = []
+        try:
+            for display in displays:
+                proc = start_xvfb(display)
+                if proc is None:
+                    print("\n[WARN] Xvfb no está instalado; se omite")
+                    return
+                procs.append(proc)
+            os.environ.clear()
+            os.environ.update({k: v for k, v in original_env.items() if not k.startswith('SIMURES_')})
+            with tempfile.TemporaryDirectory() as tmp:
+                os.environ['SIMURES_JOURNAL'] = os.path.join(tmp, 'journal')
+                report("Xvfb", displays, None, args.runs)
+        finally:
+            for proc in procs:
+                proc.terminate()
+
+
+if __name__ == '__main__':
+    main()
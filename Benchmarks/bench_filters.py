@@ -0,0 +1,177 @@
+# bench_filters.py
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import argparse
+import statistics
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'Benchmarks'))
+
+FILTERS = ('nearest', 'bilinear')
+SCALES = (1.5, 2.0, 4.0)
+
+
+
+
+
+'''
+>>> Modelo del coste por fotograma
+'''
+def resample(source, mode_w, mode_h, filter_name):
+    """ Lo que hace el transform en cada fotograma: muestrear el área escalada del framebuffer
+    para producir los mode_w x mode_h píxeles del monitor (como pixman en los caminos por software)
+    """
+    import numpy as np
+
+    src_h, src_w = source.shape[:2]
+    xs = (np.arange(mode_w, dtype=np.float32) + 0.5) * (src_w / mode_w) - 0.5
+    ys = (np.arange(mode_h, dtype=np.float32) + 0.5) * (src_h / mode_h) - 0.5
+    if filter_name == 'nearest':
+        ix = np.clip(np.rint(xs).astype(np.intp), 0, src_w - 1)
+        iy = np.clip(np.rint(ys).astype(np.intp), 0, src_h - 1)
+        return source[iy[:, None], ix[None, :]]
+
+    x0 = np.clip(np.floor(xs).astype(np.intp), 0, src_w - 2)
+    y0 = np.clip(np.floor(ys).astype(np.intp), 0, src_h - 2)
+    fx = (xs - x0)[None, :, None]
+    fy = (ys - y0)[:, None, None]
+    top = source[y0[:, None], x0[None, :]] * (1 - fx) + source[y0[:, None], x0[None, :] + 1] * fx
+    bottom = source[y0[:, None] + 1, x0[None, :]] * (1 - fx) + source[y0[:, None] + 1, x0[None, :] + 1] * fx
+    return (top * (1 - fy) + bottom * fy).astype(source.dtype)
+
+
+def model_report(mode_w, mode_h, frames):
+    try:
+        import numpy as np
+    except ImportError:
+        print("[WARN] El modelo por software requiere NumPy")
+        return
+    print(f"\nModelo por software: remuestreo de un fotograma {mode_w}x{mode_h} "
+          f"(mediana de {frames}, ms/fotograma)")
+    print(f"  {'escala':8s}" + "".join(f"{name:>12s}" for name in FILTERS) + f"{'relación':>12s}")
+    rng = np.random.default_rng(0)
+    for scale in SCALES:
+        source = rng.integers(0, 255, (int(mode_h * scale), int(mode_w * scale), 4), dtype=np.uint8)
+        timings = {}
+        for name in FILTERS:
+            samples = []
+            for _ in range(frames):
+                start = time.perf_counter()
+                resample(source, mode_w, mode_h, name)
+                samples.append((time.perf_counter() - start) * 1000)
+            timings[name] = statistics.median(samples)
+        print(f"  {scale:<8g}" + "".join(f"{timings[name]:12.2f}" for name in FILTERS)
+              + f"{timings['bilinear'] / timings['nearest']:11.1f}x")
+
+
+
+
+
+'''
+>>> Medición en un servidor X
+'''
+def _xlib():
+    x11 = ctypes.CDLL(ctypes.util.find_library('X11'))
+    dpy = ctypes.c_void_p
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = dpy
+    x11.XCloseDisplay.argtypes = [dpy]
+    x11.XDefaultScreen.argtypes = [dpy]
+    x11.XDefaultRootWindow.argtypes = [dpy]
+    x11.XDefaultRootWindow.restype = ctypes.c_ulong
+    x11.XDefaultGC.argtypes = [dpy, ctypes.c_int]
+    x11.XDefaultGC.restype = ctypes.c_void_p
+    x11.XSetForeground.argtypes = [dpy, ctypes.c_void_p, ctypes.c_ulong]
+    x11.XFillRectangle.argtypes = [dpy, ctypes.c_ulong, ctypes.c_void_p, ctypes.c_int, ctypes.c_int,
+                                   ctypes.c_uint, ctypes.c_uint]
+    x11.XSync.argtypes = [dpy, ctypes.c_int]
+    return x11
+
+
+def frame_cost(x11, dpy, region, frames):
+    """ ms por fotograma dañando toda la salida y esperando a que el servidor lo procese """
+    screen = x11.XDefaultScreen(dpy)
+    root, gc = x11.XDefaultRootWindow(dpy), x11.XDefaultGC(dpy, screen)
+    x, y, width, height = region
+    samples = []
+    for index in range(frames):
+        start = time.perf_counter()
+        x11.XSetForeground(dpy, gc, 0x203040 if index % 2 else 0x405060)
+        x11.XFillRectangle(dpy, root, gc, x, y, width, height)
+        x11.XSync(dpy, 0)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def server_report(display, frames):
+    from backends import BackendError, create_backend
+    from resolution_controller import ResolutionController
+
+    try:
+        backend = create_backend(None, display)
+    except BackendError as e:
+        print(f"[WARN] No se pudo abrir {display}: {e}")
+        return
+    res = ResolutionController(backend)
+    output = res.get_output_name()
+    x11 = _xlib()
+    dpy = x11.XOpenDisplay(display.encode())
+    print(f"\n{display} ({backend.name}), salida {output}: daño a pantalla completa + XSync "
+          f"(mediana de {frames}, ms/fotograma)")
+    try:
+        base = res.get_topology(refresh=True).get(output)
+        rows = [('sin escalar', frame_cost(x11, dpy, (base.x, base.y, base.width, base.height), frames))]
+        for scale in SCALES:
+            for name in FILTERS:
+                if not res.apply_scale(output, scale, filter=name):
+                    print(f"  [WARN] El servidor no acepta {scale:g}x con {name}")
+                    continue
+                out = res.get_topology(refresh=True).get(output)
+                rows.append((f"{scale:g}x {name}", frame_cost(x11, dpy, (out.x, out.y, out.width, out.height),
+                                                              frames)))
+        for label, cost in rows:
+            print(f"  {label:18s} {cost:9.2f}")
+    finally:
+        res.restore_scales()
+        x11.XCloseDisplay(dpy)
+        backend.close()
+
+
+
+
+
+'''
+>>> Programa
+'''
+def main():
+    parser = argparse.ArgumentParser(description='Coste por fotograma de los filtros de escalado (--filter)')
+    parser.add_argument('--frames', type=int, default=20)
+    parser.add_argument('--mode', default='1920x1080', help='Modo del monitor para el modelo por software')
+    parser.add_argument('--xvfb', action='store_true', help='Medir además en un Xvfb propio')
+    parser.add_argument('--display', help='Medir además en un servidor X existente')
+    args = parser.parse_args()
+    mode_w, mode_h = (int(value) for value in args.mode.split('x'))
+
+    model_report(mode_w, mode_h, args.frames)
+
+    if args.display:
+        server_report(args.display, args.frames)
+    if args.xvfb:
+        from bench_operations import start_xvfb
+        display = ':95'
+        proc = start_xvfb(display)
+        if proc is None:
+            print("\n[WARN] Xvfb no está instalado; se omite")
+            return
+        try:
+            server_report(display, args.frames)
+        finally:
+            proc.terminate()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# bench_fleet.py
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKES = os.path.join(ROOT, 'Benchmarks', 'fakes')
+sys.path.insert(0, ROOT)
+
+
+
+
+
+'''
+>>> Escenarios
+'''
+REQUESTS = [
+    {'cmd': 'start', 'factor': 1.5, 'output': 'all'},
+    {'cmd': 'cneg', 'mode': 1},
+    {'cmd': 'stop', 'output': None},
+]
+
+
+def transport_with_latency(latency_ms):
+    """ Transporte local que espera latency_ms antes de cada conexión (apretón de manos SSH) """
+    from fleet import LocalTransport
+
+    transport = LocalTransport()
+    transport.base = ['sh', '-c', 'sleep "$0"; exec "$@"', str(latency_ms / 1000)] + transport.base
+    return transport
+
+
+def run(hosts, transport, parallel, per_command):
+    """ ms en completar REQUESTS en todas las máquinas """
+    from fleet import run_fleet
+
+    batches = [[request] for request in REQUESTS] if per_command else [REQUESTS]
+    start = time.perf_counter()
+    for batch in batches:
+        results = asyncio.run(run_fleet(hosts, batch, transport, parallel, timeout=120))
+        failed = [result.host for result in results if not result.ok]
+        if failed:
+            raise RuntimeError(f"Fallo en {', '.join(failed)}: {results[0]}")
+    return (time.perf_counter() - start) * 1000
+
+
+
+
+
+'''
+>>> Programa
+'''
+def main():
+    parser = argparse.ArgumentParser(description='Latencia de --fleet con el transporte local')
+    parser.add_argument('--hosts', type=int, default=8)
+    parser.add_argument('--parallel', type=int, default=16)
+    parser.add_argument('--latency-ms', type=float, default=150.0,
+                        help='Retardo simulado al abrir cada conexión')
+    parser.add_argument('--xrandr-latency-ms', type=float, default=10.0,
+                        help='Latencia simulada por invocación de xrandr/xcalib')
+    args = parser.parse_args()
+
+    from fleet import Host
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(PATH=FAKES + os.pathsep + os.environ.get('PATH', ''),
+                          SIMURES_BACKEND='xrandr',
+                          SIMURES_FAKE_STATE=os.path.join(tmp, 'state'),
+                          SIMURES_JOURNAL=os.path.join(tmp, 'journal'),
+                          SIMURES_FAKE_LATENCY_MS=str(args.xrandr_latency_ms))
+        hosts = [Host(f"pc{i}", display=f":{100 + i}") for i in range(args.hosts)]
+        transport = transport_with_latency(args.latency_ms)
+
+        rows = [
+            ('en serie, conexión por comando', run(hosts, transport, 1, True)),
+            ('en serie, conexión por máquina', run(hosts, transport, 1, False)),
+            ('en paralelo, conexión por comando', run(hosts, transport, args.parallel, True)),
+            ('en paralelo, conexión por máquina', run(hosts, transport, args.parallel, False)),
+        ]
+
+    print(f"\n{args.hosts} máquinas, {len(REQUESTS)} comandos, {args.latency_ms:.0f} ms por conexión "
+          f"(hasta {args.parallel} a la vez)")
+    for name, elapsed in rows:
+        print(f"  {name:36s} {elapsed:9.1f}ms")
+    print(f"  {'aceleración':36s} {rows[0][1] / rows[-1][1]:9.2f}x")
+
+
+if __name__ == '__main__':
+    main()
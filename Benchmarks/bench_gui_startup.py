@@ -0,0 +1,92 @@
+# bench_gui_startup.py
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+
+
+
+
+'''
+>>> Configuración
+'''
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKES = os.path.join(ROOT, 'Benchmarks', 'fakes')
+TIMEOUT = 30
+
+
+
+
+
+'''
+>>> Medición
+'''
+def run_once(command, env, report_path):
+    """ (ms hasta el primer repintado, pico de RSS en KB) de un arranque de la GUI """
+    if os.path.exists(report_path):
+        os.unlink(report_path)
+    start = time.time()
+    try:
+        subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       timeout=TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"La GUI no llegó a pintarse en {TIMEOUT} s")
+    with open(report_path) as f:
+        report = json.load(f)
+    return (report['paint_ts'] - start) * 1000, report['max_rss_kb']
+
+
+def measure(name, command, env, report_path, runs):
+    # La primera ejecución parte sin caché de iconos en disco (arranque en frío)
+    cold, cold_rss = run_once(command, env, report_path)
+    timings, rss = [], []
+    for _ in range(runs):
+        elapsed, peak = run_once(command, env, report_path)
+        timings.append(elapsed)
+        rss.append(peak)
+    median = statistics.median(timings)
+    print(f"{name:8s} primer pintado: frío {cold:7.1f} ms  mediana {median:7.1f} ms  "
+          f"mín {min(timings):7.1f} ms  RSS máx {max(rss + [cold_rss]) / 1024:6.1f} MB")
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tiempo hasta el primer repintado de la GUI y pico de RSS')
+    parser.add_argument('--exe', help='Ejecutable empaquetado con simures.spec (p. ej. dist/simures)')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=None,
+                        help='Mediana máxima permitida (por defecto no se comprueba)')
+    args = parser.parse_args()
+
+    targets = [('fuente', [sys.executable, os.path.join(ROOT, 'main.py')])]
+    if args.exe:
+        targets.append(('bundle', [os.path.abspath(args.exe)]))
+
+    failures = []
+    for name, command in targets:
+        with tempfile.TemporaryDirectory() as tmp:
+            report_path = os.path.join(tmp, 'paint.json')
+            env = dict(os.environ,
+                       PATH=FAKES + os.pathsep + os.environ.get('PATH', ''),
+                       SIMURES_BACKEND='xrandr',
+                       SIMURES_FAKE_STATE=os.path.join(tmp, 'state.json'),
+                       SIMURES_JOURNAL=os.path.join(tmp, 'journal'),
+                       SIMURES_ICON_CACHE=os.path.join(tmp, 'icons'),
+                       SIMURES_FIRST_PAINT_REPORT=report_path)
+            env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+            median = measure(name, command, env, report_path, args.runs)
+            if args.budget_ms is not None and median > args.budget_ms:
+                failures.append(f"{name}: {median:.1f} ms > {args.budget_ms:.0f} ms")
+
+    if failures:
+        print("\n[ERROR] " + "\n[ERROR] ".join(failures))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
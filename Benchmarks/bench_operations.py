@@ -0,0 +1,261 @@
+# bench_operations.py
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKES = os.path.join(ROOT, 'Benchmarks', 'fakes')
+sys.path.insert(0, ROOT)
+
+
+
+
+
+'''
+>>> Contador de procesos
+'''
+_spawns = [0]
+
+
+def _audit(event, args):
+    if event == 'subprocess.Popen':
+        _spawns[0] += 1
+
+
+sys.addaudithook(_audit)
+
+
+
+
+
+'''
+>>> Utilidades
+'''
+def percentiles(samples):
+    ordered = sorted(samples)
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {
+        'p50': pick(0.50), 'p90': pick(0.90), 'p99': pick(0.99),
+        'mean': statistics.fmean(ordered), 'n': len(ordered),
+    }
+
+
+def measure(fn, runs, setup=None):
+    """ Latencia (ms) y procesos lanzados por llamada """
+    timings, spawns = [], []
+    for _ in range(runs):
+        if setup:
+            setup()
+        before = _spawns[0]
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+        spawns.append(_spawns[0] - before)
+    result = percentiles(timings)
+    result['spawns'] = statistics.fmean(spawns)
+    return result
+
+
+def count_log_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return sum(1 for _ in f)
+
+
+def start_xvfb(display):
+    """ Arrancar Xvfb en el display indicado (None si no está instalado) """
+    if not shutil.which('Xvfb'):
+        return None
+    proc = subprocess.Popen(['Xvfb', display, '-screen', '0', '1920x1080x24'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.0)
+    return proc
+
+
+
+
+
+'''
+>>> Escenarios
+'''
+def bench_controllers(runs):
+    from backends import get_backend
+    from resolution_controller import ResolutionController
+    from colors_controller import ColorsController
+
+    backend = get_backend()
+    res = ResolutionController(backend)
+    colors = ColorsController(backend)
+    outputs = res.get_topology(refresh=True).connected_names()
+    first = outputs[0]
+
+    results = {
+        'query': measure(lambda: res.get_topology(refresh=True), runs),
+        'list (caché)': measure(res.get_all_outputs, runs),
+        'apply': measure(lambda: res.apply_scale(first, 1.5), runs),
+        'restore': measure(lambda: res.restore_scale(first), runs),
+        'apply lote': measure(lambda: res.apply_scales({name: 1.5 for name in outputs}), runs),
+        'restore lote': measure(lambda: res.restore_scales(outputs), runs),
+        'modo color': measure(lambda: colors.apply_negative(2), runs),
+        'restore color': measure(colors.restore_colors, runs),
+    }
+    return backend.name, results
+
+
+def bench_cli(runs, env, log_path):
+    main = os.path.join(ROOT, 'main.py')
+    commands = {
+        'cli --list-outputs': ['--list-outputs'],
+        'cli --start': ['--start', '1.5', '--output', 'all'],
+        'cli --stop': ['--stop'],
+        'cli --cneg': ['--cneg', '--mode', '2'],
+    }
+    results = {}
+    for name, args in commands.items():
+        timings, spawns = [], []
+        for _ in range(runs):
+            before = count_log_lines(log_path)
+            start = time.perf_counter()
+            subprocess.run([sys.executable, main] + args + ['--no-daemon'], env=env,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            timings.append((time.perf_counter() - start) * 1000)
+            spawns.append(count_log_lines(log_path) - before)
+        results[name] = percentiles(timings)
+        results[name]['spawns'] = statistics.fmean(spawns)
+    return results
+
+
+
+def bench_sweep(steps, env):
+    """ Barrido de escalas: un proceso por paso frente a una sola secuencia --batch """
+    main = os.path.join(ROOT, 'main.py')
+    scales = [round(1.0 + i * (1.0 / max(steps - 1, 1)), 3) for i in range(steps)]
+
+    start = time.perf_counter()
+    for scale in scales:
+        subprocess.run([sys.executable, main, '--start', str(scale), '--no-daemon'], env=env,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    per_process = (time.perf_counter() - start) * 1000
+
+    lines = '\n'.join(json.dumps({'cmd': 'apply', 'scale': scale}) for scale in scales) + '\n'
+    start = time.perf_counter()
+    subprocess.run([sys.executable, main, '--batch', '-'], env=env, input=lines, text=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    batch = (time.perf_counter() - start) * 1000
+    subprocess.run([sys.executable, main, '--stop', '--no-daemon'], env=env,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    print(f"\nBarrido de {steps} escalas")
+    print(f"  {'un proceso por paso':22s} {per_process:9.1f}ms")
+    print(f"  {'--batch -':22s} {batch:9.1f}ms")
+    return per_process, batch
+
+
+
+
+
+'''
+>>> Informe y comparación
+'''
+def print_table(title, results):
+    print(f"\n{title}")
+    print(f"  {'operación':20s} {'p50':>9s} {'p90':>9s} {'p99':>9s} {'media':>9s} {'procesos':>9s}")
+    for name, r in results.items():
+        print(f"  {name:20s} {r['p50']:8.2f}ms {r['p90']:8.2f}ms {r['p99']:8.2f}ms "
+              f"{r['mean']:8.2f}ms {r['spawns']:9.1f}")
+
+
+def compare(report, baseline_path, tolerance):
+    """ Regresión: p50 por encima de baseline*tolerancia o más procesos que antes """
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    failures = []
+    for section, results in report.items():
+        for name, r in results.items():
+            base = baseline.get(section, {}).get(name)
+            if not base:
+                continue
+            if r['p50'] > base['p50'] * tolerance:
+                failures.append(f"{section}/{name}: p50 {r['p50']:.2f}ms > {base['p50']:.2f}ms x{tolerance}")
+            if r['spawns'] > base['spawns']:
+                failures.append(f"{section}/{name}: {r['spawns']:.1f} procesos > {base['spawns']:.1f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Latencia y procesos por operación de SimuRES')
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--latency-ms', type=float, default=5.0,
+                        help='Latencia simulada por invocación de xrandr/xcalib')
+    parser.add_argument('--xvfb', action='store_true',
+                        help='Medir además contra Xvfb con el backend por defecto')
+    parser.add_argument('--sweep-steps', type=int, default=10,
+                        help='Pasos del barrido por procesos frente a --batch')
+    parser.add_argument('--json', metavar='FICHERO', help='Guardar el informe en JSON')
+    parser.add_argument('--baseline', metavar='FICHERO', help='Informe JSON de referencia')
+    parser.add_argument('--tolerance', type=float, default=1.25)
+    args = parser.parse_args()
+
+    report = {}
+    original_env = dict(os.environ)
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, 'invocations.jsonl')
+        env = dict(os.environ,
+                   PATH=FAKES + os.pathsep + os.environ.get('PATH', ''),
+                   SIMURES_BACKEND='xrandr',
+                   SIMURES_FAKE_LOG=log_path,
+                   SIMURES_FAKE_STATE=os.path.join(tmp, 'state.json'),
+                   SIMURES_FAKE_LATENCY_MS=str(args.latency_ms))
+        os.environ.update(env)
+
+        backend_name, results = bench_controllers(args.runs)
+        report['fakes'] = results
+        print_table(f"Controladores (backend {backend_name}, xrandr/xcalib simulados)", results)
+
+        report['cli'] = bench_cli(max(3, args.runs // 5), env, log_path)
+        print_table("CLI de extremo a extremo (main.py, en proceso)", report['cli'])
+
+        bench_sweep(args.sweep_steps, env)
+
+    if args.xvfb:
+        display = ':97'
+        proc = start_xvfb(display)
+        if proc is None:
+            print("\n[WARN] Xvfb no está instalado; se omite")
+        else:
+            try:
+                code = ("import json, sys; sys.path.insert(0, %r); "
+                        "import bench_operations as b; name, r = b.bench_controllers(%d); "
+                        "print(json.dumps([name, r]))") % (os.path.dirname(os.path.abspath(__file__)), args.runs)
+                env = {k: v for k, v in original_env.items() if not k.startswith('SIMURES_')}
+                env['DISPLAY'] = display
+                out = subprocess.run([sys.executable, '-c', code], env=env,
+                                     capture_output=True, text=True).stdout
+                name, results = json.loads(out.strip().splitlines()[-1])
+                report['xvfb'] = results
+                print_table(f"Controladores en Xvfb (backend {name})", results)
+            finally:
+                proc.terminate()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        failures = compare(report, args.baseline, args.tolerance)
+        if failures:
+            print("\n[ERROR] " + "\n[ERROR] ".join(failures))
+            sys.exit(1)
+        print("\n[OK] Sin regresiones respecto a la referencia")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+# bench_sim.py
+import os
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKES = os.path.join(ROOT, 'Benchmarks', 'fakes')
+sys.path.insert(0, ROOT)
+
+SCALES = (1.25, 1.5, 2.0, 3.0)
+
+
+
+
+
+'''
+>>> Escenarios
+'''
+def cycles(res, output, count):
+    """ Ciclos aplicar/restaurar por segundo a través de ResolutionController """
+    start = time.perf_counter()
+    for index in range(count):
+        if not res.apply_scale(output, SCALES[index % len(SCALES)]):
+            raise RuntimeError(f"No se pudo aplicar la escala en {output}")
+        if not res.restore_scales():
+            raise RuntimeError("No se pudo restaurar")
+    return count / (time.perf_counter() - start)
+
+
+def sweep_with_failures(res, output, count, probability):
+    """ Con fallos inyectados: cada ciclo fallido debe dejar la topología intacta """
+    backend = res.backend
+    backend.failures = {'apply': probability}
+    failed = inconsistent = 0
+    for index in range(count):
+        before = backend.query().get(output)
+        with contextlib.redirect_stdout(None):  # El controlador informa de cada fallo
+            if not res.apply_scale(output, SCALES[index % len(SCALES)]):
+                failed += 1
+                if backend.query().get(output) != before:
+                    inconsistent += 1
+            while not res.restore_scales():
+                pass  # El restore también puede fallar: reintentar
+    backend.failures = {}
+    return failed, inconsistent
+
+
+def hotplug_events(backend, res, count):
+    """ Conexiones/desconexiones por segundo incorporadas vía el observador """
+    watcher = res.watch_hotplug()
+    res.get_topology(refresh=True)
+    start = time.perf_counter()
+    for index in range(count):
+        backend.set_connected('VIRTUAL-1', index % 2 == 0, mode=(1280, 1024))
+        topology = res.process_hotplug(watcher)
+        if topology.get('VIRTUAL-1').connected != (index % 2 == 0):
+            raise RuntimeError("El observador no reflejó la conexión")
+    elapsed = time.perf_counter() - start
+    watcher.close()
+    return count / elapsed
+
+
+def fake_cycles(count, tmp):
+    """ Lo mismo con el backend xrandr sobre el sustituto de Benchmarks/fakes (un proceso por orden) """
+    from backends import XrandrBackend
+    from resolution_controller import ResolutionController
+
+    os.environ.update(PATH=FAKES + os.pathsep + os.environ.get('PATH', ''),
+                      SIMURES_FAKE_STATE=os.path.join(tmp, 'state'))
+    res = ResolutionController(XrandrBackend())
+    return cycles(res, res.get_output_name(), count)
+
+
+
+
+
+'''
+>>> Programa
+'''
+def main():
+    parser = argparse.ArgumentParser(description='Rendimiento del backend simulado (--backend sim)')
+    parser.add_argument('--cycles', type=int, default=5000)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Latencia simulada por petición')
+    parser.add_argument('--fail', type=float, default=0.2, help='Probabilidad de fallo de apply')
+    parser.add_argument('--fakes', action='store_true', help='Comparar con xrandr sobre los sustitutos')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['SIMURES_JOURNAL'] = os.path.join(tmp, 'journal')
+        from resolution_controller import ResolutionController
+        from sim_backend import SimBackend
+
+        backend = SimBackend(latency_ms=args.latency_ms, seed=0)
+        res = ResolutionController(backend)
+        output = res.get_output_name()
+
+        rate = cycles(res, output, args.cycles)
+        print(f"\nBackend simulado, {args.cycles} ciclos aplicar/restaurar en {output} "
+              f"({args.latency_ms:g} ms por petición)")
+        print(f"  {'ciclos por segundo':32s} {rate:10.0f}")
+        print(f"  {'peticiones al servidor':32s} {sum(backend.counters.values()):10d}")
+
+        count = min(args.cycles, 1000)
+        failed, inconsistent = sweep_with_failures(res, output, count, args.fail)
+        print(f"  {'fallos inyectados en apply':32s} {failed:10d} de {count}")
+        print(f"  {'estados alterados tras un fallo':32s} {inconsistent:10d}")
+        print(f"  {'eventos de conexión por segundo':32s} {hotplug_events(backend, res, count):10.0f}")
+
+        if args.fakes:
+            count = min(args.cycles, 50)
+            print(f"  {'xrandr (sustituto), ciclos/s':32s} {fake_cycles(count, tmp):10.1f}")
+        if inconsistent:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
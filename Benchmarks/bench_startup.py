@@ -0,0 +1,94 @@
+# bench_startup.py
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+
+
+
+
+'''
+>>> Configuración
+'''
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKES = os.path.join(ROOT, 'Benchmarks', 'fakes')
+
+CLI_PATHS = {
+    'list-outputs': ['--list-outputs'],
+    'start': ['--start', '1.5'],
+    'stop': ['--stop'],
+    'cneg': ['--cneg', '--mode', '1'],
+}
+
+# Módulos que nunca deben cargarse en la ruta CLI
+FORBIDDEN = ('PyQt5', 'ui', 'preview', 'async_controller')
+
+
+
+
+
+'''
+>>> Medición
+'''
+def run_once(command, env, report_path):
+    start = time.perf_counter()
+    subprocess.run(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    elapsed = (time.perf_counter() - start) * 1000
+    with open(report_path) as f:
+        modules = f.read().split()
+    return elapsed, modules
+
+
+def forbidden_modules(modules):
+    return sorted(m for m in modules if m.split('.')[0] in FORBIDDEN)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tiempo de arranque de la ruta CLI y ausencia de Qt')
+    parser.add_argument('--exe', help='Ejecutable empaquetado (PyInstaller) en lugar de main.py')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=float(os.environ.get('SIMURES_STARTUP_BUDGET_MS', '250')),
+                        help='Mediana máxima permitida por comando')
+    args = parser.parse_args()
+
+    base = [args.exe] if args.exe else [sys.executable, os.path.join(ROOT, 'main.py')]
+    failures = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = os.path.join(tmp, 'modules.txt')
+        env = dict(os.environ,
+                   PATH=FAKES + os.pathsep + os.environ.get('PATH', ''),
+                   SIMURES_FAKE_STATE=os.path.join(tmp, 'state.json'),
+                   SIMURES_BACKEND='xrandr',
+                   SIMURES_IMPORT_REPORT=report_path)
+
+        for name, cli_args in CLI_PATHS.items():
+            command = base + cli_args + ['--no-daemon']
+            timings, modules = [], []
+            for _ in range(args.runs):
+                elapsed, modules = run_once(command, env, report_path)
+                timings.append(elapsed)
+            median = statistics.median(timings)
+            bad = forbidden_modules(modules)
+            status = 'OK'
+            if bad:
+                status = 'FALLO (Qt/GUI cargado)'
+                failures.append(f"{name}: {', '.join(bad[:5])}")
+            elif median > args.budget_ms:
+                status = 'FALLO (presupuesto)'
+                failures.append(f"{name}: {median:.1f} ms > {args.budget_ms:.0f} ms")
+            print(f"{name:14s} mediana {median:7.1f} ms  mín {min(timings):7.1f} ms  "
+                  f"módulos {len(modules):4d}  {status}")
+
+    if failures:
+        print("\n[ERROR] " + "\n[ERROR] ".join(failures))
+        sys.exit(1)
+    print("\n[OK] La ruta CLI no carga Qt y cumple el presupuesto")
+
+
+if __name__ == '__main__':
+    main()
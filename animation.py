@@ -0,0 +1,114 @@
+# animation.py
+import os
+import re
+import time
+
+from backends import OutputChange
+from profiling import span
+
+
+
+
+
+'''
+>>> Configuración
+'''
+DEFAULT_FPS = float(os.environ.get('SIMURES_ANIMATION_FPS', '60'))
+DEFAULT_DURATION = float(os.environ.get('SIMURES_ANIMATION_MS', '500')) / 1000
+
+_DURATION_RE = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*(ms|s)?\s*$')
+
+
+def parse_duration(text):
+    """ '500ms', '0.5s' o '2' (segundos) -> segundos; ValueError si no es válido """
+    match = _DURATION_RE.match(str(text))
+    if not match:
+        raise ValueError(f"Duración inválida: {text} (ejemplos: 500ms, 1.5s)")
+    value, unit = float(match.group(1)), match.group(2)
+    return value / 1000 if unit == 'ms' else value
+
+
+def ease_in_out(progress):
+    return progress * progress * (3 - 2 * progress)
+
+
+def interpolate(start, end, progress):
+    """ Interpolación geométrica: el zoom se percibe uniforme en escala logarítmica """
+    if start <= 0 or end <= 0:
+        return start + (end - start) * progress
+    return start * (end / start) ** progress
+
+
+
+
+
+'''
+>>> Transición
+'''
+class Transition:
+    """ Lleva la escala de varias salidas a su destino en un tiempo acotado.
+
+    Los fotogramas siguen un reloj fijo; si el servidor no da abasto se descartan los que
+    ya pasaron en lugar de acumular retraso, de modo que la duración total se respeta.
+    """
+    def __init__(self, res_controller, changes, duration=DEFAULT_DURATION, fps=DEFAULT_FPS, cancel=None):
+        self.res_controller = res_controller
+        self.changes = list(changes)
+        self.duration = max(0.0, duration)
+        self.period = 1.0 / max(fps, 1.0)
+        self.cancel = cancel  # threading.Event: una petición más reciente la interrumpe
+
+    def _frame(self, starts, progress):
+        eased = ease_in_out(progress)
+        return [OutputChange(change.name,
+                             round(interpolate(starts[change.name][0], change.scale_x, eased), 4),
+                             round(interpolate(starts[change.name][1], change.scale_y, eased), 4),
+                             change.filter)
+                for change in self.changes]
+
+    def _cancelled(self):
+        return self.cancel is not None and self.cancel.is_set()
+
+    def run(self):
+        if not self.changes:
+            return True
+        if not self.duration:
+            return self.res_controller.apply_changes(self.changes)
+        topology = self.res_controller.get_topology()
+        starts = {}
+        for change in self.changes:
+            out = topology.get(change.name)
+            starts[change.name] = (out.scale_x, out.scale_y) if out else (change.scale_x, change.scale_y)
+
+        with span('transition', output=','.join(starts), backend=self.res_controller.backend.name,
+                  target_ms=round(self.duration * 1000)) as s:
+            self.res_controller.track(list(starts))
+            frames = dropped = index = 0
+            start = time.monotonic()
+            while True:
+                # Siguiente instante del reloj fijo; los fotogramas ya vencidos se descartan
+                next_index = max(index + 1, int((time.monotonic() - start) / self.period) + 1)
+                dropped += next_index - index - 1
+                index = next_index
+                delay = start + index * self.period - time.monotonic()
+                if delay > 0:
+                    if self.cancel is not None:
+                        self.cancel.wait(delay)
+                    else:
+                        time.sleep(delay)
+
+                if self._cancelled():
+                    s.ok = False
+                    s.record.update(frames=frames, dropped=dropped, cancelled=True)
+                    return False
+                progress = min(1.0, (time.monotonic() - start) / self.duration) if self.duration else 1.0
+                if progress >= 1.0:
+                    break
+                if not self.res_controller.apply_frame(self._frame(starts, progress)):
+                    s.ok = False
+                    return False
+                frames += 1
+
+            s.ok = self.res_controller.apply_changes(self.changes)
+            s.record.update(frames=frames + 1, dropped=dropped)
+            return s.ok
@@ -0,0 +1,87 @@
+# assets.py
+import os
+import sys
+
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QPixmap
+
+
+
+
+
+'''
+>>> Rutas de recursos
+'''
+ICONS_DIR = os.path.join('Storage', 'Icons')
+
+
+def resource_path(relative_path):
+    """ Maneja rutas de recursos para desarrollo y versiones empaquetadas """
+    if getattr(sys, 'frozen', False):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base_path, *relative_path.split('/'))
+
+
+def cache_dir():
+    """ Iconos ya reescalados entre ejecuciones ('' en SIMURES_ICON_CACHE lo desactiva) """
+    if 'SIMURES_ICON_CACHE' in os.environ:
+        return os.environ['SIMURES_ICON_CACHE'] or None
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'simures', 'icons')
+
+
+
+
+
+'''
+>>> Caché de pixmaps
+'''
+_pixmaps = {}  # (nombre, ancho, alto) -> QPixmap
+
+
+def _cached_file(source, width, height):
+    """ Ruta en disco de la versión reescalada; cambia si cambia el original """
+    directory = cache_dir()
+    if directory is None:
+        return None
+    stat = os.stat(source)
+    stem = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(directory, f"{stem}-{width}x{height}-{stat.st_size:x}{int(stat.st_mtime):x}.png")
+
+
+def _load_scaled(source, width, height):
+    cached = _cached_file(source, width, height)
+    if cached and os.path.exists(cached):
+        pixmap = QPixmap(cached)
+        if not pixmap.isNull():
+            return pixmap
+
+    # Primera vez: decodificar el original completo y reescalarlo una sola vez
+    pixmap = QPixmap(source)
+    if pixmap.isNull():
+        return pixmap
+    pixmap = pixmap.scaled(width, height, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    if cached:
+        try:
+            os.makedirs(os.path.dirname(cached), exist_ok=True)
+            tmp = f"{cached}.{os.getpid()}.tmp"
+            if pixmap.save(tmp, 'PNG'):
+                os.replace(tmp, cached)
+        except OSError:
+            pass  # Sin caché en disco se sigue teniendo la de memoria
+    return pixmap
+
+
+def icon(name, width, height=None):
+    """ Icono de Storage/Icons reescalado (suave) a width x height, cargado una vez por proceso.
+
+    Devuelve un QPixmap nulo si el fichero no existe.
+    """
+    height = height or width
+    key = (name, width, height)
+    if key not in _pixmaps:
+        source = resource_path(os.path.join(ICONS_DIR, name))
+        _pixmaps[key] = _load_scaled(source, width, height) if os.path.exists(source) else QPixmap()
+    return _pixmaps[key]
@@ -0,0 +1,107 @@
+# async_controller.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from reconciler import DesiredState, OutputTarget, Reconciler
+
+
+
+
+
+'''
+>>> Controlador asíncrono
+'''
+class AsyncController(QObject):
+    """ Ejecuta los controladores en un hilo de trabajo y notifica en el hilo de Qt """
+    _done = pyqtSignal(str, int, object, object)
+
+    def __init__(self, res_controller, color_controller, parent=None):
+        super().__init__(parent)
+        self.res_controller = res_controller
+        self.color_controller = color_controller
+        self.reconciler = Reconciler(res_controller, color_controller)
+        # Un solo hilo: las operaciones sobre el servidor X quedan serializadas
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='simures')
+        self._generations = {}
+        self._futures = {}
+        self._cancels = {}  # Eventos para interrumpir operaciones largas ya en curso (transiciones)
+        self._done.connect(self._on_done)
+
+    def submit(self, key, fn, *args, callback=None):
+        """ Encolar una operación; una más reciente con la misma clave reemplaza a la anterior """
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        previous = self._futures.get(key)
+        if previous is not None:
+            previous.cancel()  # Solo surte efecto si aún no empezó
+        self._interrupt(key)
+
+        future = self.executor.submit(fn, *args)
+        self._futures[key] = future
+        future.add_done_callback(lambda f: self._done.emit(key, generation, f, callback))
+        return future
+
+    def cancel(self, key):
+        """ Cancelar la operación pendiente y descartar el resultado de la que esté en curso """
+        self._generations[key] = self._generations.get(key, 0) + 1
+        future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+        self._interrupt(key)
+
+    def _interrupt(self, key):
+        event = self._cancels.pop(key, None)
+        if event is not None:
+            event.set()
+
+    def is_busy(self, key):
+        future = self._futures.get(key)
+        return future is not None and not future.done()
+
+    def _on_done(self, key, generation, future, callback):
+        if generation != self._generations.get(key):
+            return  # Reemplazada por una petición más reciente
+        self._futures.pop(key, None)
+        if future.cancelled() or callback is None:
+            return
+        error = future.exception()
+        if error is not None:
+            print(f"Error en operación asíncrona '{key}':", error)
+            callback(None)
+            return
+        callback(future.result())
+
+    # Operaciones de alto nivel
+    # Las escalas pasan por el reconciliador: si la salida ya está así no se reconfigura
+    def apply_scale(self, output, scale, callback=None, animate=None, filter=None):
+        return self._reconcile_scale(output, OutputTarget(scale, filter=filter), callback, animate)
+
+    def restore_scale(self, output, callback=None, animate=None):
+        return self._reconcile_scale(output, OutputTarget(), callback, animate)
+
+    def _reconcile_scale(self, output, target, callback, animate):
+        """ Con animate (segundos) la escala cambia como transición, cancelable por otra petición """
+        key = f'scale:{output}'
+        desired = DesiredState({output: target})
+        if not animate:
+            return self.submit(key, self.reconciler.reconcile, desired, callback=callback)
+        cancel = threading.Event()
+        future = self.submit(key, self.reconciler.reconcile, desired, animate, cancel, callback=callback)
+        self._cancels[key] = cancel
+        return future
+
+    def apply_negative(self, mode, callback=None):
+        return self.submit('colors', self.color_controller.apply_negative, mode, callback=callback)
+
+    def apply_filter(self, spec, callback=None):
+        return self.submit('colors', self.color_controller.apply_filter, spec, callback=callback)
+
+    def restore_colors(self, callback=None):
+        return self.submit('colors', self.color_controller.restore_colors, callback=callback)
+
+    def shutdown(self):
+        """ Descartar lo pendiente y esperar a la operación en curso """
+        for key in list(self._futures):
+            self.cancel(key)
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,142 @@
+# backends.py
+import os
+import threading
+import subprocess
+from dataclasses import dataclass
+
+from topology import parse_xrandr_query
+
+
+
+
+
+'''
+>>> Errores y utilidades
+'''
+class BackendError(Exception):
+    """ Error al consultar o modificar la configuración RandR """
+
+
+# Filtros de muestreo del transform: nearest es más barato por fotograma y exacto al píxel
+FILTERS = ('nearest', 'bilinear')
+
+
+def _format_factor(value):
+    return f"{value:g}"
+
+
+@dataclass
+class OutputChange:
+    """ Cambio solicitado para una salida dentro de una aplicación en lote """
+    name: str
+    scale_x: float = 1.0
+    scale_y: float = None
+    filter: str = None  # None conserva el filtro actual
+    x: int = None  # Nueva posición (None conserva la actual)
+    y: int = None
+
+    def __post_init__(self):
+        if self.scale_y is None:
+            self.scale_y = self.scale_x
+
+
+
+
+
+'''
+>>> Backend por subproceso (xrandr)
+'''
+class XrandrBackend:
+    """ Backend de respaldo: ejecuta el binario xrandr sin pasar por /bin/sh """
+    name = 'xrandr'
+    supports_gamma = False
+
+    def __init__(self, display=None):
+        self.display = display
+
+    def _command(self, *args):
+        cmd = ['xrandr']
+        if self.display:
+            cmd += ['--display', self.display]
+        return cmd + list(args)
+
+    def _run(self, *args):
+        try:
+            result = subprocess.run(self._command(*args), capture_output=True, text=True)
+        except OSError as e:
+            raise BackendError(f"No se pudo ejecutar xrandr: {e}")
+        if result.returncode != 0:
+            raise BackendError(result.stderr.strip() or f"xrandr terminó con código {result.returncode}")
+        return result.stdout
+
+    def query(self):
+        return parse_xrandr_query(self._run('--query'))
+
+    def apply(self, changes, screen_size=None):
+        """ Una sola invocación de xrandr para todas las salidas (xrandr revierte si falla) """
+        if not changes:
+            return
+        args = ['--fb', f"{screen_size[0]}x{screen_size[1]}"] if screen_size else []
+        for change in changes:
+            args += ['--output', change.name,
+                     '--scale', f"{_format_factor(change.scale_x)}x{_format_factor(change.scale_y)}"]
+            if change.x is not None:
+                args += ['--pos', f"{change.x}x{change.y}"]
+            if change.filter:
+                args += ['--filter', change.filter]
+        self._run(*args)
+
+    def watch(self):
+        """ xrandr no emite eventos; sin observador (no se sondea) """
+        return None
+
+    def close(self):
+        pass
+
+
+
+
+
+'''
+>>> Selección de backend
+'''
+BACKENDS = ('auto', 'native', 'xrandr', 'sim')
+
+_shared = {}
+_shared_lock = threading.Lock()
+_opening = {}  # Un candado por (backend, display): displays distintos se abren en paralelo
+
+
+def create_backend(name=None, display=None):
+    """ Crear un backend; 'auto' intenta el nativo y recurre a xrandr ('sim' nunca se elige solo) """
+    name = name or os.environ.get('SIMURES_BACKEND', 'auto')
+    if name not in BACKENDS:
+        raise BackendError(f"Backend desconocido: {name}")
+
+    if name == 'sim':
+        from sim_backend import SimBackend
+        return SimBackend(display)
+
+    if name in ('auto', 'native'):
+        try:
+            from native_backend import NativeBackend
+            return NativeBackend(display)
+        except BackendError:
+            if name == 'native':
+                raise
+    return XrandrBackend(display)
+
+
+def get_backend(name=None, display=None):
+    """ Backend compartido por proceso (una sola conexión X por display) """
+    key = (name or os.environ.get('SIMURES_BACKEND', 'auto'), display)
+    backend = _shared.get(key)
+    if backend is not None:
+        return backend
+    # Varios hilos pueden abrir displays distintos a la vez (--display :0,:1); el mismo, una sola vez
+    with _shared_lock:
+        lock = _opening.setdefault(key, threading.Lock())
+    with lock:
+        if key not in _shared:
+            _shared[key] = create_backend(*key)
+    return _shared[key]
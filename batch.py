@@ -0,0 +1,301 @@
+# batch.py
+import sys
+import json
+import time
+import queue
+import threading
+import contextlib
+from dataclasses import dataclass
+
+import commands
+from backends import FILTERS
+from animation import parse_duration
+from reconciler import DesiredState, OutputTarget, Reconciler
+from profiling import span
+
+
+
+
+
+'''
+>>> Lectura de la secuencia de comandos
+'''
+@dataclass
+class BatchItem:
+    line: int
+    request: dict = None
+    error: str = None
+    targets: dict = None  # Salida -> OutputTarget, resuelto al decidir si se fusiona
+
+
+def parse_line(number, text):
+    """ Una línea JSON -> BatchItem (None si está vacía o es un comentario) """
+    text = text.strip()
+    if not text or text.startswith('#'):
+        return None
+    try:
+        request = json.loads(text)
+    except ValueError as e:
+        return BatchItem(number, error=f"JSON inválido: {e}")
+    if not isinstance(request, dict) or not isinstance(request.get('cmd'), str):
+        return BatchItem(number, error="Cada línea debe ser un objeto con 'cmd'")
+    return BatchItem(number, request)
+
+
+class CommandStream:
+    """ Lee la entrada en un hilo aparte: así se sabe, sin bloquear, qué comandos ya llegaron """
+    def __init__(self, stream):
+        self.queue = queue.Queue()
+        self.pending = []
+        self.finished = False
+        threading.Thread(target=self._read, args=(stream,), daemon=True).start()
+
+    def _read(self, stream):
+        for number, text in enumerate(stream, 1):
+            item = parse_line(number, text)
+            if item is not None:
+                self.queue.put(item)
+        self.queue.put(None)
+
+    def _take(self, block):
+        if self.pending:
+            return self.pending.pop(0)
+        if self.finished:
+            return None
+        try:
+            item = self.queue.get(block)
+        except queue.Empty:
+            return None
+        self.finished = item is None
+        return item
+
+    def next(self):
+        """ Siguiente comando, esperando a que llegue (None al terminar la entrada) """
+        return self._take(True)
+
+    def peek(self):
+        """ Siguiente comando si ya está disponible, sin consumirlo """
+        if not self.pending:
+            item = self._take(False)
+            if item is None:
+                return None
+            self.pending.append(item)
+        return self.pending[0]
+
+
+
+
+
+'''
+>>> Ejecución
+'''
+MERGEABLE = ('apply', 'restore')
+PASSTHROUGH = ('start', 'stop', 'cneg', 'profile', 'recover', 'plan')
+
+SETTLE_INTERVAL = 0.05
+SETTLE_TIMEOUT = 2.0
+
+
+class BatchRunner:
+    """ Ejecuta una secuencia JSONL con una sola topología en caché y un resultado por línea.
+
+    Los apply/restore consecutivos sobre salidas distintas que ya estén en la entrada se
+    fusionan en una única reconfiguración; nunca se espera a más entrada para fusionar.
+    """
+    def __init__(self, res_controller, color_controller, out=None):
+        self.res_controller = res_controller
+        self.color_controller = color_controller
+        self.reconciler = Reconciler(res_controller, color_controller)
+        self.out = out or sys.stdout
+        self.failures = 0
+        self.captured = False
+
+    def run(self, stream):
+        """ Procesar toda la entrada; 0 si todos los comandos tuvieron éxito """
+        items = CommandStream(stream)
+        # Los avisos de los controladores van a stderr para no romper el JSON de salida
+        with contextlib.redirect_stdout(sys.stderr):
+            while True:
+                item = items.next()
+                if item is None:
+                    break
+                group = [item]
+                while self._mergeable(group[0]):
+                    following = items.peek()
+                    if following is None or not self._can_merge(group, following):
+                        break
+                    group.append(items.next())
+                self._execute(group)
+            if self.captured:
+                self._flush_captures()
+        return 1 if self.failures else 0
+
+    def _flush_captures(self):
+        """ Esperar a que el escritor termine; los fallos de escritura cuentan como error """
+        from capture import get_writer
+        errors = get_writer().flush()
+        for error in errors:
+            print(json.dumps({'cmd': 'capture', 'ok': False, 'error': f"No se pudo guardar {error}"},
+                             ensure_ascii=False), file=self.out, flush=True)
+        self.failures += len(errors)
+
+    # Fusión de cambios de escala
+    def _resolve(self, item):
+        """ Calcular las salidas destino de un apply/restore (ValueError si no es válido) """
+        request = item.request
+        topology = self.res_controller.get_topology()
+        if request['cmd'] == 'restore':
+            if request.get('output'):
+                names = commands.parse_output_spec(request['output'], topology)
+            else:
+                journaled, _ = self.res_controller.journal.entries()
+                names = [name for name in journaled if name in topology.connected_names()]
+            return {name: OutputTarget() for name in names}
+
+        if request.get('filter') is not None and request['filter'] not in FILTERS:
+            raise ValueError(f"Filtro de escalado inválido: {request['filter']}")
+        outputs = commands.parse_output_spec(request.get('output'), topology)
+        if request.get('target') is not None:
+            # Resolución objetivo por salida en lugar de un factor
+            resolution = commands.parse_resolution(request['target'])
+            outputs = commands.target_scales(topology, outputs, resolution)
+        elif any(factor is None for factor in outputs.values()):
+            # 'scale' solo hace falta para las salidas sin factor propio (NOMBRE=FACTOR)
+            scale = request.get('scale')
+            try:
+                scale_x, scale_y = (float(scale[0]), float(scale[1])) if isinstance(scale, (list, tuple)) \
+                    else (float(scale), float(scale))
+            except (TypeError, ValueError, IndexError):
+                raise ValueError(f"Escala inválida: {scale}")
+        targets = {}
+        for name, factor in outputs.items():
+            if isinstance(factor, tuple):
+                sx, sy = factor
+            else:
+                sx, sy = (factor, factor) if factor is not None else (scale_x, scale_y)
+            if not (1.0 <= sx <= 20.0 and 1.0 <= sy <= 20.0):
+                raise ValueError("Escala debe estar entre 1.0 y 20.0")
+            targets[name] = OutputTarget(sx, sy, request.get('filter'))
+        return targets
+
+    def _mergeable(self, item):
+        if item.error or item.request['cmd'] not in MERGEABLE or item.request.get('animate'):
+            return False
+        if item.request['cmd'] == 'restore' and not item.request.get('output'):
+            # Sus salidas salen del journal tal como quede tras los comandos anteriores:
+            # se resuelven al ejecutarse y nunca se fusionan
+            return False
+        if item.targets is None:
+            try:
+                item.targets = self._resolve(item)
+            except ValueError as e:
+                item.error = str(e)
+                return False
+        return True
+
+    def _can_merge(self, group, item):
+        if not self._mergeable(item):
+            return False
+        claimed = set().union(*(other.targets for other in group))
+        return not claimed & set(item.targets)
+
+    # Ejecución de un grupo
+    def _execute(self, group):
+        head = group[0]
+        cmd = head.request['cmd'] if head.request else None
+        start = time.perf_counter()
+        with span('batch', output=','.join(name for item in group for name in (item.targets or ())) or None,
+                  backend=self.res_controller.backend.name, commands=cmd, merged=len(group)) as s:
+            try:
+                if head.error:
+                    results = [{'ok': False, 'error': head.error}]
+                elif cmd in MERGEABLE:
+                    results = self._run_scales(group)
+                else:
+                    results = [self._run_single(head.request)]
+            except (KeyError, TypeError, ValueError) as e:
+                results = [{'ok': False, 'error': f"Parámetros inválidos: {e}"}] * len(group)
+            s.ok = all(result['ok'] for result in results)
+        duration = round((time.perf_counter() - start) * 1000, 3)
+
+        for item, result in zip(group, results):
+            record = {'line': item.line, 'id': (item.request or {}).get('id'),
+                      'cmd': (item.request or {}).get('cmd'), **result, 'duration_ms': duration}
+            if len(group) > 1:
+                record['merged'] = len(group)
+            self.failures += not result['ok']
+            print(json.dumps(record, ensure_ascii=False), file=self.out, flush=True)
+
+    def _run_scales(self, group):
+        if group[0].targets is None:  # animate o restore sin salida: no se resolvió al fusionar
+            group[0].targets = self._resolve(group[0])
+        targets = {}
+        for item in group:
+            targets.update(item.targets)
+        plan = self.reconciler.plan(DesiredState(targets))
+        animate = group[0].request.get('animate')
+        success = self.reconciler.execute(plan, parse_duration(animate) if animate else None)
+        changed = {change.name for change in plan.changes}
+
+        results = []
+        for item in group:
+            names = list(item.targets)
+            missing = [name for name in names if name in plan.missing]
+            result = {'ok': success and not missing,
+                      'applied': [name for name in names if name in changed],
+                      'unchanged': [name for name in names if name in plan.unchanged]}
+            if missing:
+                result['missing'] = missing
+            results.append(result)
+        return results
+
+    def _run_single(self, request):
+        cmd = request['cmd']
+        if cmd == 'color':
+            mode = request.get('spec', request.get('mode'))
+            if mode is None:
+                raise ValueError("'color' requiere 'mode' (0-3) o 'spec'")
+            plan = self.reconciler.plan(DesiredState(color_mode=mode))
+            success = self.reconciler.execute(plan)
+            return {'ok': success, 'color': self.color_controller.current_mode(),
+                    'changed': plan.color_mode is not None}
+        if cmd == 'list':
+            topology = self.res_controller.get_topology(refresh=bool(request.get('refresh')))
+            return {'ok': bool(topology.connected_names()), 'outputs': [
+                {'name': out.name, 'primary': out.primary, 'scale': [out.scale_x, out.scale_y],
+                 'mode': out.current_mode.name if out.current_mode else None,
+                 'geometry': [out.x, out.y, out.width, out.height], 'filter': out.filter}
+                for out in topology.connected()]}
+        if cmd == 'sleep':
+            seconds = request['ms'] / 1000 if 'ms' in request else parse_duration(request['duration'])
+            time.sleep(seconds)
+            return {'ok': True}
+        if cmd in ('wait-for-settle', 'settle'):
+            timeout = request['timeout_ms'] / 1000 if 'timeout_ms' in request else SETTLE_TIMEOUT
+            return self._settle(timeout)
+        if cmd == 'capture':
+            # Las capturas se escriben en segundo plano mientras sigue la secuencia
+            self.captured = True
+            code, lines = commands.run_capture(self.res_controller, request.get('output'),
+                                               request.get('path'), wait=False)
+            return {'ok': code == 0, 'lines': lines}
+        if cmd in PASSTHROUGH:
+            code, lines = commands.execute(request, self.res_controller, self.color_controller)
+            return {'ok': code == 0, 'lines': lines}
+        return {'ok': False, 'error': f"Comando desconocido: {cmd}"}
+
+    def _settle(self, timeout):
+        """ Consultar hasta que dos lecturas seguidas coincidan (o agotar el tiempo) """
+        deadline = time.monotonic() + timeout
+        previous, polls = None, 0
+        while True:
+            topology = self.res_controller.get_topology(refresh=True)
+            polls += 1
+            snapshot = sorted((out.name, out.x, out.y, out.width, out.height, out.scale_x, out.scale_y)
+                              for out in topology.connected())
+            if snapshot == previous:
+                return {'ok': True, 'polls': polls}
+            if time.monotonic() >= deadline:
+                return {'ok': False, 'polls': polls, 'error': "La configuración no se estabilizó a tiempo"}
+            previous = snapshot
+            time.sleep(SETTLE_INTERVAL)
@@ -0,0 +1,431 @@
+# capture.py
+import os
+import zlib
+import queue
+import struct
+import ctypes
+import ctypes.util
+import threading
+
+import numpy as np
+
+from backends import BackendError
+from native_backend import XID, prepare_xlib, take_x_errors
+
+
+
+
+
+'''
+>>> Tipos de Xlib / MIT-SHM (ctypes)
+'''
+Z_PIXMAP = 2
+ALL_PLANES = 0xFFFFFFFFFFFFFFFF
+IPC_PRIVATE = 0
+IPC_CREAT = 0o1000
+IPC_RMID = 0
+
+
+class XImage(ctypes.Structure):
+    _fields_ = [
+        ('width', ctypes.c_int),
+        ('height', ctypes.c_int),
+        ('xoffset', ctypes.c_int),
+        ('format', ctypes.c_int),
+        ('data', ctypes.c_void_p),
+        ('byte_order', ctypes.c_int),
+        ('bitmap_unit', ctypes.c_int),
+        ('bitmap_bit_order', ctypes.c_int),
+        ('bitmap_pad', ctypes.c_int),
+        ('depth', ctypes.c_int),
+        ('bytes_per_line', ctypes.c_int),
+        ('bits_per_pixel', ctypes.c_int),
+        ('red_mask', ctypes.c_ulong),
+        ('green_mask', ctypes.c_ulong),
+        ('blue_mask', ctypes.c_ulong),
+        ('obdata', ctypes.c_void_p),
+        ('funcs', ctypes.c_void_p * 6),
+    ]
+
+
+class XShmSegmentInfo(ctypes.Structure):
+    _fields_ = [
+        ('shmseg', XID),
+        ('shmid', ctypes.c_int),
+        ('shmaddr', ctypes.c_void_p),
+        ('readOnly', ctypes.c_int),
+    ]
+
+
+
+
+
+'''
+>>> Carga de bibliotecas
+'''
+_libs = {}
+_libs_lock = threading.Lock()
+
+
+def _load_libraries():
+    with _libs_lock:
+        if not _libs:
+            _libs['X11'], _libs['Xext'], _libs['c'] = _open_libraries()
+        return _libs['X11'], _libs['Xext'], _libs['c']
+
+
+def _open_libraries():
+    paths = {name: ctypes.util.find_library(name) for name in ('X11', 'Xext', 'c')}
+    if not all(paths.values()):
+        raise BackendError("libX11/libXext no disponibles")
+    try:
+        x11, xext, libc = (ctypes.CDLL(paths[name], use_errno=True) for name in ('X11', 'Xext', 'c'))
+    except OSError as e:
+        raise BackendError(f"No se pudo cargar libXext: {e}")
+
+    dpy = ctypes.c_void_p
+    image = ctypes.POINTER(XImage)
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = dpy
+    x11.XCloseDisplay.argtypes = [dpy]
+    x11.XDefaultScreen.argtypes = [dpy]
+    x11.XDefaultRootWindow.argtypes = [dpy]
+    x11.XDefaultRootWindow.restype = XID
+    x11.XDefaultVisual.argtypes = [dpy, ctypes.c_int]
+    x11.XDefaultVisual.restype = ctypes.c_void_p
+    x11.XDefaultDepth.argtypes = [dpy, ctypes.c_int]
+    x11.XDisplayWidth.argtypes = [dpy, ctypes.c_int]
+    x11.XDisplayHeight.argtypes = [dpy, ctypes.c_int]
+    x11.XSync.argtypes = [dpy, ctypes.c_int]
+    x11.XGetImage.argtypes = [dpy, XID, ctypes.c_int, ctypes.c_int, ctypes.c_uint, ctypes.c_uint,
+                              ctypes.c_ulong, ctypes.c_int]
+    x11.XGetImage.restype = image
+    x11.XDestroyImage.argtypes = [image]
+
+    xext.XShmQueryExtension.argtypes = [dpy]
+    xext.XShmCreateImage.argtypes = [dpy, ctypes.c_void_p, ctypes.c_uint, ctypes.c_int, ctypes.c_void_p,
+                                     ctypes.POINTER(XShmSegmentInfo), ctypes.c_uint, ctypes.c_uint]
+    xext.XShmCreateImage.restype = image
+    xext.XShmAttach.argtypes = [dpy, ctypes.POINTER(XShmSegmentInfo)]
+    xext.XShmDetach.argtypes = [dpy, ctypes.POINTER(XShmSegmentInfo)]
+    xext.XShmGetImage.argtypes = [dpy, XID, image, ctypes.c_int, ctypes.c_int, ctypes.c_ulong]
+
+    libc.shmget.argtypes = [ctypes.c_int, ctypes.c_size_t, ctypes.c_int]
+    libc.shmat.argtypes = [ctypes.c_int, ctypes.c_void_p, ctypes.c_int]
+    libc.shmat.restype = ctypes.c_void_p
+    libc.shmdt.argtypes = [ctypes.c_void_p]
+    libc.shmctl.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_void_p]
+
+    prepare_xlib(x11)
+    return x11, xext, libc
+
+
+
+
+
+'''
+>>> Fotogramas
+'''
+def _pixels(image):
+    """ Vista NumPy (alto, ancho, 4) BGRX sobre la memoria de la XImage, sin copiar """
+    img = image.contents
+    if img.bits_per_pixel != 32:
+        raise BackendError(f"Formato de píxel no soportado ({img.bits_per_pixel} bpp)")
+    buffer = (ctypes.c_uint8 * (img.bytes_per_line * img.height)).from_address(img.data)
+    rows = np.frombuffer(buffer, dtype=np.uint8).reshape(img.height, img.bytes_per_line // 4, 4)
+    return rows[:, :img.width]
+
+
+class Frame:
+    """ Región capturada. pixels apunta al buffer compartido con el servidor X: hay que
+    llamar a release() (o usar with) antes de que el buffer se reutilice en otra captura.
+    """
+    def __init__(self, pixels, release, output=None, region=None):
+        self.pixels = pixels
+        self.output = output
+        self.region = region
+        self._release = release
+
+    @property
+    def rgb(self):
+        """ Vista RGB (sin copia) del buffer BGRX """
+        return self.pixels[..., 2::-1]
+
+    def release(self):
+        if self._release is not None:
+            self._release()
+            self._release = None
+            self.pixels = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class _ShmImage:
+    """ XImage respaldada por un segmento de memoria compartida (MIT-SHM) """
+    def __init__(self, capture, width, height):
+        self.capture = capture
+        x11, xext, libc = capture.x11, capture.xext, capture.libc
+        self.info = XShmSegmentInfo()
+        self.image = xext.XShmCreateImage(capture.dpy, capture.visual, capture.depth, Z_PIXMAP, None,
+                                          ctypes.byref(self.info), width, height)
+        if not self.image:
+            raise BackendError("XShmCreateImage falló")
+        size = self.image.contents.bytes_per_line * height
+        self.info.shmid = libc.shmget(IPC_PRIVATE, size, IPC_CREAT | 0o600)
+        if self.info.shmid < 0:
+            x11.XDestroyImage(self.image)
+            raise BackendError(f"shmget falló: {os.strerror(ctypes.get_errno())}")
+        address = libc.shmat(self.info.shmid, None, 0)
+        if address in (None, ctypes.c_void_p(-1).value):
+            libc.shmctl(self.info.shmid, IPC_RMID, None)
+            x11.XDestroyImage(self.image)
+            raise BackendError(f"shmat falló: {os.strerror(ctypes.get_errno())}")
+        self.info.shmaddr = self.image.contents.data = address
+        self.info.readOnly = 0
+        attached = xext.XShmAttach(capture.dpy, ctypes.byref(self.info))
+        x11.XSync(capture.dpy, 0)
+        # Marcado para borrar: el segmento desaparece al desconectarse ambos extremos
+        libc.shmctl(self.info.shmid, IPC_RMID, None)
+        if not attached or take_x_errors(capture.dpy):
+            libc.shmdt(address)
+            x11.XDestroyImage(self.image)
+            raise BackendError("XShmAttach falló (¿display remoto?)")
+        self.pixels = _pixels(self.image)
+
+    def destroy(self):
+        self.capture.xext.XShmDetach(self.capture.dpy, ctypes.byref(self.info))
+        self.capture.x11.XDestroyImage(self.image)  # No libera data en imágenes SHM
+        self.capture.libc.shmdt(self.info.shmaddr)
+
+
+
+
+
+'''
+>>> Captura
+'''
+class ScreenCapture:
+    """ Captura regiones de la pantalla sobre una conexión X propia.
+
+    Con MIT-SHM el servidor escribe directamente en segmentos compartidos que se exponen como
+    arrays NumPy sin copias; se reservan hasta `buffers` segmentos por tamaño de región, que
+    vuelven al grupo cuando se libera el fotograma (p. ej. cuando FrameWriter lo ha escrito).
+    Sin MIT-SHM (displays remotos) se recurre a XGetImage, que sí copia.
+    """
+    def __init__(self, display=None, buffers=3):
+        self.x11, self.xext, self.libc = _load_libraries()
+        self.display = display
+        self.dpy = self.x11.XOpenDisplay(display.encode() if display else None)
+        if not self.dpy:
+            raise BackendError(f"No se pudo abrir el display {display or '(DISPLAY)'}")
+        self.screen = screen = self.x11.XDefaultScreen(self.dpy)
+        self.root = self.x11.XDefaultRootWindow(self.dpy)
+        self.visual = self.x11.XDefaultVisual(self.dpy, screen)
+        self.depth = self.x11.XDefaultDepth(self.dpy, screen)
+        self.shm = bool(self.xext.XShmQueryExtension(self.dpy)) and not os.environ.get('SIMURES_NO_SHM')
+        self.buffers = max(1, buffers)
+        self._images = {}  # (ancho, alto) -> [_ShmImage]
+        self._free = {}  # (ancho, alto) -> [_ShmImage] disponibles
+        self._cond = threading.Condition()
+        self.lock = threading.Lock()
+
+    def _acquire(self, width, height):
+        key = (width, height)
+        with self._cond:
+            while not self._free.get(key):
+                if len(self._images.get(key, ())) < self.buffers:
+                    image = _ShmImage(self, width, height)
+                    self._images.setdefault(key, []).append(image)
+                    return image
+                self._cond.wait()  # Todos en uso: esperar a que el escritor libere uno
+            return self._free[key].pop()
+
+    def _give_back(self, key, image):
+        with self._cond:
+            self._free.setdefault(key, []).append(image)
+            self._cond.notify()
+
+    def grab(self, x, y, width, height, output=None):
+        """ Capturar la región indicada de la ventana raíz -> Frame """
+        if width <= 0 or height <= 0:
+            raise BackendError("Región de captura vacía")
+        with self.lock:
+            image = None
+            if self.shm:
+                try:
+                    image = self._acquire(width, height)
+                except BackendError as e:
+                    # El servidor no comparte memoria con este proceso: capturar copiando
+                    print("MIT-SHM no disponible, se usa XGetImage:", e)
+                    self.shm = False
+            if image is not None:
+                ok = self.xext.XShmGetImage(self.dpy, self.root, image.image, x, y, ALL_PLANES)
+                errors = take_x_errors(self.dpy) if ok else None
+                if not ok or errors:
+                    self._give_back((width, height), image)
+                    raise BackendError(f"XShmGetImage falló en {width}x{height}+{x}+{y}")
+                return Frame(image.pixels, lambda: self._give_back((width, height), image),
+                             output, (x, y, width, height))
+
+            ximage = self.x11.XGetImage(self.dpy, self.root, x, y, width, height, ALL_PLANES, Z_PIXMAP)
+            take_x_errors(self.dpy)
+            if not ximage:
+                raise BackendError(f"XGetImage falló en {width}x{height}+{x}+{y}")
+            return Frame(_pixels(ximage), lambda: self.x11.XDestroyImage(ximage), output, (x, y, width, height))
+
+    def screen_size(self):
+        return self.x11.XDisplayWidth(self.dpy, self.screen), self.x11.XDisplayHeight(self.dpy, self.screen)
+
+    def grab_output(self, out, topology=None):
+        """ Capturar la región del framebuffer que muestra una salida (OutputState) """
+        if not out.active:
+            raise BackendError(f"La pantalla '{out.name}' no está activa")
+        width, height = out.width, out.height
+        if topology is not None and topology.screen_width:
+            width = min(width, topology.screen_width - out.x)
+            height = min(height, topology.screen_height - out.y)
+        return self.grab(out.x, out.y, width, height, out.name)
+
+    def close(self):
+        with self._cond:
+            for images in self._images.values():
+                for image in images:
+                    image.destroy()
+            self._images.clear()
+            self._free.clear()
+        if self.dpy:
+            self.x11.XCloseDisplay(self.dpy)
+            self.dpy = None
+
+
+
+
+
+'''
+>>> Escritura asíncrona
+'''
+PNG_LEVEL = int(os.environ.get('SIMURES_CAPTURE_PNG_LEVEL', '1'))
+
+
+def _png_chunk(kind, data):
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+
+def write_frame(pixels, path):
+    """ Guardar una vista BGRX en .png, .ppm o .npy (BGRX tal cual) según la extensión """
+    extension = os.path.splitext(path)[1].lower()
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    height, width = pixels.shape[:2]
+    if extension == '.npy':
+        np.save(path, pixels)
+        return
+    rgb = np.ascontiguousarray(pixels[..., 2::-1])
+    if extension == '.ppm':
+        with open(path, 'wb') as f:
+            f.write(f"P6 {width} {height} 255\n".encode())
+            f.write(rgb.data)
+        return
+    if extension != '.png':
+        raise ValueError(f"Formato de captura no soportado: '{extension}' (png, ppm o npy)")
+    # Cada fila PNG lleva delante su byte de filtro (0 = ninguno)
+    rows = np.empty((height, 1 + width * 3), dtype=np.uint8)
+    rows[:, 0] = 0
+    rows[:, 1:] = rgb.reshape(height, -1)
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(_png_chunk(b'IDAT', zlib.compress(rows.data, PNG_LEVEL)))
+        f.write(_png_chunk(b'IEND', b''))
+
+
+class FrameWriter:
+    """ Hilo que escribe fotogramas en disco y los libera al terminar """
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.written = 0
+        self.errors = []
+        self._thread = threading.Thread(target=self._run, name='simures-capture', daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if item is None:
+                    return
+                frame, path = item
+                try:
+                    write_frame(frame.pixels, path)
+                    self.written += 1
+                except (OSError, ValueError) as e:
+                    self.errors.append(f"{path}: {e}")
+                finally:
+                    frame.release()
+            finally:
+                self.queue.task_done()
+
+    def submit(self, frame, path):
+        self.queue.put((frame, path))
+
+    def flush(self):
+        """ Esperar a que se escriba todo lo encolado; devuelve y vacía los errores """
+        self.queue.join()
+        errors, self.errors = self.errors, []
+        return errors
+
+    def close(self):
+        self.queue.put(None)
+        self._thread.join()
+
+
+
+
+
+'''
+>>> Instancias compartidas por proceso
+'''
+_captures = {}
+_captures_lock = threading.Lock()
+_opening = {}  # Un candado por display: displays distintos se abren en paralelo
+_writer = []
+_writer_lock = threading.Lock()
+
+
+def get_capture(display=None):
+    """ Captura compartida por display; la conexión X y los segmentos SHM se crean una sola vez """
+    capture = _captures.get(display)
+    if capture is not None:
+        return capture
+    with _captures_lock:
+        lock = _opening.setdefault(display, threading.Lock())
+    with lock:
+        if display not in _captures:
+            _captures[display] = ScreenCapture(display)
+    return _captures[display]
+
+
+def get_writer():
+    with _writer_lock:
+        if not _writer:
+            _writer.append(FrameWriter())
+    return _writer[0]
+
+
+DEFAULT_PATTERN = 'simures-{output}-{scale}x.png'
+
+
+def capture_path(pattern, output, scale=None, index=0, display=None):
+    """ Sustituir {output}, {scale}, {n} y {display}; un directorio recibe '<salida>-<escala>x.png' """
+    pattern = pattern or DEFAULT_PATTERN
+    if pattern.endswith(os.sep) or os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '{output}-{scale}x.png')
+    display = (display or os.environ.get('DISPLAY', ':0')).replace(':', '').replace('/', '_')
+    return pattern.format(output=output, scale=f"{scale:g}" if scale is not None else 'actual',
+                          n=index, display=display)
@@ -0,0 +1,91 @@
+# color_filters.py
+
+
+
+
+
+'''
+>>> Operaciones y presets
+'''
+# Nombre -> número de parámetros (3 = por canal r:g:b; un único valor se aplica a los tres)
+OPERATIONS = {
+    'invert': 0,
+    'gain': 3,
+    'gamma': 3,
+    'contrast': 1,
+    'brightness': 1,
+    'temperature': 1,
+}
+
+# Los modos negativos 1-3 son cadenas de la misma tubería: la inversión, sola o teñida de azul
+# o de rojo (el respaldo con xcalib aplica los mismos pasos, colors_controller.XCALIB_MODES)
+PRESETS = {
+    1: 'invert',                               # Clásico
+    2: 'invert,gamma=1:1:2,gain=0.5:0.8:1',    # Frío
+    3: 'invert,gamma=2:1:1,gain=1:0.8:0.5',    # Cálido
+}
+PRESET_NAMES = {'clasico': 1, 'frio': 2, 'calido': 3}
+
+
+def _validate(name, values):
+    if name == 'gamma' and any(v <= 0 for v in values):
+        raise ValueError("gamma debe ser mayor que 0")
+    if name == 'temperature' and not 1000 <= values[0] <= 40000:
+        raise ValueError("temperature debe estar entre 1000 y 40000 K")
+    if name in ('gain', 'contrast') and any(v < 0 for v in values):
+        raise ValueError(f"{name} no admite valores negativos")
+
+
+def parse_filter_spec(spec):
+    """ 'invert,contrast=1.2,gain=1:0.9:0.8', un preset (1-3, clasico...) -> cadena canónica """
+    spec = str(spec).strip().lower()
+    if spec in PRESET_NAMES:
+        spec = PRESETS[PRESET_NAMES[spec]]
+    elif spec.isdigit() and int(spec) in PRESETS:
+        spec = PRESETS[int(spec)]
+
+    chain = []
+    for item in spec.split(','):
+        name, _, args = item.strip().partition('=')
+        if name not in OPERATIONS:
+            raise ValueError(f"Operación de color desconocida: '{name}' "
+                             f"(disponibles: {', '.join(OPERATIONS)})")
+        arity = OPERATIONS[name]
+        if arity == 0:
+            if args:
+                raise ValueError(f"'{name}' no admite parámetros")
+            chain.append((name, ()))
+            continue
+        try:
+            values = tuple(float(v) for v in args.split(':'))
+        except ValueError:
+            raise ValueError(f"Parámetros inválidos para '{name}': {args or '(vacío)'}")
+        if len(values) not in (1, arity):
+            raise ValueError(f"'{name}' admite 1 o {arity} valores")
+        values = values * arity if len(values) == 1 else values
+        _validate(name, values)
+        chain.append((name, values))
+    return tuple(chain)
+
+
+def format_chain(chain):
+    """ Forma canónica legible de una cadena (sirve también de clave) """
+    return ','.join(name if not params else f"{name}={':'.join(f'{v:g}' for v in params)}"
+                    for name, params in chain)
+
+
+def preset_for(chain):
+    """ Modo 1-3 equivalente a la cadena, o None """
+    for mode, spec in PRESETS.items():
+        if parse_filter_spec(spec) == chain:
+            return mode
+    return None
+
+
+def normalize_color(value):
+    """ Estado de color comparable: None (sin opinión), 0 (normal) o la cadena canónica """
+    if value is None:
+        return None
+    if value in (0, '0', 'normal'):
+        return 0
+    return format_chain(parse_filter_spec(value))
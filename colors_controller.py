@@ -1,42 +1,184 @@
 # colors_controller.py
 import subprocess
 
+from backends import BackendError, get_backend
+from color_filters import PRESETS, format_chain, normalize_color, parse_filter_spec, preset_for
+from journal import get_journal
+from profiling import span
 
 
 
 
+
+# Entrada del journal cuando el color se cambió con xcalib (sin rampa que guardar)
+XCALIB_ENTRY = '*'
+
+# Los PRESETS con xcalib, una invocación por paso: primero se invierte y después, con -a sobre
+# la tabla ya invertida, gamma y ganancia por canal (-<canal> gamma brillo% contraste%)
+XCALIB_MODES = {
+    1: [['-i', '-a']],  # Clásico
+    2: [['-i', '-a'], ['-red', '1.0', '0.0', '50.0', '-green', '1.0', '0.0', '80.0',
+                       '-blue', '2.0', '0.0', '100.0', '-a']],  # Frío
+    3: [['-i', '-a'], ['-red', '2.0', '0.0', '100.0', '-green', '1.0', '0.0', '80.0',
+                       '-blue', '1.0', '0.0', '50.0', '-a']],  # Cálido
+}
+
+
 class ColorsController:
-    @staticmethod
-    def apply_negative(tipo):
+    def __init__(self, backend=None, journal=None):
+        self.backend = backend or get_backend()
+        self.journal = journal or get_journal(self.backend.display, self.backend.name)
+        self.mode = None  # Filtro aplicado por este proceso (0 = colores normales, o cadena canónica)
+        self.engine = None
+        if getattr(self.backend, 'supports_gamma', False):
+            try:
+                from gamma import GammaEngine  # NumPy solo se importa si se va a usar
+                self.engine = GammaEngine(self.backend, self.journal)
+            except ImportError:  # NumPy no instalado: se usa xcalib
+                pass
+
+    def prepare(self):
+        """ Precalcular las rampas de todos los modos para cada CRTC """
+        if self.engine is not None:
+            try:
+                self.engine.precompute()
+            except BackendError as e:
+                print("Error precalculando rampas gamma:", e)
+
+    def outputs_changed(self):
+        """ Tras conectar o desconectar monitores: volver a consultar los CRTC y sus tamaños de rampa """
+        if self.engine is not None:
+            self.engine.invalidate()
+
+    def apply_negative(self, tipo):
         """ Aplicar efecto de color negativo """
+        spec = PRESETS.get(tipo)
+        if spec is None:
+            return (False, f"Modo negativo inválido: {tipo} (opciones: {', '.join(map(str, PRESETS))})")
+        return self.apply_filter(spec)
+
+    def apply_filter(self, spec):
+        """ Aplicar una cadena de filtros ('invert,contrast=1.2', un preset...) """
+        try:
+            chain = parse_filter_spec(spec)
+        except ValueError as e:
+            return (False, str(e))
+        canonical = format_chain(chain)
+        with span('color_mode', backend=self._backend_label(), mode=canonical) as s:
+            result = self._apply_filter(chain)
+            s.ok = result[0]
+            if result[0]:
+                self.mode = canonical
+                _, colors = self.journal.entries()
+                self.journal.annotate('colors', {name: {'mode': canonical} for name in colors})
+            return result
+
+    def restore_colors(self):
+        """ Restaurar colores normales """
+        with span('restore_colors', backend=self._backend_label()) as s:
+            result = self._restore_colors()
+            s.ok = result[0]
+            if result[0]:
+                self.mode = 0
+            return result
+
+    def current_mode(self):
+        """ Modo de color vigente: 0 si no hay nada pendiente en el journal, None si se desconoce """
+        if self.mode is not None:
+            return self.mode
+        _, colors = self.journal.entries()
+        modes = {entry.get('mode') for entry in colors.values()}
+        if not colors:
+            return 0
+        if len(modes) != 1 or None in modes:
+            return None
         try:
-            subprocess.run(['xcalib', '-c'], check=True)  # Reset previo
-            
-            configs = {
-                1: ['-i', '-a'],  # Inversión clásica
-                2: ['-red', '0.5,2.0,0.5', '-blue', '2.0,0.5,2.0', '-a'],  # Azul
-                3: ['-blue', '0.5,2.0,0.5', '-red', '2.0,0.5,2.0', '-a']   # Rojo
-            }
-            
-            cmd = ['xcalib'] + configs[tipo]
-            result = subprocess.run(cmd, capture_output=True, text=True)
-            
-            if "out of range" in result.stderr:
+            return normalize_color(modes.pop())
+        except ValueError:
+            return None
+
+    def recover(self, entries):
+        """ Reponer las rampas registradas en el journal por una sesión anterior """
+        with span('recover_colors', backend=self._backend_label()) as s:
+            result = (True, "Colores restablecidos correctamente")
+            ramps = [output for output, entry in entries.items() if entry.get('ramps')]
+            if ramps and self.engine is not None:
+                try:
+                    self.engine.restore([o for o in ramps if o in self.engine.sizes()])
+                    self.journal.forget_colors(ramps)
+                except BackendError as e:
+                    result = (False, f"Error al restaurar: {e}")
+            if XCALIB_ENTRY in entries or (ramps and self.engine is None):
+                result = self._xcalib_restore()
+                if result[0]:
+                    self.journal.forget_colors(entries)
+            s.ok = result[0]
+            if result[0]:
+                self.mode = 0
+            return result
+
+    def _backend_label(self):
+        return self.backend.name if self.engine is not None else 'xcalib'
+
+    def _apply_filter(self, chain):
+        if self.engine is not None:
+            try:
+                self.engine.apply_chain(chain)
+                return (True, "Efecto aplicado correctamente")
+            except BackendError as e:
+                return (False, f"Error aplicando rampa gamma: {e}")
+        if getattr(self.backend, 'simulated', False):
+            return (False, "El backend simulado necesita NumPy para los filtros de color")
+        tipo = preset_for(chain)
+        if tipo is None:
+            return (False, "Los filtros compuestos requieren el backend nativo y NumPy (xcalib solo admite los modos 1-3)")
+        self.journal.record_gamma(XCALIB_ENTRY)
+        return self._xcalib_negative(tipo)
+
+    def _restore_colors(self):
+        if self.engine is not None:
+            try:
+                self.engine.restore()
+                return (True, "Colores restablecidos correctamente")
+            except BackendError as e:
+                return (False, f"Error al restaurar: {e}")
+        if getattr(self.backend, 'simulated', False):
+            return (True, "Colores restablecidos correctamente")  # Sin NumPy nunca se cambiaron
+        result = self._xcalib_restore()
+        if result[0]:
+            self.journal.forget_colors([XCALIB_ENTRY])
+        return result
+
+    def _xcalib(self, *args):
+        """ Comando xcalib dirigido al display del backend """
+        display = ['-d', self.backend.display] if self.backend.display else []
+        return ['xcalib'] + display + list(args)
+
+    def _xcalib_negative(self, tipo):
+        """ Respaldo sin NumPy/libXrandr: aplicar el negativo con xcalib """
+        try:
+            subprocess.run(self._xcalib('-c'), check=True)  # Reset previo
+
+            stderr = ''
+            for args in XCALIB_MODES[tipo]:
+                result = subprocess.run(self._xcalib(*args), capture_output=True, text=True)
+                stderr += result.stderr
+
+            if "out of range" in stderr:
                 return (True, "Advertencia: Parámetros ajustados automáticamente")
             return (True, "Efecto aplicado correctamente")
-            
+
         except subprocess.CalledProcessError as e:
             return (False, f"Error en xcalib: {e.stderr}")
         except Exception as e:
             return (False, f"Error inesperado: {str(e)}")
 
-    @staticmethod
-    def restore_colors():
-        """ Restaurar colores normales """
+    def _xcalib_restore(self):
+        """ Respaldo sin NumPy/libXrandr: restaurar con xcalib """
         try:
-            subprocess.run(['xcalib', '-c'], check=True)
+            subprocess.run(self._xcalib('-c'), check=True)
             return (True, "Colores restablecidos correctamente")
         except subprocess.CalledProcessError as e:
             return (False, f"Error al restaurar: {e.stderr}")
         except Exception as e:
-            return (False, f"Error inesperado: {str(e)}")
\ No newline at end of file
+            return (False, f"Error inesperado: {str(e)}")
@@ -0,0 +1,303 @@
+# commands.py
+import re
+
+from backends import FILTERS, BackendError
+from color_filters import format_chain, parse_filter_spec, preset_for
+from layout import scale_for_target
+from planner import format_plan
+from profiling import span
+from reconciler import DesiredState, OutputTarget, Reconciler, load_profiles
+
+
+
+
+
+'''
+>>> Comandos CLI compartidos (proceso local y daemon)
+'''
+NEGATIVE_NAMES = {1: "clásico", 2: "frío", 3: "cálido"}
+
+
+def parse_output_spec(spec, topology, default_factor=None):
+    """ Interpretar --output: 'all', 'HDMI-1,DP-1' o 'HDMI-1=1.5,DP-1=2.0' """
+    available = topology.connected_names()
+    if not spec:
+        output = topology.default_output()
+        if not output:
+            raise ValueError("No se detectaron pantallas")
+        return {output: default_factor}
+    if spec.strip() == 'all':
+        if not available:
+            raise ValueError("No se detectaron pantallas")
+        return {name: default_factor for name in available}
+
+    scales = {}
+    for item in spec.split(','):
+        name, _, factor = item.strip().partition('=')
+        if name not in available:
+            raise ValueError(f"La pantalla '{name}' no existe")
+        try:
+            scales[name] = float(factor) if factor else default_factor
+        except ValueError:
+            raise ValueError(f"Factor de escala inválido para '{name}': {factor}")
+    return scales
+
+
+def parse_resolution(text):
+    """ '3840x2160' -> (3840, 2160); ValueError si no es válido """
+    match = re.match(r'^\s*(\d+)\s*[xX]\s*(\d+)\s*$', str(text))
+    if not match or not all(int(value) > 0 for value in match.groups()):
+        raise ValueError(f"Resolución inválida: {text} (ejemplo: 3840x2160)")
+    return int(match.group(1)), int(match.group(2))
+
+
+def target_scales(topology, names, target):
+    """ {salida: (escala_x, escala_y)} con la que cada salida ocupa target (ancho, alto) """
+    scales = {}
+    for name in names:
+        out = topology.get(name)
+        if not out.active:
+            raise ValueError(f"La pantalla '{name}' no tiene un modo activo")
+        scales[name] = scale_for_target(out, *target)
+    return scales
+
+
+def run_list(res_controller):
+    outputs = res_controller.get_all_outputs()
+    if not outputs:
+        return 1, ["[ERROR] No se detectaron pantallas"]
+    return 0, ["Pantallas disponibles:"] + [f"  - {out}" for out in outputs]
+
+
+def run_stop(res_controller, color_controller, output_spec=None):
+    """ Restaurar colores y, en lote, las salidas indicadas o todas las modificadas """
+    success_color, _ = color_controller.restore_colors()
+
+    topology = res_controller.get_topology()
+    if output_spec:
+        try:
+            outputs = list(parse_output_spec(output_spec, topology))
+        except ValueError as e:
+            return 1, [f"[ERROR] {e}"]
+    else:
+        # Solo lo que se modificó (journal): una escala previa ajena no se toca
+        journaled, _ = res_controller.journal.entries()
+        outputs = [name for name in journaled if name in topology.connected_names()]
+    success_res = res_controller.restore_scales(outputs)
+
+    if success_res and success_color:
+        return 0, ["[OK] Valores originales restaurados"]
+    return 1, ["[ERROR] Fallo al restaurar uno o más valores"]
+
+
+def run_start(res_controller, factor, output_spec=None, animate=None, cancel=None, filter=None, target=None):
+    """ Escalar las salidas por factor o, con target (ancho, alto), hasta esa resolución """
+    if filter is not None and filter not in FILTERS:
+        return 1, [f"[ERROR] Filtro de escalado inválido: {filter} (opciones: {', '.join(FILTERS)})"]
+    topology = res_controller.get_topology()
+    try:
+        scales = parse_output_spec(output_spec, topology, factor)
+        if target is not None:
+            scales = target_scales(topology, scales, target)
+    except ValueError as e:
+        outputs = topology.connected_names()
+        if outputs:
+            return 1, [f"[ERROR] {e}", "Pantallas disponibles: " + ", ".join(outputs)]
+        return 1, [f"[ERROR] {e}", "No se detectaron pantallas disponibles"]
+
+    pairs = {output: value if isinstance(value, tuple) else (value, value) for output, value in scales.items()}
+    if not all(1.0 <= value <= 20.0 for pair in pairs.values() for value in pair):
+        if target is not None:
+            return 1, ["[ERROR] La resolución objetivo debe estar entre 1x y 20x el modo de cada pantalla"]
+        return 1, ["[ERROR] Escala debe estar entre 1.0 y 20.0"]
+    # No enviar al servidor una configuración que no puede aceptar
+    plan = res_controller.plan(pairs)
+    if not plan.ok:
+        return 1, [f"[ERROR] {problem}" for problem in plan.problems]
+
+    # Solo se reconfiguran las salidas que no estén ya a esa escala (y con ese filtro)
+    reconciler = Reconciler(res_controller, None)
+    plan = reconciler.plan(DesiredState({output: OutputTarget(*pair, filter) for output, pair in pairs.items()}))
+    success = reconciler.execute(plan, animate, cancel)
+    if cancel is not None and cancel.is_set():
+        return 1, ["[WARN] Transición interrumpida por una petición más reciente"]
+    if success:
+        suffix = f" ({filter})" if filter else ""
+        lines = []
+        for output, value in scales.items():
+            label = (f"Resolución {target[0]}x{target[1]} ({value[0]:g}x{value[1]:g})" if target is not None
+                     else f"Escala {value}x")
+            state = 'ya estaba aplicada' if output in plan.unchanged else 'aplicada'
+            lines.append(f"[OK] {label}{suffix} {state} en {output}")
+        return 0, lines
+    return 1, ["[ERROR] Fallo al aplicar escala"]
+
+
+def run_plan(res_controller, factor=None, output_spec=None, target=None):
+    """ Framebuffer, memoria y coste de escalado de --start sin aplicarlo (código 1 si no cabe) """
+    topology = res_controller.get_topology()
+    try:
+        scales = parse_output_spec(output_spec, topology, factor)
+        if target is not None:
+            scales = target_scales(topology, scales, target)
+    except ValueError as e:
+        return 1, [f"[ERROR] {e}"]
+    # Sin factor, la salida conserva su escala actual
+    plan = res_controller.plan({name: value for name, value in scales.items() if value is not None})
+    return (0 if plan.ok else 1), format_plan(plan)
+
+
+def run_cneg(color_controller, mode=None, spec=None):
+    """ Aplicar un modo negativo (1-3) o una cadena de filtros """
+    if mode is None and spec is None:
+        return 1, ["[ERROR] Indica un modo negativo (1-3) o una cadena de filtros"]
+    if spec is not None:
+        try:
+            chain = parse_filter_spec(spec)
+        except ValueError as e:
+            return 1, [f"[ERROR] {e}"]
+        mode = preset_for(chain)
+    if mode is None:
+        success, msg = color_controller.apply_filter(spec)
+        label = f"Filtro de color aplicado: {format_chain(chain)}"
+    else:
+        success, msg = color_controller.apply_negative(mode)
+        label = f"Modo negativo {NEGATIVE_NAMES.get(mode, mode)} aplicado"
+    if not success:
+        return 1, [f"[ERROR] {msg}"]
+    lines = [f"[OK] {label}"]
+    if "Advertencia" in msg:
+        lines.append(f"[WARN] {msg}")
+    return 0, lines
+
+
+def run_profile(res_controller, color_controller, name, path=None):
+    """ Llevar la configuración al perfil indicado aplicando solo la diferencia """
+    try:
+        profiles = load_profiles(path)
+    except ValueError as e:
+        return 1, [f"[ERROR] {e}"]
+    if name not in profiles:
+        available = ", ".join(sorted(profiles)) or "ninguno"
+        return 1, [f"[ERROR] El perfil '{name}' no existe", f"Perfiles disponibles: {available}"]
+
+    reconciler = Reconciler(res_controller, color_controller)
+    plan = reconciler.plan(profiles[name])
+    if plan.missing:
+        return 1, [f"[ERROR] Pantallas del perfil no conectadas: {', '.join(plan.missing)}"]
+    if plan.empty:
+        return 0, [f"[OK] El perfil '{name}' ya está aplicado"]
+    if not reconciler.execute(plan):
+        return 1, [f"[ERROR] Fallo al aplicar el perfil '{name}'"]
+    lines = [f"[OK] Escala {c.scale_x:g}x{c.scale_y:g}{f' ({c.filter})' if c.filter else ''} aplicada en {c.name}"
+             for c in plan.changes]
+    if plan.color_mode is not None:
+        lines.append(f"[OK] Filtro de color aplicado: {plan.color_mode}" if plan.color_mode
+                     else "[OK] Colores restablecidos")
+    return 0, lines + [f"[OK] Perfil '{name}' aplicado"]
+
+
+def run_recover(res_controller, color_controller, stale_only=False):
+    """ Reponer en un solo paso el estado original registrado en el journal """
+    outputs, colors = res_controller.journal.entries(stale_only)
+    if not outputs and not colors:
+        return 0, ["[OK] No hay cambios pendientes de restaurar"]
+    success_res = res_controller.recover(outputs) if outputs else True
+    success_color = color_controller.recover(colors)[0] if colors else True
+
+    names = ', '.join(list(outputs) + (["colores"] if colors else []))
+    if success_res and success_color:
+        return 0, [f"[OK] Estado original recuperado: {names}"]
+    return 1, [f"[ERROR] Fallo al recuperar el estado original de: {names}"]
+
+
+def run_capture(res_controller, output_spec=None, pattern=None, wait=True):
+    """ Capturar las salidas indicadas (MIT-SHM) y escribirlas en segundo plano
+
+    Con wait=False se devuelve en cuanto las capturas están encoladas (modo batch).
+    """
+    if getattr(res_controller.backend, 'simulated', False):
+        # Las pantallas simuladas no tienen píxeles: se capturaría el display X real
+        return 1, ["[ERROR] La captura no está disponible con el backend simulado (--backend sim)"]
+    try:
+        from capture import capture_path, get_capture, get_writer  # NumPy solo si se captura
+    except ImportError:
+        return 1, ["[ERROR] La captura requiere NumPy"]
+    topology = res_controller.get_topology()
+    try:
+        names = list(parse_output_spec(output_spec, topology))
+    except ValueError as e:
+        return 1, [f"[ERROR] {e}"]
+
+    display = res_controller.backend.display
+    lines = []
+    with span('capture', output=','.join(names), backend=None) as s:
+        try:
+            screen = get_capture(display)
+            s.record['backend'] = 'shm' if screen.shm else 'xgetimage'
+            writer = get_writer()
+            for index, name in enumerate(names):
+                out = topology.get(name)
+                path = capture_path(pattern, name, out.scale_x, index, display)
+                frame = screen.grab_output(out, topology)
+                writer.submit(frame, path)
+                lines.append(f"[OK] Captura de {name} ({frame.region[2]}x{frame.region[3]}) en {path}")
+        except (BackendError, KeyError, ValueError) as e:
+            s.ok = False
+            return 1, lines + [f"[ERROR] Fallo al capturar: {e}"]
+        if wait:
+            errors = writer.flush()
+            if errors:
+                s.ok = False
+                return 1, [f"[ERROR] No se pudo guardar la captura {error}" for error in errors]
+    return 0, lines
+
+
+def recover_stale(res_controller, color_controller):
+    """ Corregir lo que dejó una GUI que murió sin restaurar (SIGKILL, caída); líneas a mostrar """
+    if not any(res_controller.journal.entries(stale_only=True)):
+        return []
+    return run_recover(res_controller, color_controller, stale_only=True)[1]
+
+
+def scale_targets(request, res_controller):
+    """ Salidas cuya escala cambiaría la petición: set (vacío si no escala) o None si pueden ser todas """
+    cmd = request.get('cmd')
+    if cmd in ('profile', 'recover'):
+        return None
+    if cmd not in ('start', 'stop'):
+        return set()
+    spec = (request.get('output') or '').strip()
+    if spec == 'all' or (not spec and cmd == 'stop'):
+        return None
+    if not spec:
+        output = res_controller.get_topology().default_output()
+        return {output} if output else set()
+    return {item.strip().partition('=')[0] for item in spec.split(',')}
+
+
+def execute(request, res_controller, color_controller, cancel=None):
+    """ Ejecutar una petición {'cmd': ...} y devolver (código de salida, líneas)
+
+    cancel (threading.Event) interrumpe una transición animada en curso.
+    """
+    cmd = request.get('cmd')
+    if cmd == 'list':
+        return run_list(res_controller)
+    if cmd == 'stop':
+        return run_stop(res_controller, color_controller, request.get('output'))
+    if cmd == 'start':
+        target = request.get('target')
+        return run_start(res_controller, request.get('factor'), request.get('output'), request.get('animate'),
+                         cancel, request.get('filter'), tuple(target) if target else None)
+    if cmd == 'plan':
+        return run_plan(res_controller, request.get('factor'), request.get('output'), request.get('target'))
+    if cmd == 'cneg':
+        return run_cneg(color_controller, request.get('mode'), request.get('spec'))
+    if cmd == 'profile':
+        return run_profile(res_controller, color_controller, request['name'], request.get('path'))
+    if cmd == 'recover':
+        return run_recover(res_controller, color_controller, request.get('stale', False))
+    if cmd == 'capture':
+        return run_capture(res_controller, request.get('output'), request.get('path'))
+    return 1, [f"[ERROR] Comando desconocido: {cmd}"]
@@ -0,0 +1,164 @@
+# daemon.py
+import os
+import json
+import socket
+import threading
+import socketserver
+
+import commands
+from runtime import ensure_private_dir
+
+
+
+
+
+'''
+>>> Ubicación del socket
+'''
+def socket_path(display=None, backend=None):
+    """ Un socket por usuario y display para no mezclar servidores X (y otro para el simulado) """
+    suffix = '.sim' if backend == 'sim' else ''
+    if os.environ.get('SIMURES_SOCKET'):
+        return os.environ['SIMURES_SOCKET'] + suffix
+    display = (display or os.environ.get('DISPLAY', ':0')).replace('/', '_')
+    base = os.environ.get('XDG_RUNTIME_DIR') or f"/tmp/simures-{os.getuid()}"
+    return os.path.join(base, f"simures{display}{suffix}.sock")
+
+
+
+
+
+'''
+>>> Servidor
+'''
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                response = {'code': 1, 'lines': ["[ERROR] Petición inválida"]}
+            else:
+                response = self.server.daemon_handle(request)
+            self.wfile.write(json.dumps(response).encode() + b'\n')
+            self.wfile.flush()
+
+
+def _overlap(targets, running):
+    """ ¿Comparten salidas? None equivale a todas """
+    if targets is None or running is None:
+        return targets != set() and running != set()
+    return bool(targets & running)
+
+
+class SimuresDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """ Mantiene controladores, caché de topología y conexión X entre invocaciones """
+    daemon_threads = True
+
+    def __init__(self, res_controller, color_controller, path=None):
+        self.res_controller = res_controller
+        self.color_controller = color_controller
+        self.path = path or socket_path()
+        self.lock = threading.Lock()
+        self.cancel = threading.Event()
+        self.running = set()  # Salidas de la petición en curso (None: todas)
+
+        ensure_private_dir(os.path.dirname(self.path))
+        if os.path.exists(self.path):
+            if DaemonClient.connect(self.path) is not None:
+                raise RuntimeError(f"Ya hay un daemon escuchando en {self.path}")
+            os.unlink(self.path)  # Socket huérfano de una ejecución anterior
+        # El socket nace ya con permisos 0600: no hay intervalo entre bind y chmod
+        umask = os.umask(0o177)
+        try:
+            super().__init__(self.path, _RequestHandler)
+        finally:
+            os.umask(umask)
+        self.hotplug = res_controller.watch_hotplug()
+
+    def daemon_handle(self, request):
+        if request.get('cmd') == 'ping':
+            return {'code': 0, 'lines': [], 'pid': os.getpid()}
+        if request.get('cmd') == 'shutdown':
+            threading.Thread(target=self.shutdown, daemon=True).start()
+            return {'code': 0, 'lines': ["[OK] Daemon detenido"]}
+        try:
+            targets = commands.scale_targets(request, self.res_controller)
+        except Exception as e:
+            return {'code': 1, 'lines': [f"[ERROR] Error inesperado en el daemon: {e}"]}
+        # Solo un cambio de escala sobre las mismas salidas interrumpe la transición en curso;
+        # list, plan o cneg esperan a que termine
+        running, cancel = self.running, self.cancel
+        if _overlap(targets, running):
+            cancel.set()
+        # Las operaciones sobre el servidor X se serializan
+        with self.lock:
+            self.cancel = threading.Event()
+            self.running = targets
+            self.process_hotplug()
+            try:
+                code, lines = commands.execute(request, self.res_controller, self.color_controller, self.cancel)
+            except Exception as e:
+                code, lines = 1, [f"[ERROR] Error inesperado en el daemon: {e}"]
+            finally:
+                self.running = set()
+        return {'code': code, 'lines': lines}
+
+    def process_hotplug(self):
+        """ Incorporar las conexiones/desconexiones ocurridas desde la última petición """
+        if self.hotplug is not None and self.res_controller.process_hotplug(self.hotplug) is not None:
+            self.color_controller.outputs_changed()
+
+    def serve(self):
+        try:
+            self.serve_forever()
+        finally:
+            if self.hotplug is not None:
+                self.hotplug.close()
+            self.server_close()
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+
+
+
+'''
+>>> Cliente
+'''
+class DaemonClient:
+    def __init__(self, sock):
+        self.sock = sock
+        self.stream = sock.makefile('rwb')
+
+    @classmethod
+    def connect(cls, path=None, timeout=0.5):
+        """ Conectar con el daemon; None si no está en ejecución """
+        path = path or socket_path()
+        if not os.path.exists(path):
+            return None
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+        except OSError:
+            sock.close()
+            return None
+        sock.settimeout(None)
+        return cls(sock)
+
+    def request(self, request):
+        """ Enviar una petición y devolver (código de salida, líneas) """
+        self.stream.write(json.dumps(request).encode() + b'\n')
+        self.stream.flush()
+        line = self.stream.readline()
+        if not line:
+            raise ConnectionError("El daemon cerró la conexión")
+        response = json.loads(line)
+        return response['code'], response['lines']
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
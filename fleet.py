@@ -0,0 +1,230 @@
+# fleet.py
+import os
+import sys
+import json
+import time
+import shlex
+import asyncio
+from dataclasses import dataclass, field
+
+
+
+
+
+'''
+>>> Inventario
+'''
+DEFAULT_COMMAND = os.environ.get('SIMURES_FLEET_COMMAND', 'simures')
+DEFAULT_PARALLEL = 16
+DEFAULT_TIMEOUT = 30.0
+
+
+@dataclass
+class Host:
+    name: str
+    address: str = None  # Destino SSH ([usuario@]máquina); por defecto el nombre
+    display: str = None
+    command: str = DEFAULT_COMMAND  # SimuRES en la máquina remota (binario o 'python3 .../main.py')
+    port: int = None
+
+    def __post_init__(self):
+        self.address = self.address or self.name
+
+
+def load_inventory(path):
+    """ Hosts desde un JSON ({'defaults': {...}, 'hosts': [...]}) o un texto con una máquina por línea
+
+    En texto, cada línea es 'nombre [clave=valor ...]' (address, display, command, port) y '#'
+    inicia un comentario. ValueError si el fichero no es válido.
+    """
+    try:
+        with open(path) as f:
+            text = f.read()
+    except OSError as e:
+        raise ValueError(f"No se pudo leer el inventario {path}: {e.strerror}")
+
+    if text.lstrip().startswith(('{', '[')):
+        try:
+            data = json.loads(text)
+        except ValueError as e:
+            raise ValueError(f"Inventario inválido {path}: {e}")
+        defaults = data.get('defaults', {}) if isinstance(data, dict) else {}
+        entries = data.get('hosts', []) if isinstance(data, dict) else data
+        entries = [{'name': entry} if isinstance(entry, str) else entry for entry in entries]
+    else:
+        defaults, entries = {}, []
+        for number, line in enumerate(text.splitlines(), 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            name, *pairs = shlex.split(line)
+            entry = {'name': name}
+            for pair in pairs:
+                key, sep, value = pair.partition('=')
+                if not sep:
+                    raise ValueError(f"Inventario {path}, línea {number}: se esperaba clave=valor en '{pair}'")
+                entry[key] = value
+            entries.append(entry)
+
+    hosts, seen = [], set()
+    for entry in entries:
+        try:
+            host = Host(**{**defaults, **entry})
+            host.port = int(host.port) if host.port else None
+        except (TypeError, ValueError) as e:
+            raise ValueError(f"Inventario {path}: entrada inválida {entry}: {e}")
+        if host.name in seen:
+            raise ValueError(f"Inventario {path}: '{host.name}' aparece dos veces")
+        seen.add(host.name)
+        hosts.append(host)
+    if not hosts:
+        raise ValueError(f"El inventario {path} no contiene máquinas")
+    return hosts
+
+
+
+
+
+'''
+>>> Transportes
+'''
+def remote_arguments(host):
+    """ Argumentos de SimuRES en cada máquina: una secuencia --batch por stdin """
+    args = ['--batch', '-']
+    if host.display:
+        args += ['--display', host.display]
+    return args
+
+
+class SSHTransport:
+    """ Una conexión SSH por máquina; todos sus comandos viajan por la misma sesión """
+    name = 'ssh'
+
+    def __init__(self, ssh='ssh', options=None, connect_timeout=10):
+        self.ssh = ssh
+        self.options = options if options is not None else [
+            '-o', 'BatchMode=yes', '-o', f'ConnectTimeout={connect_timeout}',
+        ]
+
+    def command(self, host):
+        remote = ' '.join([host.command] + [shlex.quote(arg) for arg in remote_arguments(host)])
+        port = ['-p', str(host.port)] if host.port else []
+        return [self.ssh] + self.options + port + [host.address, remote]
+
+    def env(self, host):
+        return None
+
+
+class LocalTransport:
+    """ Sustituto sin red: ejecuta SimuRES en esta máquina, un proceso por host del inventario.
+
+    Cada host debería tener su propio display (real, Xvfb o de los sustitutos de Benchmarks/)
+    para no pisarse el estado.
+    """
+    name = 'local'
+
+    def __init__(self, command=None):
+        self.base = command or [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'main.py')]
+
+    def command(self, host):
+        return self.base + remote_arguments(host)
+
+    def env(self, host):
+        return dict(os.environ, SIMURES_FLEET_HOST=host.name)
+
+
+TRANSPORTS = {'ssh': SSHTransport, 'local': LocalTransport}
+
+
+
+
+
+'''
+>>> Ejecución concurrente
+'''
+@dataclass
+class HostResult:
+    host: str
+    ok: bool = False
+    code: int = None
+    duration_ms: float = 0.0
+    results: list = field(default_factory=list)  # Una línea JSON de --batch por comando
+    error: str = None
+
+    def to_dict(self):
+        record = {'host': self.host, 'ok': self.ok, 'code': self.code,
+                  'duration_ms': self.duration_ms, 'results': self.results}
+        if self.error:
+            record['error'] = self.error
+        return record
+
+
+async def run_host(host, requests, transport, timeout, limit):
+    """ Enviar todas las peticiones por una única conexión y recoger sus resultados """
+    async with limit:
+        result = HostResult(host.name)
+        start = time.perf_counter()
+        payload = ''.join(json.dumps(request) + '\n' for request in requests).encode()
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *transport.command(host), env=transport.env(host),
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        except OSError as e:
+            result.error = f"No se pudo iniciar el transporte {transport.name}: {e.strerror}"
+            return result
+        try:
+            stdout, stderr = await asyncio.wait_for(proc.communicate(payload), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            result.error = f"Sin respuesta en {timeout:g} s"
+            result.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+            return result
+
+        result.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        result.code = proc.returncode
+        for line in stdout.decode(errors='replace').splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Avisos que no son resultados
+            if isinstance(record, dict) and 'ok' in record:
+                result.results.append(record)
+        result.ok = (proc.returncode == 0 and len(result.results) >= len(requests)
+                     and all(record['ok'] for record in result.results))
+        failed = [record for record in result.results if not record['ok']]
+        if failed:
+            lines = failed[0].get('lines') or [failed[0].get('error', '')]
+            result.error = f"{failed[0].get('cmd')}: {lines[0]}"
+        elif not result.ok:
+            # Falló la conexión o el propio SimuRES remoto: la última línea de stderr lo explica
+            lines = stderr.decode(errors='replace').strip().splitlines()
+            result.error = lines[-1] if lines else f"Código de salida {proc.returncode}"
+        return result
+
+
+async def run_fleet(hosts, requests, transport, parallel=DEFAULT_PARALLEL, timeout=DEFAULT_TIMEOUT,
+                    on_result=None):
+    """ Ejecutar las peticiones en todas las máquinas, como mucho `parallel` a la vez """
+    limit = asyncio.Semaphore(max(1, parallel))
+
+    async def one(host):
+        result = await run_host(host, requests, transport, timeout, limit)
+        if on_result is not None:
+            on_result(result)
+        return result
+    return await asyncio.gather(*(one(host) for host in hosts))
+
+
+def fleet_report(results, duration_ms):
+    """ Documento JSON agregado con el resultado de cada máquina """
+    failed = [result.host for result in results if not result.ok]
+    return {
+        'ok': not failed,
+        'hosts': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': failed,
+        'duration_ms': round(duration_ms, 3),
+        'slowest_ms': max((result.duration_ms for result in results), default=0.0),
+        'results': [result.to_dict() for result in results],
+    }
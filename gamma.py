@@ -0,0 +1,144 @@
+# gamma.py
+from functools import lru_cache
+
+import numpy as np
+
+from backends import BackendError
+from color_filters import PRESETS, parse_filter_spec
+
+
+
+
+
+'''
+>>> Tubería de filtros de color
+'''
+def _temperature_rgb(kelvin):
+    """ Multiplicadores RGB del blanco de un cuerpo negro (aproximación de Tanner Helland) """
+    t = kelvin / 100.0
+    if t <= 66:
+        r = 255.0
+        g = 99.4708025861 * np.log(t) - 161.1195681661
+        b = 0.0 if t <= 19 else 138.5177312231 * np.log(t - 10) - 305.0447927307
+    else:
+        r = 329.698727446 * (t - 60) ** -0.1332047592
+        g = 288.1221695283 * (t - 60) ** -0.0755148492
+        b = 255.0
+    return np.clip(np.array([r, g, b]), 0.0, 255.0) / 255.0
+
+
+_NEUTRAL_WHITE = _temperature_rgb(6500)
+
+
+def _per_channel(params):
+    return np.array(params, dtype=np.float64)[:, np.newaxis]
+
+
+# Cada operación transforma la curva (3, size) en [0, 1] del paso anterior
+_OPERATIONS = {
+    'invert': lambda y, p: 1.0 - y,
+    'gain': lambda y, p: y * _per_channel(p),
+    'gamma': lambda y, p: np.power(np.clip(y, 0.0, 1.0), 1.0 / _per_channel(p)),
+    'contrast': lambda y, p: (y - 0.5) * p[0] + 0.5,
+    'brightness': lambda y, p: y + p[0],
+    'temperature': lambda y, p: y * (_temperature_rgb(p[0]) / _NEUTRAL_WHITE)[:, np.newaxis],
+}
+
+
+@lru_cache(maxsize=64)
+def build_ramp(chain, size):
+    """ Colapsa la cadena de filtros en una única rampa (3, size) uint16, calculada de forma vectorizada """
+    y = np.tile(np.linspace(0.0, 1.0, size), (3, 1))
+    for name, params in chain:
+        y = _OPERATIONS[name](y, params)
+    ramp = np.rint(np.clip(y, 0.0, 1.0) * 65535.0).astype(np.uint16)
+    ramp.setflags(write=False)
+    return ramp
+
+
+def negative_ramp(mode, size):
+    """ Rampa (3, size) uint16 del modo negativo (preset de la tubería) """
+    return build_ramp(parse_filter_spec(PRESETS[mode]), size)
+
+
+def linear_ramp(size):
+    """ Rampa identidad, equivalente a `xcalib -c` """
+    ramp = np.rint(np.linspace(0.0, 65535.0, size)).astype(np.uint16)
+    return np.stack([ramp, ramp, ramp])
+
+
+
+
+
+'''
+>>> Motor gamma por CRTC
+'''
+class GammaEngine:
+    def __init__(self, backend, journal=None):
+        self.backend = backend
+        self.journal = journal
+        self._sizes = None
+        self.originals = {}
+
+    def sizes(self):
+        """ Tamaño de rampa de cada salida activa (consultado una sola vez) """
+        if self._sizes is None:
+            self._sizes = self.backend.gamma_sizes()
+        return self._sizes
+
+    def invalidate(self):
+        self._sizes = None
+
+    def precompute(self):
+        """ Calcular por adelantado las rampas de todos los modos para cada tamaño """
+        for size in set(self.sizes().values()):
+            for mode in PRESETS:
+                negative_ramp(mode, size)
+
+    def _snapshot(self, outputs):
+        """ Guardar la rampa original antes de la primera modificación (también en el journal) """
+        for output in outputs:
+            if output not in self.originals:
+                # Si una sesión anterior no llegó a restaurar, su rampa es la original
+                channels = self.journal.gamma_original(output) if self.journal else None
+                if channels is None:
+                    channels = self.backend.get_gamma(output)
+                    if self.journal:
+                        self.journal.record_gamma(output, channels)
+                self.originals[output] = np.stack([np.frombuffer(c, dtype=np.uint16) for c in channels])
+
+    def _original(self, output):
+        ramp = self.originals.get(output)
+        if ramp is None and self.journal:
+            channels = self.journal.gamma_original(output)
+            if channels is not None:
+                ramp = np.stack([np.frombuffer(c, dtype=np.uint16) for c in channels])
+        return ramp
+
+    def apply_chain(self, chain, outputs=None):
+        """ Una sola subida de rampa por CRTC, sea cual sea la longitud de la cadena """
+        sizes = self.sizes()
+        outputs = list(sizes) if outputs is None else list(outputs)
+        if not outputs:
+            raise BackendError("No hay salidas activas")
+        self._snapshot(outputs)
+        self.backend.set_gamma({output: build_ramp(chain, sizes[output]) for output in outputs})
+
+    def apply_mode(self, mode, outputs=None):
+        self.apply_chain(parse_filter_spec(PRESETS[mode]), outputs)
+
+    def restore(self, outputs=None):
+        """ Volver a subir las rampas originales guardadas (identidad si no hay ninguna) """
+        sizes = self.sizes()
+        if outputs is None:
+            journaled = list(self.journal.entries()[1]) if self.journal else []
+            outputs = [o for o in dict.fromkeys(list(self.originals) + journaled) if o in sizes] or list(sizes)
+        ramps = {}
+        for output in outputs:
+            ramp = self._original(output)
+            ramps[output] = ramp if ramp is not None else linear_ramp(sizes[output])
+        self.backend.set_gamma(ramps)
+        for output in outputs:
+            self.originals.pop(output, None)
+        if self.journal:
+            self.journal.forget_colors(outputs)
@@ -0,0 +1,256 @@
+# journal.py
+import os
+import json
+import fcntl
+import base64
+import threading
+
+from runtime import ensure_private_dir
+
+
+
+
+
+'''
+>>> Ubicación del journal
+'''
+def journal_path(display=None, backend=None):
+    """ Un journal por usuario y display, junto al socket del daemon.
+
+    El backend simulado lleva el suyo para no mezclar su estado con el del servidor real.
+    """
+    suffix = '.sim' if backend == 'sim' else ''
+    if os.environ.get('SIMURES_JOURNAL'):
+        # Con un display explícito (--display) cada uno lleva su propio fichero
+        return os.environ['SIMURES_JOURNAL'] + (display.replace('/', '_') if display else '') + suffix
+    display = (display or os.environ.get('DISPLAY', ':0')).replace('/', '_')
+    base = os.environ.get('XDG_RUNTIME_DIR') or f"/tmp/simures-{os.getuid()}"
+    return os.path.join(base, f"simures{display}{suffix}.journal")
+
+
+def _alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+
+
+
+'''
+>>> Journal del estado original
+'''
+class Journal:
+    """ Estado original de salidas y rampas gamma, escrito antes de la primera modificación.
+
+    Las entradas de una sesión 'gui' se consideran huérfanas si su proceso ya no existe;
+    las de la CLI (y del daemon, que la sirve) persisten a propósito hasta --stop.
+    """
+    def __init__(self, path, session='cli'):
+        self.path = path
+        self.session = session
+        self._lock = threading.Lock()
+        self._recorded = set()
+
+    # Lectura y escritura atómica
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        return {'outputs': data.get('outputs', {}), 'colors': data.get('colors', {})}
+
+    def _write(self, data):
+        if not data['outputs'] and not data['colors']:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump({'version': 1, **data}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _exists(self):
+        return os.path.exists(self.path)
+
+    def _update(self, fn):
+        """ Leer-modificar-escribir bajo un flock compartido con otros procesos """
+        with self._lock:
+            try:
+                ensure_private_dir(os.path.dirname(self.path))
+                with open(f"{self.path}.lock", 'w') as lock:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    data = self._read()
+                    if fn(data):
+                        self._write(data)
+            except OSError as e:
+                print("No se pudo actualizar el journal de estado original:", e)
+
+    def _entry(self, **values):
+        return {**values, 'pid': os.getpid(), 'session': self.session}
+
+    # Salidas
+    def record_outputs(self, outputs):
+        """ Registrar el estado de las OutputState indicadas (la primera anotación prevalece) """
+        outputs = [out for out in outputs if out is not None and out.name not in self._recorded]
+        if not outputs:
+            return
+
+        def add(data):
+            changed = False
+            for out in outputs:
+                if out.name not in data['outputs']:
+                    data['outputs'][out.name] = self._entry(
+                        scale=[out.scale_x, out.scale_y],
+                        filter=out.filter,
+                        mode=out.current_mode.name if out.current_mode else None,
+                    )
+                    changed = True
+            return changed
+        self._update(add)
+        self._recorded.update(out.name for out in outputs)
+
+    def recorded(self, output):
+        """ Si este proceso ya anotó la salida (evita volver a consultar la topología) """
+        return output in self._recorded
+
+    def original(self, output):
+        return self._read()['outputs'].get(output)
+
+    def forget_outputs(self, outputs):
+        outputs = set(outputs)
+        if not outputs:
+            return
+        self._recorded -= outputs
+
+        def remove(data):
+            found = outputs & set(data['outputs'])
+            for name in found:
+                del data['outputs'][name]
+            return bool(found)
+        self._update(remove)
+
+    # Colores: rampas por salida, o '*' cuando se usó xcalib (sin rampa legible)
+    def record_gamma(self, output, channels=None):
+        key = ('gamma', output)
+        if key in self._recorded:
+            return
+
+        def add(data):
+            if output in data['colors']:
+                return False
+            ramps = [base64.b64encode(bytes(c)).decode() for c in channels] if channels else None
+            data['colors'][output] = self._entry(ramps=ramps)
+            return True
+        self._update(add)
+        self._recorded.add(key)
+
+    def gamma_original(self, output):
+        """ Rampa original registrada como tres buffers (rojo, verde, azul), o None """
+        entry = self._read()['colors'].get(output)
+        if not entry or not entry.get('ramps'):
+            return None
+        return tuple(base64.b64decode(c) for c in entry['ramps'])
+
+    def forget_colors(self, outputs):
+        outputs = set(outputs)
+        if not outputs:
+            return
+        self._recorded -= {('gamma', output) for output in outputs}
+
+        def remove(data):
+            found = outputs & set(data['colors'])
+            for name in found:
+                del data['colors'][name]
+            return bool(found)
+        self._update(remove)
+
+    def annotate(self, section, values):
+        """ Anotar el estado aplicado en entradas existentes ({nombre: {campo: valor}}) """
+        def update(data):
+            changed = False
+            for name, fields in values.items():
+                entry = data[section].get(name)
+                if entry is not None and any(entry.get(k) != v for k, v in fields.items()):
+                    entry.update(fields)
+                    changed = True
+            return changed
+        if values:
+            self._update(update)
+
+    # Recuperación
+    def entries(self, stale_only=False):
+        """ (salidas, colores) registrados; con stale_only, solo los de sesiones GUI muertas """
+        if not self._exists():
+            return {}, {}
+        data = self._read()
+        if not stale_only:
+            return data['outputs'], data['colors']
+
+        def stale(entry):
+            return entry.get('session') == 'gui' and not _alive(entry.get('pid', 0))
+        return ({name: e for name, e in data['outputs'].items() if stale(e)},
+                {name: e for name, e in data['colors'].items() if stale(e)})
+
+
+
+
+
+class MemoryJournal(Journal):
+    """ Journal sin fichero: el del backend simulado cuando su estado muere con el proceso """
+
+    def __init__(self, path, session='cli'):
+        super().__init__(path, session)
+        self._data = {'outputs': {}, 'colors': {}}
+
+    def _read(self):
+        return {'outputs': dict(self._data['outputs']), 'colors': dict(self._data['colors'])}
+
+    def _write(self, data):
+        self._data = data
+
+    def _exists(self):
+        return bool(self._data['outputs'] or self._data['colors'])
+
+    def _update(self, fn):
+        with self._lock:
+            data = self._read()
+            if fn(data):
+                self._write(data)
+
+
+
+
+
+'''
+>>> Journal compartido por proceso
+'''
+_shared = {}
+_session = ['cli']
+
+
+def set_session(session):
+    """ Tipo de sesión con el que se anotan las entradas ('gui' o 'cli') """
+    _session[0] = session
+    for journal in _shared.values():
+        journal.session = session
+
+
+def get_journal(display=None, backend=None):
+    path = journal_path(display, backend)
+    if path not in _shared:
+        # Sin SIMURES_SIM_STATE el estado simulado no sobrevive al proceso y su journal tampoco
+        volatile = backend == 'sim' and not os.environ.get('SIMURES_SIM_STATE')
+        _shared[path] = (MemoryJournal if volatile else Journal)(path, _session[0])
+    return _shared[path]
@@ -0,0 +1,138 @@
+# layout.py
+import math
+from dataclasses import dataclass, field, replace
+
+from backends import OutputChange
+
+
+
+
+
+'''
+>>> Geometría
+'''
+def scaled_size(out, scale_x, scale_y):
+    """ Tamaño lógico de una salida con el transform indicado (como lo calcula el servidor) """
+    mode_w, mode_h = out.current_mode.width, out.current_mode.height
+    if out.rotation in ('left', 'right'):
+        mode_w, mode_h = mode_h, mode_w
+    return (int(math.ceil(mode_w * scale_x - 1e-6)),
+            int(math.ceil(mode_h * scale_y - 1e-6)))
+
+
+def scale_for_target(out, width, height):
+    """ Escala (x, y) con la que la salida ocupa width x height (equivale a xrandr --scale-from) """
+    mode_w, mode_h = out.current_mode.width, out.current_mode.height
+    if out.rotation in ('left', 'right'):
+        mode_w, mode_h = mode_h, mode_w
+    return width / mode_w, height / mode_h
+
+
+def _place(items):
+    """ Nuevos inicios en un eje para [(nombre, inicio, longitud, nueva longitud)].
+
+    Una salida que empezaba tras el final de otras sigue empezando tras ellas, con el mismo
+    hueco o solape; las que se superponían en el eje (apiladas en el otro, o clonadas)
+    conservan su desplazamiento respecto a la más cercana que empiece antes o a la vez.
+    """
+    items = sorted(items, key=lambda item: (item[1], item[0]))
+    origin = items[0][1] if items else 0
+    placed = []  # (inicio, fin, nuevo inicio, nuevo fin)
+    positions = {}
+    for name, start, length, new_length in items:
+        before = [p for p in placed if p[1] <= start]
+        if before:
+            anchor = max(before, key=lambda p: p[1])
+            new_start = max(p[3] for p in before) + (start - anchor[1])
+        else:
+            reference = [p for p in placed if p[0] <= start]
+            if reference:
+                anchor = max(reference, key=lambda p: p[0])
+                new_start = anchor[2] + (start - anchor[0])
+            else:
+                new_start = start - origin
+        positions[name] = new_start
+        placed.append((start, start + length, new_start, new_start + new_length))
+    return positions
+
+
+
+
+
+'''
+>>> Distribución de salidas
+'''
+@dataclass
+class Layout:
+    """ Disposición resultante: geometría por salida y tamaño del framebuffer """
+    geometry: dict = field(default_factory=dict)  # nombre -> (x, y, ancho, alto)
+    scales: dict = field(default_factory=dict)  # nombre -> (escala_x, escala_y)
+    screen_size: tuple = (0, 0)
+    max_size: tuple = (0, 0)  # Límite del servidor (0 si no se conoce)
+
+    @property
+    def fits(self):
+        max_w, max_h = self.max_size
+        return not max_w or not max_h or (self.screen_size[0] <= max_w and self.screen_size[1] <= max_h)
+
+
+def compute_layout(topology, scales):
+    """ Recolocar todas las salidas activas tras cambiar la escala de algunas.
+
+    scales es {salida: (escala_x, escala_y)}; el resto conserva su escala actual. Se mantiene
+    la disposición relativa (izquierda/derecha/encima) y no se cambia la salida principal.
+    """
+    active = [out for out in topology.connected() if out.active]
+    sizes, targets = {}, {}
+    for out in active:
+        if out.name in scales:
+            targets[out.name] = scales[out.name]
+            sizes[out.name] = scaled_size(out, *scales[out.name])
+        else:
+            targets[out.name] = (out.scale_x, out.scale_y)
+            sizes[out.name] = (out.width, out.height)
+
+    xs = _place([(out.name, out.x, out.width, sizes[out.name][0]) for out in active])
+    ys = _place([(out.name, out.y, out.height, sizes[out.name][1]) for out in active])
+    layout = Layout(scales=targets, max_size=(topology.max_width, topology.max_height))
+    width = height = 0
+    for out in active:
+        w, h = sizes[out.name]
+        layout.geometry[out.name] = (xs[out.name], ys[out.name], w, h)
+        width, height = max(width, xs[out.name] + w), max(height, ys[out.name] + h)
+    layout.screen_size = (max(width, topology.min_width), max(height, topology.min_height))
+    return layout
+
+
+def arrange(topology, changes):
+    """ Completar un lote de OutputChange con la posición de cada salida.
+
+    Devuelve (cambios, layout): los cambios pedidos con x/y y, además, un cambio que solo
+    mueve cada salida vecina cuya posición deba cambiar.
+    """
+    layout = compute_layout(topology, {change.name: (change.scale_x, change.scale_y) for change in changes})
+    arranged = []
+    for change in changes:
+        if change.name in layout.geometry:
+            x, y, _, _ = layout.geometry[change.name]
+            change = replace(change, x=x, y=y)
+        arranged.append(change)
+
+    requested = {change.name for change in changes}
+    for name, (x, y, _, _) in layout.geometry.items():
+        out = topology.get(name)
+        if name not in requested and (x, y) != (out.x, out.y):
+            arranged.append(OutputChange(name, out.scale_x, out.scale_y, None, x, y))
+    return arranged, layout
+
+
+def predicted_outputs(topology, layout, filters=None):
+    """ OutputState tras aplicar la disposición (y los filtros {salida: filtro} indicados) """
+    filters = filters or {}
+    outputs = {}
+    for name, (x, y, width, height) in layout.geometry.items():
+        out = topology.get(name)
+        scale_x, scale_y = layout.scales[name]
+        outputs[name] = replace(out, x=x, y=y, width=width, height=height, scale_x=scale_x,
+                                scale_y=scale_y, filter=filters.get(name, out.filter))
+    return outputs
@@ -1,15 +1,23 @@
 # main.py
+import os
 import sys
+import json
+import time
 import signal
+import atexit
 import argparse
-from PyQt5.QtWidgets import QApplication
-from PyQt5.QtGui import QPalette, QColor
 
 from _ascii import logo_01
 
-from ui import MainWindow
+import commands
+import journal
+import profiling
+from animation import parse_duration
+from color_filters import parse_filter_spec
+from backends import BACKENDS, FILTERS, BackendError, get_backend
 from resolution_controller import ResolutionController
 from colors_controller import ColorsController
+from daemon import DaemonClient, SimuresDaemon, socket_path
 
 
 
@@ -20,24 +28,226 @@ from colors_controller import ColorsController
 '''
 def signal_handler(sig, frame):
     """ Manejador de señales para cierres forzados """
+    from PyQt5.QtWidgets import QApplication
     print(f"\n[WARN] Señal recibida ({sig}), restaurando resolución...")
     app = QApplication.instance()
     if app:
         window = app.activeWindow()
         if window:
-            window.restore_resolution()
+            window.restore_all_resolutions()
     sys.exit(0)
 
-def handle_cli_signals(output):
-    """ Retorna un manejador de señales con la salida especificada """
+def handle_cli_signals(controller):
+    """ Retorna un manejador de señales que restaura en lote las salidas modificadas
+
+    controller: ResolutionController o MultiDisplayController (restaura cada display).
+    """
     def handler(sig, frame):
-        print(f"\n[INTERRUPCIÓN] Restaurando resolución en {output}...")
-        controller = ResolutionController()
-        controller.restore_scale(output)
+        print(f"\n[INTERRUPCIÓN] Restaurando resolución en {', '.join(controller.touched) or '-'}...")
+        controller.restore_scales()
         sys.exit(0)
     return handler
 
+def handle_daemon_signals(sig, frame):
+    """ Detener el daemon sin tocar la configuración aplicada """
+    raise KeyboardInterrupt
+
+def run_in_process(requests, backend_name, display=None):
+    """ Ejecutar las peticiones en este proceso y devolver el código de salida """
+    try:
+        backend = get_backend(backend_name, display)
+    except BackendError as e:
+        print(f"[ERROR] {e}")
+        return 1
+    res_controller = ResolutionController(backend)
+    color_controller = ColorsController(backend)
+
+    # Restaurar lo aplicado si se interrumpe a mitad de un comando
+    signal.signal(signal.SIGINT, handle_cli_signals(res_controller))
+    signal.signal(signal.SIGTERM, handle_cli_signals(res_controller))
+
+    # Una GUI que murió sin restaurar (SIGKILL, caída) se corrige antes de nada
+    if requests[0]['cmd'] != 'recover':
+        for line in commands.recover_stale(res_controller, color_controller):
+            print(line)
+
+    for request in requests:
+        with profiling.span(f"cli:{request['cmd']}", output=request.get('output'), backend=backend.name) as s:
+            code, lines = commands.execute(request, res_controller, color_controller)
+            s.ok = code == 0
+        for line in lines:
+            print(line)
+        if code:
+            return code
+    return 0
+
+def run_multi_display(requests, backend_name, displays):
+    """ Ejecutar las peticiones en varios displays a la vez e informar por display """
+    from multi_display import MultiDisplayController
+
+    start = time.perf_counter()
+    controller = MultiDisplayController(displays, backend_name)
+    signal.signal(signal.SIGINT, handle_cli_signals(controller))
+    signal.signal(signal.SIGTERM, handle_cli_signals(controller))
+    try:
+        results = controller.run(requests)
+    finally:
+        controller.close()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for result in results:
+        print(f"== {result.display} ({result.duration_ms:.1f} ms) ==")
+        for line in result.lines:
+            print(line)
+    slowest = max(results, key=lambda result: result.duration_ms)
+    failed = [result.display for result in results if not result.ok]
+    print(f"\n{len(results) - len(failed)}/{len(results)} displays correctos en {elapsed:.1f} ms "
+          f"(más lento: {slowest.display}, {slowest.duration_ms:.1f} ms)"
+          + (f"; con errores: {', '.join(failed)}" if failed else ""))
+    return max(result.code for result in results)
+
+def run_batch(source, backend_name, display=None):
+    """ Ejecutar una secuencia JSONL de comandos en este proceso (un resultado JSON por línea) """
+    from batch import BatchRunner
+
+    try:
+        backend = get_backend(backend_name, display)
+    except BackendError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    res_controller = ResolutionController(backend)
+    color_controller = ColorsController(backend)
+    signal.signal(signal.SIGINT, handle_cli_signals(res_controller))
+    signal.signal(signal.SIGTERM, handle_cli_signals(res_controller))
+    for line in commands.recover_stale(res_controller, color_controller):
+        print(line, file=sys.stderr)
+
+    try:
+        stream = sys.stdin if source == '-' else open(source)
+    except OSError as e:
+        print(f"[ERROR] No se pudo abrir {source}: {e.strerror}", file=sys.stderr)
+        return 1
+    with profiling.span('cli:batch', backend=backend.name) as s:
+        code = BatchRunner(res_controller, color_controller).run(stream)
+        s.ok = code == 0
+    return code
+
+def run_fleet(requests, inventory, transport_name, parallel, timeout):
+    """ Aplicar las peticiones en todas las máquinas del inventario (informe JSON por stdout) """
+    import asyncio
+    import fleet
+
+    try:
+        hosts = fleet.load_inventory(inventory)
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    transport = fleet.TRANSPORTS[transport_name]()
+
+    def progress(result):
+        status = '[OK]' if result.ok else '[ERROR]'
+        detail = f" {result.error}" if result.error else ""
+        print(f"{status} {result.host} ({result.duration_ms:.1f} ms){detail}", file=sys.stderr)
+
+    start = time.perf_counter()
+    with profiling.span('cli:fleet', backend=transport.name) as s:
+        results = asyncio.run(fleet.run_fleet(hosts, requests, transport, parallel, timeout, progress))
+        report = fleet.fleet_report(results, (time.perf_counter() - start) * 1000)
+        s.ok = report['ok']
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"{report['succeeded']}/{report['hosts']} máquinas correctas en {report['duration_ms']:.1f} ms",
+          file=sys.stderr)
+    return 0 if report['ok'] else 1
+
+def run_with_daemon(client, requests):
+    """ Enviar las peticiones al daemon residente """
+    try:
+        for request in requests:
+            with profiling.span(f"cli:{request['cmd']}", output=request.get('output'), backend='daemon') as s:
+                code, lines = client.request(request)
+                s.ok = code == 0
+            for line in lines:
+                print(line)
+            if code:
+                return code
+        return 0
+    finally:
+        client.close()
+
+def run_daemon(backend_name, display=None):
+    try:
+        backend = get_backend(backend_name, display)
+        server = SimuresDaemon(ResolutionController(backend), ColorsController(backend),
+                               socket_path(display, backend.name))
+    except (BackendError, RuntimeError, OSError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+    server.color_controller.prepare()
+    for line in commands.recover_stale(server.res_controller, server.color_controller):
+        print(line)
+    signal.signal(signal.SIGTERM, handle_daemon_signals)
+    print(f"[OK] Daemon escuchando en {server.path} (backend {backend.name})")
+    try:
+        server.serve()
+    except KeyboardInterrupt:
+        print("\n[OK] Daemon detenido")
+    return 0
+
+def run_gui(backend_name, display=None):
+    """ Modo GUI: Qt y la interfaz solo se importan aquí """
+    from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtGui import QPalette, QColor
+    from ui import APP_STYLESHEET, FirstPaintProbe, MainWindow
+
+    try:
+        backend = get_backend(backend_name, display)
+    except BackendError as e:
+        print(f"[ERROR] {e}")
+        return 1
+
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    # Lo que aplique la GUI se revierte al cerrarla (o al volver a arrancar si muere)
+    journal.set_session('gui')
+    
+    app = QApplication(sys.argv)
+    
+    # Configurar paleta de colores
+    palette = QPalette()
+    palette.setColor(QPalette.Window, QColor("#1e1e1e"))
+    palette.setColor(QPalette.WindowText, QColor("#ffffff"))
+    app.setPalette(palette)
+    app.setStyleSheet(APP_STYLESHEET)
+    
+    with profiling.span('gui:window', backend=backend.name):
+        window = MainWindow(backend)
+    if os.environ.get('SIMURES_FIRST_PAINT_REPORT'):
+        FirstPaintProbe(window, os.environ['SIMURES_FIRST_PAINT_REPORT'])
+    window.show()
+    
+    try:
+        return app.exec_()
+    except Exception as e:
+        print("[ERROR] Error inesperado:", e)
+        window.restore_all_resolutions()
+        return 1
+
+def request_path(path):
+    """ Ruta absoluta para una petición: el daemon puede tener otro directorio de trabajo.
+
+    Se une al directorio actual sin normalizar, para conservar la barra final de un
+    directorio que aún no existe (--capture capturas/).
+    """
+    return os.path.join(os.getcwd(), path) if path else None
+
+def write_import_report(path):
+    """ Volcar los módulos cargados (usado por Benchmarks/bench_startup.py) """
+    with open(path, 'w') as f:
+        f.write('\n'.join(sorted(sys.modules)))
+
 def main():
+    if os.environ.get('SIMURES_IMPORT_REPORT'):
+        atexit.register(write_import_report, os.environ['SIMURES_IMPORT_REPORT'])
     # Configurar parser de argumentos
     parser = argparse.ArgumentParser(
         prog='main.py',
@@ -45,18 +255,42 @@ def main():
                     'Modos de uso:\n'
                     '  GUI: Ejecutar sin argumentos\n'
                     '  CLI: \n'
-                    '    - Escalar resolución: --start <valor> [--output <pantalla>]\n'
+                    '    - Escalar resolución: --start <valor> [--output <pantalla>[,<pantalla>...]|all] [--animate 500ms]\n'
+                    '    - Resolución objetivo: --target <ancho>x<alto> [--output ...] [--filter nearest|bilinear]\n'
                     '    - Aplicar negativo:   --cneg --mode <1|2|3>\n'
+                    '    - Filtro de color:    --cneg <filtro>[,<filtro>...]\n'
                     '    - Restaurar valores:  --stop\n'
-                    '    - Listar pantallas:   --list-outputs',
+                    '    - Listar pantallas:   --list-outputs\n'
+                    '    - Recuperar estado:   --recover (tras un cierre inesperado)\n'
+                    '    - Aplicar un perfil:  --apply-profile <nombre> [--profiles <fichero>]\n'
+                    '    - Daemon residente:   --daemon (los comandos CLI lo usan si está activo)\n'
+                    '    - Varios displays:    --display :0,:1 <comando> (en paralelo)\n'
+                    '    - Secuencia JSONL:    --batch <fichero|-> (un proceso, un resultado por línea)\n'
+                    '    - Capturar pantalla:  --capture [<patrón>] (sola o tras --start)\n'
+                    '    - Planificar escala:  --plan [--start <valor> [--output ...]] (sin aplicar)\n'
+                    '    - Varias máquinas:    --fleet <inventario> <comando> (por SSH, en paralelo)',
         formatter_class=argparse.RawTextHelpFormatter,
         epilog='Ejemplos:\n'
                '  main.py --start 1.5 --output HDMI-1  # Escala 1.5x en HDMI-1\n'
+               '  main.py --start 1.5 --output HDMI-1,DP-1=2.0  # Varias pantallas en un solo paso\n'
+               '  main.py --start 2 --output all       # Escala 2x en todas las pantallas\n'
+               '  main.py --start 8 --animate 500ms    # Transición suave hasta 8x en medio segundo\n'
+               '  main.py --start 2 --filter nearest   # 2x con muestreo exacto al píxel (más barato)\n'
+               '  main.py --target 3840x2160 --output HDMI-1  # HDMI-1 ocupa 3840x2160 (--scale-from)\n'
                '  main.py --cneg --mode 1              # Aplica negativo clásico\n'
                '  main.py --cneg --mode 2              # Aplica negativo frío\n'
                '  main.py --cneg --mode 3              # Aplica negativo cálido\n'
+               '  main.py --cneg invert,temperature=4500,contrast=1.2  # Efectos combinados\n'
                '  main.py --stop                       # Restaura resolución y colores\n'
                '  main.py --list-outputs               # Lista pantallas disponibles\n'
+               '  main.py --recover                    # Repone el estado original guardado\n'
+               '  main.py --apply-profile lectura      # Aplica solo lo que difiera del perfil\n'
+               '  main.py --daemon &                   # Mantiene estado y conexión X entre comandos\n'
+               '  main.py --display :0,:1 --start 2    # Escala 2x en dos servidores X a la vez\n'
+               '  barrido.sh | main.py --batch -       # Comandos JSON por stdin, resultados por stdout\n'
+               '  main.py --start 2 --capture shots/   # Escala 2x y guarda shots/<salida>-2x.png\n'
+               '  main.py --fleet aula.txt --start 1.5 # Escala 1.5x en todas las máquinas del aula\n'
+               '  main.py --plan --start 8 --output all  # Framebuffer y memoria que requeriría 8x\n'
                '  main.py                              # Inicia interfaz gráfica\n\n'
                'Notas:\n'
                '  - El argumento --mode solo puede usarse junto con --cneg\n'
@@ -64,139 +298,216 @@ def main():
     )
     parser.add_argument('--start', type=float, metavar='VALOR',
                        help='Factor de escala (1.0 a 20.0)')
+    parser.add_argument('--target', type=str, metavar='ANCHOxALTO',
+                       help='Resolución objetivo en lugar de un factor (p. ej. 3840x2160), como\n'
+                            'xrandr --scale-from; admite --output, --filter y --animate')
+    parser.add_argument('--filter', choices=FILTERS,
+                       help='Filtro de muestreo del escalado: nearest (exacto al píxel, más barato)\n'
+                            'o bilinear (suavizado, el de xrandr por defecto)')
+    parser.add_argument('--animate', type=str, metavar='DURACIÓN',
+                       help='Transición animada hasta la escala de --start (p. ej. 500ms, 1.5s)')
     parser.add_argument('--stop', action='store_true',
                        help='Restaurar resolución y colores originales')
     parser.add_argument('--list-outputs', action='store_true',
                        help='Listar todas las pantallas disponibles')
     parser.add_argument('--output', type=str, metavar='NOMBRE',
-                       help='Especificar nombre de salida de pantalla')
-    parser.add_argument('--cneg', action='store_true',
-                       help='Activar modo de color negativo (requiere --mode)')
+                       help='Salida(s) de pantalla: NOMBRE, lista separada por comas\n'
+                            '(NOMBRE=FACTOR para un factor propio) o "all"')
+    parser.add_argument('--cneg', nargs='?', const='', metavar='FILTRO',
+                       help='Activar modo de color negativo (con --mode) o aplicar una cadena de\n'
+                            'filtros: invert, gain=R:G:B, gamma=R:G:B, contrast=C, brightness=B,\n'
+                            'temperature=K (p. ej. "invert,contrast=1.2")')
     parser.add_argument('--mode', type=int, choices=[1, 2, 3],
                        help='Modo de negativo (solo usar con --cneg): 1=Clásico, 2=Frío, 3=Cálido')
+    parser.add_argument('--recover', action='store_true',
+                       help='Reponer la escala y las rampas gamma originales guardadas en el journal')
+    parser.add_argument('--apply-profile', metavar='NOMBRE',
+                       help='Llevar pantallas y color al perfil indicado (solo se aplica la diferencia)')
+    parser.add_argument('--profiles', metavar='FICHERO',
+                       help='Fichero JSON de perfiles (por defecto ~/.config/simures/profiles.json)')
+    parser.add_argument('--capture', nargs='?', const='', metavar='PATRÓN',
+                       help='Capturar las pantallas de --output (tras --start, si se indica) con MIT-SHM.\n'
+                            'PATRÓN admite {output}, {scale}, {n} y {display}; un directorio guarda\n'
+                            '<salida>-<escala>x.png (también .ppm o .npy)')
+    parser.add_argument('--plan', action='store_true',
+                       help='Calcular framebuffer, memoria y coste de escalado de --start (o de la\n'
+                            'configuración actual) frente a los límites del servidor, sin aplicar')
+    parser.add_argument('--batch', metavar='FICHERO',
+                       help='Ejecutar comandos JSON por línea desde FICHERO o "-" (stdin):\n'
+                            'apply, restore, color, list, sleep, wait-for-settle (ver README)')
+    parser.add_argument('--fleet', metavar='INVENTARIO',
+                       help='Ejecutar el comando en cada máquina del inventario (texto o JSON) con una\n'
+                            'conexión por máquina; imprime un informe JSON agregado')
+    parser.add_argument('--fleet-transport', choices=['ssh', 'local'], default='ssh',
+                       help='Transporte de --fleet: ssh (por defecto) o local (procesos en esta máquina)')
+    parser.add_argument('--fleet-parallel', type=int, default=16, metavar='N',
+                       help='Máquinas atendidas a la vez con --fleet (por defecto 16)')
+    parser.add_argument('--fleet-timeout', type=float, default=30.0, metavar='SEGUNDOS',
+                       help='Tiempo máximo por máquina con --fleet (por defecto 30)')
+    parser.add_argument('--backend', choices=BACKENDS,
+                       help='Backend RandR: auto (nativo si está disponible), native, xrandr o sim (simulado en memoria)')
+    parser.add_argument('--display', metavar='DISPLAY',
+                       help='Servidor(es) X a controlar en lugar de $DISPLAY; con varios separados\n'
+                            'por comas (":0,:1") los comandos CLI se ejecutan en paralelo')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Ejecutar como daemon residente escuchando en un socket Unix')
+    parser.add_argument('--no-daemon', action='store_true',
+                       help='Ejecutar en este proceso aunque haya un daemon activo')
+    parser.add_argument('--profile', nargs='?', const='-', metavar='FICHERO',
+                       help='Emitir tiempos por operación en JSON-lines (stderr o FICHERO);\n'
+                            'equivale a SIMURES_PROFILE=<FICHERO|1>')
     
     args = parser.parse_args()
 
+    if args.profile:
+        profiling.enable(args.profile)
+    else:
+        profiling.enable_from_env()
+    if profiling.enabled():
+        profiling.emit({'op': 'startup', 'output': None, 'backend': None, 'ok': True,
+                        'duration_ms': profiling.process_age_ms(), 'spawns': 0})
+
     # Validar combinación de argumentos
-    if args.mode and not args.cneg:
+    if args.mode and args.cneg is None:
         print("[ERROR] El argumento --mode solo puede usarse junto con --cneg")
         sys.exit(1)
+    if args.mode and args.cneg:
+        print("[ERROR] Indicar --mode o una cadena de filtros, no ambos")
+        sys.exit(1)
+    if args.cneg:
+        try:
+            parse_filter_spec(args.cneg)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
 
-    # Manejar --list-outputs primero
-    if args.list_outputs:
-        controller = ResolutionController()
-        outputs = controller.get_all_outputs()
-        if outputs:
-            print("Pantallas disponibles:")
-            for out in outputs:
-                print(f"  - {out}")
-            sys.exit(0)
-        else:
-            print("[ERROR] No se detectaron pantallas")
+    target = None
+    if args.target:
+        if args.start:
+            print("[ERROR] Indicar --start o --target, no ambos")
+            sys.exit(1)
+        try:
+            target = list(commands.parse_resolution(args.target))
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+    if args.filter and not (args.start or target):
+        print("[ERROR] El argumento --filter solo puede usarse junto con --start o --target")
+        sys.exit(1)
+
+    animate = None
+    if args.animate:
+        if not (args.start or target):
+            print("[ERROR] El argumento --animate solo puede usarse junto con --start o --target")
             sys.exit(1)
+        try:
+            animate = parse_duration(args.animate)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+
+    displays = [None]
+    if args.display:
+        # concurrent.futures solo se carga si se pide --display
+        from multi_display import parse_displays
+        try:
+            displays = parse_displays(args.display)
+        except ValueError as e:
+            print(f"[ERROR] {e}")
+            sys.exit(1)
+    display = displays[0]
 
-    # Inicializar controladores
-    res_controller = ResolutionController()
-    color_controller = ColorsController()
+    # Modo daemon
+    if args.daemon:
+        if len(displays) > 1:
+            print("[ERROR] El daemon atiende un único display (lanzar uno por display)")
+            sys.exit(1)
+        sys.exit(run_daemon(args.backend, display))
 
-    # Modo CLI
-    if args.start or args.stop or args.cneg:
+    # Construir las peticiones CLI
+    requests = []
+    if args.plan:
+        if args.stop or args.recover or args.list_outputs or args.apply_profile or args.cneg is not None \
+                or args.animate or args.capture is not None:
+            print("[ERROR] --plan solo se combina con --start o --target y --output")
+            sys.exit(1)
+        requests.append({'cmd': 'plan', 'factor': args.start, 'output': args.output, 'target': target})
+    elif args.recover:
+        requests.append({'cmd': 'recover'})
+    elif args.list_outputs:
+        requests.append({'cmd': 'list'})
+    elif args.apply_profile:
+        requests.append({'cmd': 'profile', 'name': args.apply_profile, 'path': request_path(args.profiles)})
+    elif args.start or target or args.stop or args.cneg is not None:
         # Validar combinación de argumentos
-        if args.cneg and not args.mode and not args.stop:
-            print("[ERROR] --cneg requiere especificar --mode (1, 2 o 3)")
+        if args.cneg == '' and not args.mode and not args.stop:
+            print("[ERROR] --cneg requiere especificar --mode (1, 2 o 3) o una cadena de filtros")
             sys.exit(1)
 
-        # Manejar --stop (restaurar todo)
+        # --stop restaura todo y no se combina con el resto
         if args.stop:
-            success_res = True
-            success_color, msg_color = color_controller.restore_colors()
-            
-            # Restaurar resolución solo si se especificó una salida o si hay una pantalla detectada
-            if args.output:
-                success_res = res_controller.restore_scale(args.output)
-            else:
-                output = res_controller.get_output_name()
-                if output:
-                    success_res = res_controller.restore_scale(output)
-            
-            if success_res and success_color:
-                print("[OK] Valores originales restaurados")
-                sys.exit(0)
-            else:
-                print("[ERROR] Fallo al restaurar uno o más valores")
-                sys.exit(1)
-
-        # Manejar --start (escalar resolución)
-        if args.start:
-            outputs = res_controller.get_all_outputs()
-            
-            # Validar --output si se especificó
-            output = None
-            if args.output:
-                if args.output in outputs:
-                    output = args.output
-                else:
-                    print(f"[ERROR] La pantalla '{args.output}' no existe")
-                    if outputs:
-                        print("Pantallas disponibles:", ", ".join(outputs))
-                    else:
-                        print("No se detectaron pantallas disponibles")
-                    sys.exit(1)
-            else:
-                output = res_controller.get_output_name()
-                if not output:
-                    print("[ERROR] No se detectaron pantallas")
-                    sys.exit(1)
-
-            # Configurar manejador de señales
-            signal.signal(signal.SIGINT, handle_cli_signals(output))
-            signal.signal(signal.SIGTERM, handle_cli_signals(output))
-            
-            if not 1.0 <= args.start <= 20.0:
-                print("[ERROR] Escala debe estar entre 1.0 y 20.0")
-                sys.exit(1)
-                
-            if res_controller.apply_scale(output, args.start):
-                print(f"[OK] Escala {args.start}x aplicada en {output}")
-            else:
-                print("[ERROR] Fallo al aplicar escala")
-                sys.exit(1)
-
-        # Manejar --cneg (aplicar negativo)
-        if args.cneg:
-            if args.mode:
-                success, msg = color_controller.apply_negative(args.mode)
-                if success:
-                    mode_names = {1: "clásico", 2: "frío", 3: "cálido"}
-                    print(f"[OK] Modo negativo {mode_names[args.mode]} aplicado")
-                    if "Advertencia" in msg:
-                        print(f"[WARN] {msg}")
-                else:
-                    print(f"[ERROR] {msg}")
-                    sys.exit(1)
-        sys.exit(0)
+            requests.append({'cmd': 'stop', 'output': args.output})
+        else:
+            if args.start or target:
+                requests.append({'cmd': 'start', 'factor': args.start, 'output': args.output, 'animate': animate,
+                                 'filter': args.filter, 'target': target})
+            if args.cneg:
+                requests.append({'cmd': 'cneg', 'spec': args.cneg})
+            elif args.cneg is not None:
+                requests.append({'cmd': 'cneg', 'mode': args.mode})
+    if args.capture is not None:
+        if args.stop or args.recover or args.list_outputs:
+            print("[ERROR] --capture solo se combina con --start, --cneg o --apply-profile")
+            sys.exit(1)
+        requests.append({'cmd': 'capture', 'output': args.output, 'path': request_path(args.capture)})
+
+    # Modo flota: las mismas peticiones en muchas máquinas
+    if args.fleet:
+        if not requests:
+            print("[ERROR] --fleet requiere un comando (--start, --stop, --cneg, --list-outputs...)")
+            sys.exit(1)
+        if args.batch or args.display:
+            print("[ERROR] --fleet no se combina con --batch ni --display (el display va en el inventario)")
+            sys.exit(1)
+        if args.fleet_parallel < 1 or args.fleet_timeout <= 0:
+            print("[ERROR] --fleet-parallel y --fleet-timeout deben ser positivos")
+            sys.exit(1)
+        # Las rutas se interpretan en cada máquina, no en esta
+        for request in requests:
+            if request['cmd'] == 'profile':
+                request['path'] = args.profiles
+            elif request['cmd'] == 'capture':
+                request['path'] = args.capture or None
+        sys.exit(run_fleet(requests, args.fleet, args.fleet_transport, args.fleet_parallel, args.fleet_timeout))
+
+    # Modo batch: una secuencia de comandos en un único proceso
+    if args.batch:
+        if requests:
+            print("[ERROR] --batch no se combina con otros comandos")
+            sys.exit(1)
+        if len(displays) > 1:
+            print("[ERROR] --batch atiende un único display (lanzar uno por display)")
+            sys.exit(1)
+        sys.exit(run_batch(args.batch, args.backend, display))
+
+    # Modo CLI: varios displays en paralelo en este proceso
+    if requests and len(displays) > 1:
+        sys.exit(run_multi_display(requests, args.backend, displays))
+
+    # Modo CLI: usar el daemon si está activo (salvo backend explícito)
+    if requests:
+        client = None
+        if not args.no_daemon and not args.backend:
+            client = DaemonClient.connect(socket_path(display, os.environ.get('SIMURES_BACKEND')))
+        if client is not None:
+            sys.exit(run_with_daemon(client, requests))
+        sys.exit(run_in_process(requests, args.backend, display))
 
     # Modo GUI
-    else:
-        signal.signal(signal.SIGINT, signal_handler)
-        signal.signal(signal.SIGTERM, signal_handler)
-        
-        app = QApplication(sys.argv)
-        
-        # Configurar paleta de colores
-        palette = QPalette()
-        palette.setColor(QPalette.Window, QColor("#1e1e1e"))
-        palette.setColor(QPalette.WindowText, QColor("#ffffff"))
-        app.setPalette(palette)
-        
-        window = MainWindow()
-        window.show()
-        
-        try:
-            sys.exit(app.exec_())
-        except Exception as e:
-            print("[ERROR] Error inesperado:", e)
-            window.restore_resolution()
+    if len(displays) > 1:
+        print("[ERROR] La interfaz gráfica controla un único display")
+        sys.exit(1)
+    sys.exit(run_gui(args.backend, display))
 
 
 
@@ -0,0 +1,133 @@
+# multi_display.py
+import time
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+
+import commands
+from backends import BackendError, get_backend
+from resolution_controller import ResolutionController
+from colors_controller import ColorsController
+from profiling import span
+
+
+
+
+
+'''
+>>> Resultados por display
+'''
+@dataclass
+class DisplayResult:
+    display: str
+    code: int = 0
+    lines: list = field(default_factory=list)
+    duration_ms: float = 0.0
+
+    @property
+    def ok(self):
+        return self.code == 0
+
+
+def parse_displays(spec):
+    """ ':0,:1' -> [':0', ':1'] (sin repetidos, en orden); ValueError si no hay ninguno """
+    displays = []
+    for item in spec.split(','):
+        item = item.strip()
+        if item and item not in displays:
+            displays.append(item)
+    if not displays:
+        raise ValueError(f"Lista de displays inválida: '{spec}'")
+    return displays
+
+
+
+
+
+'''
+>>> Controlador de varios displays
+'''
+class MultiDisplayController:
+    """ Ejecuta los mismos comandos en varios servidores X a la vez.
+
+    Cada display tiene su backend, journal y controladores, y se atiende desde su propio
+    hilo: la latencia total es la del display más lento, no la suma. Un display que no
+    se puede abrir o que falla solo afecta a su propio resultado.
+    """
+    def __init__(self, displays, backend_name=None, max_workers=None):
+        self.displays = list(displays)
+        self.backend_name = backend_name
+        self.pool = ThreadPoolExecutor(max_workers=max_workers or len(self.displays),
+                                       thread_name_prefix='simures-display')
+        self.controllers = {}  # display -> (ResolutionController, ColorsController)
+        self.errors = {}  # display -> motivo por el que no se pudo abrir
+
+        # Las conexiones también se abren en paralelo (XOpenDisplay puede tardar en remoto)
+        futures = [self.pool.submit(self._open, display) for display in self.displays]
+        for display, future in zip(self.displays, futures):
+            try:
+                self.controllers[display] = future.result()
+            except BackendError as e:
+                self.errors[display] = str(e)
+
+    def _open(self, display):
+        backend = get_backend(self.backend_name, display)
+        return ResolutionController(backend), ColorsController(backend)
+
+    def _run_display(self, display, requests, recover_stale):
+        result = DisplayResult(display)
+        start = time.perf_counter()
+        if display in self.errors:
+            result.code, result.lines = 1, [f"[ERROR] {self.errors[display]}"]
+            return result
+
+        res_controller, color_controller = self.controllers[display]
+        with span('display', output=display, backend=res_controller.backend.name,
+                  commands=','.join(request['cmd'] for request in requests)) as s:
+            try:
+                if recover_stale:
+                    result.lines += commands.recover_stale(res_controller, color_controller)
+                for request in requests:
+                    code, lines = commands.execute(request, res_controller, color_controller)
+                    result.lines += lines
+                    if code:
+                        result.code = code
+                        break
+            except Exception as e:  # Un display caído no debe arrastrar a los demás
+                result.code = 1
+                result.lines.append(f"[ERROR] Fallo inesperado en {display}: {e}")
+            s.ok = result.ok
+        result.duration_ms = round((time.perf_counter() - start) * 1000, 3)
+        return result
+
+    def run(self, requests, recover_stale=True):
+        """ Ejecutar las peticiones en todos los displays; [DisplayResult] en el orden dado """
+        recover_stale = recover_stale and requests[0]['cmd'] != 'recover'
+        futures = [self.pool.submit(self._run_display, display, requests, recover_stale)
+                   for display in self.displays]
+        return [future.result() for future in futures]
+
+    # Atajos para los comandos habituales
+    def list_outputs(self):
+        return self.run([{'cmd': 'list'}])
+
+    def apply_scale(self, factor, output_spec=None, animate=None):
+        return self.run([{'cmd': 'start', 'factor': factor, 'output': output_spec, 'animate': animate}])
+
+    def restore(self, output_spec=None):
+        return self.run([{'cmd': 'stop', 'output': output_spec}])
+
+    # Interrupción: mismo contrato que ResolutionController (touched, restore_scales)
+    @property
+    def touched(self):
+        return [f"{display}/{name}" for display, (res, _) in self.controllers.items()
+                for name in sorted(res.touched)]
+
+    def restore_scales(self):
+        """ Restaurar en paralelo lo modificado en cada display """
+        with ThreadPoolExecutor(max_workers=max(len(self.controllers), 1)) as pool:
+            results = list(pool.map(lambda res: res.restore_scales(),
+                                    [res for res, _ in self.controllers.values()]))
+        return all(results)
+
+    def close(self):
+        self.pool.shutdown(wait=False)
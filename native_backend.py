@@ -0,0 +1,730 @@
+# native_backend.py
+import math
+import ctypes
+import ctypes.util
+import threading
+
+from backends import BackendError
+from topology import Mode, OutputState, Topology
+
+
+
+
+
+'''
+>>> Tipos de Xlib / XRandR (ctypes)
+'''
+XID = ctypes.c_ulong
+Time = ctypes.c_ulong
+Rotation = ctypes.c_ushort
+XFixed = ctypes.c_int
+
+CURRENT_TIME = 0
+RR_CONNECTED = 0
+# Estado de XRRSetCrtcConfig (randr.h)
+RR_SET_CONFIG_STATUS = {0: None, 1: 'InvalidConfigTime', 2: 'InvalidTime', 3: 'Failed'}
+
+ROTATIONS = {1: 'normal', 2: 'left', 4: 'inverted', 8: 'right'}
+
+
+class XRRModeInfo(ctypes.Structure):
+    _fields_ = [
+        ('id', XID),
+        ('width', ctypes.c_uint),
+        ('height', ctypes.c_uint),
+        ('dotClock', ctypes.c_ulong),
+        ('hSyncStart', ctypes.c_uint),
+        ('hSyncEnd', ctypes.c_uint),
+        ('hTotal', ctypes.c_uint),
+        ('hSkew', ctypes.c_uint),
+        ('vSyncStart', ctypes.c_uint),
+        ('vSyncEnd', ctypes.c_uint),
+        ('vTotal', ctypes.c_uint),
+        ('name', ctypes.c_char_p),
+        ('nameLength', ctypes.c_uint),
+        ('modeFlags', ctypes.c_ulong),
+    ]
+
+
+class XRRScreenResources(ctypes.Structure):
+    _fields_ = [
+        ('timestamp', Time),
+        ('configTimestamp', Time),
+        ('ncrtc', ctypes.c_int),
+        ('crtcs', ctypes.POINTER(XID)),
+        ('noutput', ctypes.c_int),
+        ('outputs', ctypes.POINTER(XID)),
+        ('nmode', ctypes.c_int),
+        ('modes', ctypes.POINTER(XRRModeInfo)),
+    ]
+
+
+class XRROutputInfo(ctypes.Structure):
+    _fields_ = [
+        ('timestamp', Time),
+        ('crtc', XID),
+        ('name', ctypes.c_char_p),
+        ('nameLen', ctypes.c_int),
+        ('mm_width', ctypes.c_ulong),
+        ('mm_height', ctypes.c_ulong),
+        ('connection', ctypes.c_ushort),
+        ('subpixel_order', ctypes.c_ushort),
+        ('ncrtc', ctypes.c_int),
+        ('crtcs', ctypes.POINTER(XID)),
+        ('nclone', ctypes.c_int),
+        ('clones', ctypes.POINTER(XID)),
+        ('nmode', ctypes.c_int),
+        ('npreferred', ctypes.c_int),
+        ('modes', ctypes.POINTER(XID)),
+    ]
+
+
+class XRRCrtcInfo(ctypes.Structure):
+    _fields_ = [
+        ('timestamp', Time),
+        ('x', ctypes.c_int),
+        ('y', ctypes.c_int),
+        ('width', ctypes.c_uint),
+        ('height', ctypes.c_uint),
+        ('mode', XID),
+        ('rotation', Rotation),
+        ('noutput', ctypes.c_int),
+        ('outputs', ctypes.POINTER(XID)),
+        ('rotations', Rotation),
+        ('npossible', ctypes.c_int),
+        ('possible', ctypes.POINTER(XID)),
+    ]
+
+
+class XTransform(ctypes.Structure):
+    _fields_ = [('matrix', (XFixed * 3) * 3)]
+
+
+class XRRCrtcTransformAttributes(ctypes.Structure):
+    _fields_ = [
+        ('pendingTransform', XTransform),
+        ('pendingFilter', ctypes.c_char_p),
+        ('pendingNparams', ctypes.c_int),
+        ('pendingParams', ctypes.POINTER(XFixed)),
+        ('currentTransform', XTransform),
+        ('currentFilter', ctypes.c_char_p),
+        ('currentNparams', ctypes.c_int),
+        ('currentParams', ctypes.POINTER(XFixed)),
+    ]
+
+
+class XRRCrtcGamma(ctypes.Structure):
+    _fields_ = [
+        ('size', ctypes.c_int),
+        ('red', ctypes.POINTER(ctypes.c_ushort)),
+        ('green', ctypes.POINTER(ctypes.c_ushort)),
+        ('blue', ctypes.POINTER(ctypes.c_ushort)),
+    ]
+
+
+class XErrorEvent(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_int),
+        ('display', ctypes.c_void_p),
+        ('resourceid', XID),
+        ('serial', ctypes.c_ulong),
+        ('error_code', ctypes.c_ubyte),
+        ('request_code', ctypes.c_ubyte),
+        ('minor_code', ctypes.c_ubyte),
+    ]
+
+
+class XEvent(ctypes.Union):
+    _fields_ = [('type', ctypes.c_int), ('pad', ctypes.c_long * 24)]
+
+
+class XRRNotifyEvent(ctypes.Structure):
+    _fields_ = [
+        ('type', ctypes.c_int),
+        ('serial', ctypes.c_ulong),
+        ('send_event', ctypes.c_int),
+        ('display', ctypes.c_void_p),
+        ('window', XID),
+        ('subtype', ctypes.c_int),
+        # XRROutputChangeNotifyEvent: output; XRRCrtcChangeNotifyEvent: crtc
+        ('output_or_crtc', XID),
+    ]
+
+
+# Eventos RandR (relativos a event_base) y máscaras de selección
+RR_SCREEN_CHANGE_NOTIFY = 0
+RR_NOTIFY = 1
+RR_NOTIFY_CRTC_CHANGE = 0
+RR_NOTIFY_OUTPUT_CHANGE = 1
+RR_SCREEN_CHANGE_MASK = 1 << 0
+RR_CRTC_CHANGE_MASK = 1 << 1
+RR_OUTPUT_CHANGE_MASK = 1 << 2
+
+
+XErrorHandler = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.c_void_p, ctypes.POINTER(XErrorEvent))
+
+
+def to_fixed(value):
+    return int(round(value * 65536))
+
+
+def from_fixed(value):
+    return value / 65536.0
+
+
+
+
+
+'''
+>>> Carga de bibliotecas
+'''
+_libs = {}
+_libs_lock = threading.Lock()
+_x_errors = {}  # Conexión (dirección del Display) -> errores; varios displays en paralelo
+
+
+def _on_x_error(display, event):
+    """ Registrar errores X en lugar de dejar que Xlib termine el proceso """
+    err = event.contents
+    _x_errors.setdefault(display, []).append((err.error_code, err.request_code, err.minor_code))
+    return 0
+
+
+_error_handler = XErrorHandler(_on_x_error)
+
+
+def prepare_xlib(x11):
+    """ Conexiones compartibles entre hilos y errores X registrados (antes de abrir displays) """
+    x11.XSetErrorHandler.argtypes = [XErrorHandler]
+    x11.XSetErrorHandler.restype = ctypes.c_void_p
+    x11.XInitThreads()
+    x11.XSetErrorHandler(_error_handler)
+
+
+def take_x_errors(display):
+    """ Errores X registrados para la conexión indicada desde la última llamada """
+    return _x_errors.pop(display, None)
+
+
+def _load_libraries():
+    with _libs_lock:
+        if not _libs:
+            _libs['X11'], _libs['Xrandr'] = _open_libraries()
+        return _libs['X11'], _libs['Xrandr']
+
+
+def _open_libraries():
+    x11_path = ctypes.util.find_library('X11')
+    xrandr_path = ctypes.util.find_library('Xrandr')
+    if not x11_path or not xrandr_path:
+        raise BackendError("libX11/libXrandr no disponibles")
+    try:
+        x11 = ctypes.CDLL(x11_path)
+        xrandr = ctypes.CDLL(xrandr_path)
+    except OSError as e:
+        raise BackendError(f"No se pudo cargar libXrandr: {e}")
+
+    dpy = ctypes.c_void_p
+    x11.XInitThreads.restype = ctypes.c_int
+    x11.XOpenDisplay.argtypes = [ctypes.c_char_p]
+    x11.XOpenDisplay.restype = dpy
+    x11.XCloseDisplay.argtypes = [dpy]
+    x11.XDefaultScreen.argtypes = [dpy]
+    x11.XDefaultRootWindow.argtypes = [dpy]
+    x11.XDefaultRootWindow.restype = XID
+    x11.XDisplayWidth.argtypes = [dpy, ctypes.c_int]
+    x11.XDisplayHeight.argtypes = [dpy, ctypes.c_int]
+    x11.XDisplayWidthMM.argtypes = [dpy, ctypes.c_int]
+    x11.XDisplayHeightMM.argtypes = [dpy, ctypes.c_int]
+    x11.XGetGeometry.argtypes = [
+        dpy, XID, ctypes.POINTER(XID),
+        ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+        ctypes.POINTER(ctypes.c_uint), ctypes.POINTER(ctypes.c_uint),
+        ctypes.POINTER(ctypes.c_uint), ctypes.POINTER(ctypes.c_uint),
+    ]
+    x11.XGrabServer.argtypes = [dpy]
+    x11.XUngrabServer.argtypes = [dpy]
+    x11.XSync.argtypes = [dpy, ctypes.c_int]
+    x11.XFree.argtypes = [ctypes.c_void_p]
+    x11.XConnectionNumber.argtypes = [dpy]
+    x11.XFlush.argtypes = [dpy]
+    x11.XPending.argtypes = [dpy]
+    x11.XNextEvent.argtypes = [dpy, ctypes.POINTER(XEvent)]
+
+    xrandr.XRRQueryExtension.argtypes = [dpy, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+    xrandr.XRRQueryVersion.argtypes = [dpy, ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int)]
+    xrandr.XRRGetScreenResourcesCurrent.argtypes = [dpy, XID]
+    xrandr.XRRGetScreenResourcesCurrent.restype = ctypes.POINTER(XRRScreenResources)
+    xrandr.XRRFreeScreenResources.argtypes = [ctypes.POINTER(XRRScreenResources)]
+    xrandr.XRRGetOutputInfo.argtypes = [dpy, ctypes.POINTER(XRRScreenResources), XID]
+    xrandr.XRRGetOutputInfo.restype = ctypes.POINTER(XRROutputInfo)
+    xrandr.XRRFreeOutputInfo.argtypes = [ctypes.POINTER(XRROutputInfo)]
+    xrandr.XRRGetCrtcInfo.argtypes = [dpy, ctypes.POINTER(XRRScreenResources), XID]
+    xrandr.XRRGetCrtcInfo.restype = ctypes.POINTER(XRRCrtcInfo)
+    xrandr.XRRFreeCrtcInfo.argtypes = [ctypes.POINTER(XRRCrtcInfo)]
+    xrandr.XRRGetOutputPrimary.argtypes = [dpy, XID]
+    xrandr.XRRGetOutputPrimary.restype = XID
+    xrandr.XRRGetScreenSizeRange.argtypes = [
+        dpy, XID,
+        ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+        ctypes.POINTER(ctypes.c_int), ctypes.POINTER(ctypes.c_int),
+    ]
+    xrandr.XRRSetScreenSize.argtypes = [dpy, XID, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int]
+    xrandr.XRRGetCrtcTransform.argtypes = [dpy, XID, ctypes.POINTER(ctypes.POINTER(XRRCrtcTransformAttributes))]
+    xrandr.XRRSetCrtcTransform.argtypes = [
+        dpy, XID, ctypes.POINTER(XTransform), ctypes.c_char_p, ctypes.POINTER(XFixed), ctypes.c_int
+    ]
+    xrandr.XRRSetCrtcConfig.argtypes = [
+        dpy, ctypes.POINTER(XRRScreenResources), XID, Time,
+        ctypes.c_int, ctypes.c_int, XID, Rotation, ctypes.POINTER(XID), ctypes.c_int
+    ]
+    xrandr.XRRSetCrtcConfig.restype = ctypes.c_int
+    xrandr.XRRGetCrtcGammaSize.argtypes = [dpy, XID]
+    xrandr.XRRGetCrtcGamma.argtypes = [dpy, XID]
+    xrandr.XRRGetCrtcGamma.restype = ctypes.POINTER(XRRCrtcGamma)
+    xrandr.XRRAllocGamma.argtypes = [ctypes.c_int]
+    xrandr.XRRAllocGamma.restype = ctypes.POINTER(XRRCrtcGamma)
+    xrandr.XRRSetCrtcGamma.argtypes = [dpy, XID, ctypes.POINTER(XRRCrtcGamma)]
+    xrandr.XRRFreeGamma.argtypes = [ctypes.POINTER(XRRCrtcGamma)]
+    xrandr.XRRSelectInput.argtypes = [dpy, XID, ctypes.c_int]
+    xrandr.XRRUpdateConfiguration.argtypes = [ctypes.POINTER(XEvent)]
+
+    prepare_xlib(x11)
+    return x11, xrandr
+
+
+
+
+
+'''
+>>> Backend nativo
+'''
+class NativeBackend:
+    """ Habla RandR directamente sobre una conexión X persistente (sin procesos) """
+    name = 'native'
+    supports_gamma = True
+
+    def __init__(self, display=None):
+        self.x11, self.xrandr = _load_libraries()
+        self.display = display
+        self.dpy = self.x11.XOpenDisplay(display.encode() if display else None)
+        if not self.dpy:
+            raise BackendError(f"No se pudo abrir el display {display or '(DISPLAY)'}")
+
+        event_base, error_base = ctypes.c_int(), ctypes.c_int()
+        major, minor = ctypes.c_int(), ctypes.c_int()
+        if (not self.xrandr.XRRQueryExtension(self.dpy, ctypes.byref(event_base), ctypes.byref(error_base))
+                or not self.xrandr.XRRQueryVersion(self.dpy, ctypes.byref(major), ctypes.byref(minor))
+                or (major.value, minor.value) < (1, 3)):
+            self.x11.XCloseDisplay(self.dpy)
+            self.dpy = None
+            raise BackendError("El servidor X no soporta RandR 1.3")
+        self.event_base = event_base.value
+
+        screen = self.x11.XDefaultScreen(self.dpy)
+        self.root = self.x11.XDefaultRootWindow(self.dpy)
+        # Relación mm/píxel para mantener el DPI al redimensionar el framebuffer
+        self.mm_per_px_x = self.x11.XDisplayWidthMM(self.dpy, screen) / max(self.x11.XDisplayWidth(self.dpy, screen), 1)
+        self.mm_per_px_y = self.x11.XDisplayHeightMM(self.dpy, screen) / max(self.x11.XDisplayHeight(self.dpy, screen), 1)
+        self.lock = threading.RLock()
+
+    # Utilidades internas
+    def _check_errors(self, what):
+        self.x11.XSync(self.dpy, 0)
+        errors = take_x_errors(self.dpy)
+        if errors:
+            code, request, minor = errors[-1]
+            raise BackendError(f"Error X en {what} (código {code}, petición {request}.{minor})")
+
+    def _resources(self):
+        res = self.xrandr.XRRGetScreenResourcesCurrent(self.dpy, self.root)
+        if not res:
+            raise BackendError("No se pudieron obtener los recursos de pantalla")
+        return res
+
+    def _screen_size(self):
+        root, x, y = XID(), ctypes.c_int(), ctypes.c_int()
+        width, height, border, depth = ctypes.c_uint(), ctypes.c_uint(), ctypes.c_uint(), ctypes.c_uint()
+        self.x11.XGetGeometry(self.dpy, self.root, ctypes.byref(root), ctypes.byref(x), ctypes.byref(y),
+                              ctypes.byref(width), ctypes.byref(height), ctypes.byref(border), ctypes.byref(depth))
+        return width.value, height.value
+
+    def _size_range(self):
+        values = [ctypes.c_int() for _ in range(4)]
+        self.xrandr.XRRGetScreenSizeRange(self.dpy, self.root, *[ctypes.byref(v) for v in values])
+        return [v.value for v in values]
+
+    def _crtc_transform(self, crtc):
+        """ Devuelve (escala_x, escala_y, filtro) del transform actual del CRTC """
+        attrs = ctypes.POINTER(XRRCrtcTransformAttributes)()
+        if not self.xrandr.XRRGetCrtcTransform(self.dpy, crtc, ctypes.byref(attrs)) or not attrs:
+            return 1.0, 1.0, None
+        try:
+            current = attrs.contents.currentTransform.matrix
+            w = from_fixed(current[2][2]) or 1.0
+            sx = from_fixed(current[0][0]) / w
+            sy = from_fixed(current[1][1]) / w
+            flt = attrs.contents.currentFilter
+            return round(sx, 4), round(sy, 4), (flt.decode() if flt else None)
+        finally:
+            self.x11.XFree(attrs)
+
+    @staticmethod
+    def _mode_table(res):
+        modes = {}
+        for i in range(res.contents.nmode):
+            info = res.contents.modes[i]
+            rate = 0.0
+            if info.hTotal and info.vTotal:
+                rate = round(info.dotClock / (info.hTotal * info.vTotal), 2)
+            modes[info.id] = (info.width, info.height, rate)
+        return modes
+
+    def _find_output(self, res, name):
+        """ Devuelve (output_id, crtc_id) de la salida con ese nombre """
+        for i in range(res.contents.noutput):
+            output_id = res.contents.outputs[i]
+            info = self.xrandr.XRRGetOutputInfo(self.dpy, res, output_id)
+            if not info:
+                continue
+            try:
+                if info.contents.name.decode() == name:
+                    return output_id, info.contents.crtc
+            finally:
+                self.xrandr.XRRFreeOutputInfo(info)
+        raise BackendError(f"La salida '{name}' no existe")
+
+    def _output_crtcs(self, res):
+        """ Nombre de salida -> CRTC, solo para salidas con CRTC asignado """
+        crtcs = {}
+        for i in range(res.contents.noutput):
+            info = self.xrandr.XRRGetOutputInfo(self.dpy, res, res.contents.outputs[i])
+            if not info:
+                continue
+            try:
+                if info.contents.crtc:
+                    crtcs[info.contents.name.decode()] = info.contents.crtc
+            finally:
+                self.xrandr.XRRFreeOutputInfo(info)
+        return crtcs
+
+    def _gamma_crtcs(self, outputs=None):
+        res = self._resources()
+        try:
+            crtcs = self._output_crtcs(res)
+        finally:
+            self.xrandr.XRRFreeScreenResources(res)
+        if outputs is None:
+            return crtcs
+        missing = [name for name in outputs if name not in crtcs]
+        if missing:
+            raise BackendError(f"Salidas sin CRTC activo: {', '.join(missing)}")
+        return {name: crtcs[name] for name in outputs}
+
+    # Interfaz pública
+    def query(self):
+        with self.lock:
+            res = self._resources()
+            try:
+                modes = self._mode_table(res)
+                primary = self.xrandr.XRRGetOutputPrimary(self.dpy, self.root)
+                topology = Topology()
+                (topology.min_width, topology.min_height,
+                 topology.max_width, topology.max_height) = self._size_range()
+                topology.screen_width, topology.screen_height = self._screen_size()
+
+                for i in range(res.contents.noutput):
+                    output_id = res.contents.outputs[i]
+                    info = self.xrandr.XRRGetOutputInfo(self.dpy, res, output_id)
+                    if not info:
+                        continue
+                    try:
+                        out = self._output_state(res, info.contents, modes, output_id == primary)
+                    finally:
+                        self.xrandr.XRRFreeOutputInfo(info)
+                    topology.outputs[out.name] = out
+                return topology
+            finally:
+                self.xrandr.XRRFreeScreenResources(res)
+
+    def _output_state(self, res, info, modes, primary):
+        out = OutputState(
+            name=info.name.decode(),
+            connected=(info.connection == RR_CONNECTED),
+            primary=primary
+        )
+        current_mode_id = None
+        if info.crtc:
+            crtc = self.xrandr.XRRGetCrtcInfo(self.dpy, res, info.crtc)
+            if crtc:
+                try:
+                    c = crtc.contents
+                    if c.mode:
+                        out.x, out.y, out.width, out.height = c.x, c.y, c.width, c.height
+                        out.rotation = ROTATIONS.get(c.rotation & 0x0f, 'normal')
+                        current_mode_id = c.mode
+                finally:
+                    self.xrandr.XRRFreeCrtcInfo(crtc)
+            out.scale_x, out.scale_y, out.filter = self._crtc_transform(info.crtc)
+
+        for j in range(info.nmode):
+            mode_id = info.modes[j]
+            if mode_id not in modes:
+                continue
+            width, height, rate = modes[mode_id]
+            mode = Mode(width, height, rates=[rate],
+                        current=(mode_id == current_mode_id),
+                        preferred=(j < info.npreferred))
+            out.modes.append(mode)
+            if mode.current:
+                out.current_mode = mode
+        return out
+
+    def _read_crtcs(self, res):
+        """ Instantánea de los CRTC activos: id -> configuración """
+        crtcs = {}
+        for i in range(res.contents.ncrtc):
+            crtc_id = res.contents.crtcs[i]
+            info = self.xrandr.XRRGetCrtcInfo(self.dpy, res, crtc_id)
+            if not info:
+                continue
+            try:
+                c = info.contents
+                if c.mode:
+                    outputs = (XID * c.noutput)(*[c.outputs[j] for j in range(c.noutput)])
+                    crtcs[crtc_id] = {
+                        'x': c.x, 'y': c.y, 'width': c.width, 'height': c.height,
+                        'mode': c.mode, 'rotation': c.rotation,
+                        'outputs': outputs, 'noutput': c.noutput,
+                    }
+            finally:
+                self.xrandr.XRRFreeCrtcInfo(info)
+        return crtcs
+
+    def _set_crtc(self, res, crtc_id, crtc, scale_x, scale_y, filter_name):
+        transform = XTransform()
+        transform.matrix[0][0] = to_fixed(scale_x)
+        transform.matrix[1][1] = to_fixed(scale_y)
+        transform.matrix[2][2] = to_fixed(1.0)
+        flt = (filter_name or 'bilinear').encode()
+        self.xrandr.XRRSetCrtcTransform(self.dpy, crtc_id, ctypes.byref(transform), flt, None, 0)
+        status = self.xrandr.XRRSetCrtcConfig(self.dpy, res, crtc_id, CURRENT_TIME, crtc['x'], crtc['y'],
+                                              crtc['mode'], crtc['rotation'], crtc['outputs'], crtc['noutput'])
+        self._check_errors("SetCrtcConfig")
+        # El servidor puede rechazar la configuración sin error X: lo indica el estado de la respuesta
+        if status != 0:
+            reason = RR_SET_CONFIG_STATUS.get(status, f"estado {status}")
+            raise BackendError(f"El servidor rechazó la configuración del CRTC {crtc_id} (RRSetConfig{reason})")
+
+    def apply(self, changes, screen_size=None):
+        """ Aplicar todos los cambios (escala, posición y framebuffer) bajo un único grab, todo o nada """
+        if not changes:
+            return
+        with self.lock:
+            self.x11.XGrabServer(self.dpy)
+            res = self._resources()
+            try:
+                self._apply_changes(res, changes, screen_size)
+            finally:
+                self.xrandr.XRRFreeScreenResources(res)
+                self.x11.XUngrabServer(self.dpy)
+                self.x11.XSync(self.dpy, 0)
+
+    def _apply_changes(self, res, changes, screen_size=None):
+        modes = self._mode_table(res)
+        crtcs = self._read_crtcs(res)
+
+        # Resolver cada salida a su CRTC y calcular su nueva geometría
+        targets = {}
+        for change in changes:
+            _, crtc_id = self._find_output(res, change.name)
+            if crtc_id not in crtcs:
+                raise BackendError(f"La salida '{change.name}' no tiene un CRTC activo")
+            crtc = crtcs[crtc_id]
+            mode_w, mode_h, _ = modes[crtc['mode']]
+            if crtc['rotation'] & 0x0a:  # left/right intercambian los ejes
+                mode_w, mode_h = mode_h, mode_w
+            targets[crtc_id] = (
+                change,
+                int(math.ceil(mode_w * change.scale_x - 1e-6)),
+                int(math.ceil(mode_h * change.scale_y - 1e-6)),
+            )
+
+        # Tamaño del framebuffer: unión de todos los CRTC con la nueva geometría
+        fb_w = fb_h = 0
+        for crtc_id, crtc in crtcs.items():
+            x, y, width, height = crtc['x'], crtc['y'], crtc['width'], crtc['height']
+            if crtc_id in targets:
+                change, width, height = targets[crtc_id]
+                if change.x is not None:
+                    x, y = change.x, change.y
+            fb_w = max(fb_w, x + width)
+            fb_h = max(fb_h, y + height)
+        if screen_size:
+            fb_w, fb_h = max(fb_w, screen_size[0]), max(fb_h, screen_size[1])
+        min_w, min_h, max_w, max_h = self._size_range()
+        fb_w, fb_h = max(fb_w, min_w), max(fb_h, min_h)
+        if fb_w > max_w or fb_h > max_h:
+            raise BackendError(f"El framebuffer {fb_w}x{fb_h} excede el máximo {max_w}x{max_h}")
+
+        cur_w, cur_h = self._screen_size()
+        grow_w, grow_h = max(cur_w, fb_w), max(cur_h, fb_h)
+        originals = {crtc_id: self._crtc_transform(crtc_id) for crtc_id in targets}
+        applied = []
+        try:
+            # Crecer primero, reconfigurar los CRTC y encoger al final
+            if (grow_w, grow_h) != (cur_w, cur_h):
+                self._set_screen_size(grow_w, grow_h)
+            for crtc_id, (change, _, _) in targets.items():
+                applied.append(crtc_id)
+                crtc = crtcs[crtc_id]
+                if change.x is not None:
+                    crtc = dict(crtc, x=change.x, y=change.y)
+                self._set_crtc(res, crtc_id, crtc, change.scale_x, change.scale_y,
+                               change.filter or originals[crtc_id][2])
+            if (fb_w, fb_h) != (grow_w, grow_h):
+                self._set_screen_size(fb_w, fb_h)
+        except BackendError:
+            self._rollback(res, crtcs, originals, applied, (cur_w, cur_h))
+            raise
+
+    def _rollback(self, res, crtcs, originals, applied, screen_size):
+        """ Devolver los CRTC ya modificados a su transform original """
+        for crtc_id in applied:
+            scale_x, scale_y, filter_name = originals[crtc_id]
+            try:
+                self._set_crtc(res, crtc_id, crtcs[crtc_id], scale_x, scale_y, filter_name)
+            except BackendError:
+                pass
+        try:
+            if self._screen_size() != screen_size:
+                self._set_screen_size(*screen_size)
+        except BackendError:
+            pass
+
+    def gamma_sizes(self):
+        """ Tamaño de la rampa gamma de cada salida activa """
+        with self.lock:
+            return {name: self.xrandr.XRRGetCrtcGammaSize(self.dpy, crtc)
+                    for name, crtc in self._gamma_crtcs().items()}
+
+    def get_gamma(self, output):
+        """ Rampa actual de la salida como tres buffers de uint16 (rojo, verde, azul) """
+        with self.lock:
+            crtc = self._gamma_crtcs([output])[output]
+            gamma = self.xrandr.XRRGetCrtcGamma(self.dpy, crtc)
+            if not gamma:
+                raise BackendError(f"No se pudo leer la rampa gamma de {output}")
+            try:
+                size = gamma.contents.size * ctypes.sizeof(ctypes.c_ushort)
+                return tuple(ctypes.string_at(getattr(gamma.contents, channel), size)
+                             for channel in ('red', 'green', 'blue'))
+            finally:
+                self.xrandr.XRRFreeGamma(gamma)
+
+    def set_gamma(self, ramps):
+        """ Subir {salida: (rojo, verde, azul)} con una petición por CRTC """
+        with self.lock:
+            crtcs = self._gamma_crtcs(list(ramps))
+            for name, channels in ramps.items():
+                buffers = [bytes(memoryview(channel)) for channel in channels]
+                size = len(buffers[0]) // ctypes.sizeof(ctypes.c_ushort)
+                gamma = self.xrandr.XRRAllocGamma(size)
+                if not gamma:
+                    raise BackendError("No se pudo reservar la rampa gamma")
+                try:
+                    for channel, data in zip(('red', 'green', 'blue'), buffers):
+                        ctypes.memmove(getattr(gamma.contents, channel), data, len(data))
+                    self.xrandr.XRRSetCrtcGamma(self.dpy, crtcs[name], gamma)
+                finally:
+                    self.xrandr.XRRFreeGamma(gamma)
+            self._check_errors("SetCrtcGamma")
+
+    def _set_screen_size(self, width, height):
+        self.xrandr.XRRSetScreenSize(self.dpy, self.root, width, height,
+                                     int(width * self.mm_per_px_x), int(height * self.mm_per_px_y))
+        self._check_errors("SetScreenSize")
+
+    def watch(self):
+        """ Observador de eventos RandR sobre una conexión propia """
+        return HotplugWatcher(self.display)
+
+    def close(self):
+        with self.lock:
+            if self.dpy:
+                self.x11.XCloseDisplay(self.dpy)
+                self.dpy = None
+
+
+
+
+
+'''
+>>> Eventos de conexión/desconexión
+'''
+class HotplugWatcher(NativeBackend):
+    """ Conexión X dedicada a notificaciones RandR; su descriptor se integra en el bucle de eventos """
+
+    def __init__(self, display=None):
+        super().__init__(display)
+        self.xrandr.XRRSelectInput(self.dpy, self.root,
+                                   RR_SCREEN_CHANGE_MASK | RR_CRTC_CHANGE_MASK | RR_OUTPUT_CHANGE_MASK)
+        self.x11.XFlush(self.dpy)
+
+    def fileno(self):
+        return self.x11.XConnectionNumber(self.dpy)
+
+    def _read_events(self):
+        """ Vaciar la cola: (ids de salida, ids de CRTC, cambió la pantalla) """
+        output_ids, crtc_ids, screen = set(), set(), False
+        event = XEvent()
+        while self.x11.XPending(self.dpy):
+            self.x11.XNextEvent(self.dpy, ctypes.byref(event))
+            kind = event.type - self.event_base
+            if kind == RR_SCREEN_CHANGE_NOTIFY:
+                self.xrandr.XRRUpdateConfiguration(ctypes.byref(event))
+                screen = True
+            elif kind == RR_NOTIFY:
+                notify = ctypes.cast(ctypes.byref(event), ctypes.POINTER(XRRNotifyEvent)).contents
+                if notify.subtype == RR_NOTIFY_OUTPUT_CHANGE:
+                    output_ids.add(notify.output_or_crtc)
+                elif notify.subtype == RR_NOTIFY_CRTC_CHANGE:
+                    crtc_ids.add(notify.output_or_crtc)
+        return output_ids, crtc_ids, screen
+
+    def drain(self):
+        """ Procesar los eventos pendientes.
+
+        Devuelve None si no hay cambios, o (salidas, tamaño de pantalla, completo): solo se
+        vuelven a leer las salidas afectadas salvo que alguna haya desaparecido de los recursos.
+        """
+        with self.lock:
+            outputs, screen_size, complete = {}, None, False
+            output_ids, crtc_ids, screen = self._read_events()
+            # Las consultas pueden traer nuevos eventos a la cola de Xlib: repetir hasta vaciarla
+            while output_ids or crtc_ids or screen:
+                if screen:
+                    screen_size = self._screen_size()
+                res = self._resources()
+                try:
+                    known = {res.contents.outputs[i] for i in range(res.contents.noutput)}
+                    if output_ids - known:
+                        complete = True
+                    modes = self._mode_table(res)
+                    primary = self.xrandr.XRRGetOutputPrimary(self.dpy, self.root)
+                    for output_id in known:
+                        info = self.xrandr.XRRGetOutputInfo(self.dpy, res, output_id)
+                        if not info:
+                            continue
+                        try:
+                            if complete or output_id in output_ids or info.contents.crtc in crtc_ids:
+                                out = self._output_state(res, info.contents, modes, output_id == primary)
+                                outputs[out.name] = out
+                        finally:
+                            self.xrandr.XRRFreeOutputInfo(info)
+                finally:
+                    self.xrandr.XRRFreeScreenResources(res)
+                output_ids, crtc_ids, screen = self._read_events()
+            if not outputs and screen_size is None:
+                return None
+            return outputs, screen_size, complete
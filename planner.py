@@ -0,0 +1,152 @@
+# planner.py
+from dataclasses import dataclass, field
+
+from layout import compute_layout
+
+
+
+
+
+'''
+>>> Coste de una configuración
+'''
+BYTES_PER_PIXEL = 4  # Framebuffer de 24/32 bits
+MIN_SCALE = 1.0
+MAX_SCALE = 20.0
+FILTER_TAPS = {'nearest': 1, 'bilinear': 4}
+
+
+@dataclass
+class OutputCost:
+    name: str
+    mode: tuple  # (ancho, alto) del modo, en píxeles del monitor
+    scale: tuple
+    geometry: tuple  # (x, y, ancho, alto) en el framebuffer
+    refresh: float = 60.0
+    filter: str = None
+
+    @property
+    def scaled(self):
+        return self.scale != (1.0, 1.0)
+
+    @property
+    def frame_bytes(self):
+        """ Bytes del framebuffer que se leen para componer cada fotograma de la salida """
+        return self.geometry[2] * self.geometry[3] * BYTES_PER_PIXEL
+
+    @property
+    def samples(self):
+        """ Muestras por fotograma: una por píxel del monitor y tap del filtro (0 sin transform) """
+        if not self.scaled:
+            return 0
+        return self.mode[0] * self.mode[1] * FILTER_TAPS.get(self.filter or 'bilinear', 4)
+
+    @property
+    def bandwidth(self):
+        """ Bytes por segundo que el escalado lee del framebuffer (0 sin transform) """
+        return self.frame_bytes * self.refresh if self.scaled else 0.0
+
+
+@dataclass
+class ScalePlan:
+    outputs: list = field(default_factory=list)
+    screen_size: tuple = (0, 0)
+    max_size: tuple = (0, 0)
+    problems: list = field(default_factory=list)
+
+    @property
+    def ok(self):
+        return not self.problems
+
+    @property
+    def framebuffer_bytes(self):
+        return self.screen_size[0] * self.screen_size[1] * BYTES_PER_PIXEL
+
+    def to_dict(self):
+        return {
+            'ok': self.ok,
+            'screen_size': list(self.screen_size),
+            'max_size': list(self.max_size),
+            'framebuffer_bytes': self.framebuffer_bytes,
+            'outputs': [{'name': out.name, 'mode': list(out.mode), 'scale': list(out.scale),
+                         'geometry': list(out.geometry), 'refresh': out.refresh,
+                         'frame_bytes': out.frame_bytes, 'samples': out.samples,
+                         'bandwidth': out.bandwidth} for out in self.outputs],
+            'problems': self.problems,
+        }
+
+
+def plan_scales(topology, scales):
+    """ Calcular framebuffer, memoria y coste por fotograma de {salida: escala o (x, y)}.
+
+    Las salidas no indicadas conservan su escala; no se envía nada al servidor.
+    """
+    problems, targets = [], {}
+    for name, value in scales.items():
+        scale = value if isinstance(value, tuple) else (value, value)
+        out = topology.get(name)
+        if out is None or not out.connected:
+            problems.append(f"La pantalla '{name}' no está conectada")
+        elif not out.active:
+            problems.append(f"La pantalla '{name}' no tiene un modo activo")
+        elif not all(MIN_SCALE <= factor <= MAX_SCALE for factor in scale):
+            problems.append(f"Escala de {name} fuera de rango ({MIN_SCALE:g} a {MAX_SCALE:g})")
+        else:
+            targets[name] = scale
+
+    layout = compute_layout(topology, targets)
+    plan = ScalePlan(screen_size=layout.screen_size, max_size=layout.max_size, problems=problems)
+    for name, geometry in layout.geometry.items():
+        out = topology.get(name)
+        mode = out.current_mode
+        width, height = (mode.height, mode.width) if out.rotation in ('left', 'right') else (mode.width, mode.height)
+        plan.outputs.append(OutputCost(name, (width, height), tuple(layout.scales[name]), geometry,
+                                       mode.rates[0] if mode.rates else 60.0, out.filter))
+    if not layout.fits:
+        plan.problems.append("El framebuffer {}x{} excede el máximo del servidor {}x{}".format(
+            *layout.screen_size, *layout.max_size))
+    return plan
+
+
+def max_scale(topology, output, step=0.1):
+    """ Mayor escala uniforme (múltiplo de step) de la salida con la que el framebuffer cabe """
+    low, high = 0, int(round((MAX_SCALE - MIN_SCALE) / step))
+    if plan_scales(topology, {output: MAX_SCALE}).ok:
+        return MAX_SCALE
+    while low < high:
+        middle = (low + high + 1) // 2
+        if plan_scales(topology, {output: round(MIN_SCALE + middle * step, 6)}).ok:
+            low = middle
+        else:
+            high = middle - 1
+    return round(MIN_SCALE + low * step, 6)
+
+
+
+
+
+'''
+>>> Presentación
+'''
+def format_bytes(value):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if value < 1024 or unit == 'GB':
+            return f"{value:.0f} {unit}" if unit == 'B' else f"{value:.1f} {unit}"
+        value /= 1024
+
+
+def format_plan(plan):
+    """ Líneas legibles de un ScalePlan (para --plan) """
+    (width, height), (max_w, max_h) = plan.screen_size, plan.max_size
+    limit = f" (máximo {max_w}x{max_h})" if max_w and max_h else ""
+    lines = [f"Framebuffer: {width}x{height}{limit}, {format_bytes(plan.framebuffer_bytes)}"]
+    for out in plan.outputs:
+        x, y, w, h = out.geometry
+        cost = (f"{format_bytes(out.frame_bytes)}/fotograma, {format_bytes(out.bandwidth)}/s, "
+                f"{out.samples / 1e6:.1f} M muestras" if out.scaled else "sin escalado")
+        lines.append(f"  - {out.name}: {out.scale[0]:g}x{out.scale[1]:g} {w}x{h}+{x}+{y} "
+                     f"({out.mode[0]}x{out.mode[1]} @ {out.refresh:g} Hz): {cost}")
+    lines += [f"[ERROR] {problem}" for problem in plan.problems]
+    if plan.ok:
+        lines.append("[OK] La configuración cabe en los límites del servidor")
+    return lines
@@ -0,0 +1,65 @@
+# preview.py
+import os
+import time
+from PyQt5.QtCore import QObject, QTimer
+
+
+
+
+
+'''
+>>> Vista previa en vivo
+'''
+DEFAULT_PREVIEW_HZ = float(os.environ.get('SIMURES_PREVIEW_HZ', '8'))
+
+
+class CoalescingApplier(QObject):
+    """ Aplica solo el último valor pendiente, como máximo `max_rate` veces por segundo """
+    def __init__(self, apply_fn, max_rate=DEFAULT_PREVIEW_HZ, parent=None):
+        super().__init__(parent)
+        self.apply_fn = apply_fn
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+        self.pending = None
+        self.last_sent = None
+        self.last_time = 0.0
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def set_max_rate(self, max_rate):
+        self.min_interval = 1.0 / max_rate if max_rate > 0 else 0.0
+
+    def submit(self, value):
+        """ Registrar un nuevo valor; los intermedios se descartan """
+        self.pending = value
+        if self.timer.isActive():
+            return
+        wait = self.min_interval - (time.monotonic() - self.last_time)
+        if wait <= 0:
+            self.flush()
+        else:
+            self.timer.start(int(wait * 1000) + 1)
+
+    def finish(self, value):
+        """ Aplicación final (al soltar el slider), sin esperar al límite de tasa """
+        self.timer.stop()
+        self.pending = value
+        self.flush()
+
+    def flush(self):
+        if self.pending is None:
+            return
+        value, self.pending = self.pending, None
+        if value == self.last_sent:
+            return
+        self.last_sent = value
+        self.apply_fn(value)
+        # apply_fn solo encola la aplicación (AsyncController), así que el intervalo cuenta desde
+        # el envío anterior; si aún no empezó, el siguiente envío la reemplaza en la cola
+        self.last_time = time.monotonic()
+
+    def reset(self, value=None):
+        """ Olvidar el estado (p. ej. tras restaurar o cambiar de monitor) """
+        self.timer.stop()
+        self.pending = None
+        self.last_sent = value
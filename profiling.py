@@ -0,0 +1,106 @@
+# profiling.py
+import os
+import sys
+import json
+import time
+import threading
+
+
+
+
+
+'''
+>>> Estado global
+'''
+_state = {'stream': None, 'hooked': False, 'spawns': 0}
+_lock = threading.Lock()
+
+
+def _audit(event, args):
+    if event == 'subprocess.Popen':
+        _state['spawns'] += 1
+
+
+def enable(target=None):
+    """ Activar la emisión de registros JSON-lines ('-' = stderr, o ruta de fichero) """
+    target = target or os.environ.get('SIMURES_PROFILE') or '-'
+    if target in ('-', '1', 'stderr'):
+        _state['stream'] = sys.stderr
+    else:
+        _state['stream'] = open(target, 'a', buffering=1)
+    if not _state['hooked']:
+        sys.addaudithook(_audit)
+        _state['hooked'] = True
+
+
+def enabled():
+    return _state['stream'] is not None
+
+
+def enable_from_env():
+    if os.environ.get('SIMURES_PROFILE'):
+        enable()
+
+
+def _spawn_count():
+    return _state['spawns']
+
+
+def emit(record):
+    stream = _state['stream']
+    if stream is not None:
+        record.setdefault('ts', round(time.time(), 6))
+        with _lock:
+            stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+            stream.flush()
+
+
+
+
+
+'''
+>>> Spans
+'''
+class Span:
+    """ Mide una operación; usar como context manager o cerrar con finish() """
+    def __init__(self, operation, output=None, backend=None, **extra):
+        self.record = {'op': operation, 'output': output, 'backend': backend}
+        self.record.update(extra)
+        self.start = time.perf_counter()
+        self.spawns = _spawn_count()
+        self.ok = True
+        self.finished = False
+
+    def finish(self, ok=None, **extra):
+        if self.finished:
+            return self.record
+        self.finished = True
+        self.record.update(extra)
+        self.record['ok'] = bool(self.ok if ok is None else ok)
+        self.record['duration_ms'] = round((time.perf_counter() - self.start) * 1000, 3)
+        self.record['spawns'] = _spawn_count() - self.spawns if _state['hooked'] else None
+        emit(self.record)
+        return self.record
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.finish(ok=exc_type is None and self.ok)
+        return False
+
+
+def span(operation, output=None, backend=None, **extra):
+    return Span(operation, output, backend, **extra)
+
+
+def process_age_ms():
+    """ Tiempo desde el arranque del proceso (Linux), para medir el arranque de Python """
+    try:
+        with open('/proc/self/stat') as f:
+            start_ticks = int(f.read().rsplit(')', 1)[1].split()[19])
+        with open('/proc/uptime') as f:
+            uptime = float(f.read().split()[0])
+        return round((uptime - start_ticks / os.sysconf('SC_CLK_TCK')) * 1000, 1)
+    except (OSError, ValueError, IndexError):
+        return None
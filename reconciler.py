@@ -0,0 +1,175 @@
+# reconciler.py
+import os
+import json
+from dataclasses import dataclass, field
+
+from backends import OutputChange
+from animation import Transition
+from color_filters import normalize_color
+from profiling import span
+
+
+
+
+
+'''
+>>> Estado deseado
+'''
+SCALE_EPSILON = 1e-3
+
+
+@dataclass
+class OutputTarget:
+    """ Estado deseado de una salida; scale_x None significa «su estado original» """
+    scale_x: float = None
+    scale_y: float = None
+    filter: str = None  # None: el filtro no importa
+
+    def __post_init__(self):
+        if self.scale_y is None:
+            self.scale_y = self.scale_x
+
+
+@dataclass
+class DesiredState:
+    outputs: dict = field(default_factory=dict)  # nombre -> OutputTarget
+    color_mode: object = None  # None: el color no importa; 0 normal, o filtro (modo 1-3 o cadena)
+
+    def __post_init__(self):
+        self.color_mode = normalize_color(self.color_mode)
+
+    @classmethod
+    def from_dict(cls, data):
+        """ {'outputs': {'DP-1': 1.5 | [1.5, 1.25] | {'scale': ..., 'filter': ...} | 'original'},
+             'color': 0 | 1-3 | 'invert,contrast=1.2'} """
+        if not isinstance(data, dict):
+            raise ValueError("El perfil debe ser un objeto JSON")
+        try:
+            state = cls(color_mode=data.get('color'))
+        except ValueError as e:
+            raise ValueError(f"Color inválido: {e}")
+        for name, value in (data.get('outputs') or {}).items():
+            spec = value if isinstance(value, dict) else {'scale': value}
+            scale = spec.get('scale', 'original')
+            try:
+                if scale == 'original':
+                    target = OutputTarget(filter=spec.get('filter'))
+                elif isinstance(scale, (list, tuple)):
+                    target = OutputTarget(float(scale[0]), float(scale[1]), spec.get('filter'))
+                else:
+                    target = OutputTarget(float(scale), filter=spec.get('filter'))
+            except (TypeError, ValueError, IndexError):
+                raise ValueError(f"Escala inválida para '{name}': {scale}")
+            state.outputs[name] = target
+        return state
+
+
+@dataclass
+class Plan:
+    """ Operaciones mínimas para pasar del estado actual al deseado """
+    changes: list = field(default_factory=list)  # OutputChange, aplicados en un solo lote
+    color_mode: object = None  # None: no hace falta tocar el color
+    unchanged: list = field(default_factory=list)
+    missing: list = field(default_factory=list)
+
+    @property
+    def empty(self):
+        return not self.changes and self.color_mode is None
+
+
+
+
+
+'''
+>>> Reconciliador
+'''
+class Reconciler:
+    def __init__(self, res_controller, color_controller):
+        self.res_controller = res_controller
+        self.color_controller = color_controller
+
+    def plan(self, desired):
+        """ Comparar con la topología en caché y quedarse solo con lo que difiere """
+        topology = self.res_controller.get_topology()
+        plan = Plan()
+        for name, target in desired.outputs.items():
+            out = topology.get(name)
+            if out is None or not out.connected:
+                plan.missing.append(name)
+                continue
+            if target.scale_x is None:
+                original = self.res_controller.original_change(name)
+                target = OutputTarget(original.scale_x, original.scale_y, target.filter or original.filter)
+            same_scale = (abs(out.scale_x - target.scale_x) <= SCALE_EPSILON
+                          and abs(out.scale_y - target.scale_y) <= SCALE_EPSILON)
+            same_filter = target.filter is None or target.filter == out.filter
+            if same_scale and same_filter:
+                plan.unchanged.append(name)
+            else:
+                plan.changes.append(OutputChange(name, target.scale_x, target.scale_y, target.filter))
+
+        if desired.color_mode is not None and desired.color_mode != self.color_controller.current_mode():
+            plan.color_mode = desired.color_mode
+        return plan
+
+    def execute(self, plan, animate=None, cancel=None):
+        """ Un único lote de cambios de salida y, como mucho, una operación de color.
+
+        Con animate (segundos) los cambios de escala se hacen como una transición, que
+        termina antes de tiempo si se activa el evento cancel.
+        """
+        success = not plan.missing
+        if plan.changes and animate:
+            success = Transition(self.res_controller, plan.changes, animate, cancel=cancel).run() and success
+        elif plan.changes:
+            success = self.res_controller.apply_changes(plan.changes) and success
+        if plan.color_mode is not None:
+            if plan.color_mode == 0:
+                ok, _ = self.color_controller.restore_colors()
+            else:
+                ok, _ = self.color_controller.apply_filter(plan.color_mode)
+            success = ok and success
+        return success
+
+    def reconcile(self, desired, animate=None, cancel=None):
+        with span('reconcile', output=','.join(desired.outputs) or None,
+                  backend=self.res_controller.backend.name) as s:
+            plan = self.plan(desired)
+            s.record.update(changes=len(plan.changes), color=plan.color_mode is not None)
+            s.ok = self.execute(plan, animate, cancel)
+            return s.ok
+
+
+
+
+
+'''
+>>> Perfiles con nombre
+'''
+def profiles_path():
+    if os.environ.get('SIMURES_PROFILES'):
+        return os.environ['SIMURES_PROFILES']
+    base = os.environ.get('XDG_CONFIG_HOME') or os.path.expanduser('~/.config')
+    return os.path.join(base, 'simures', 'profiles.json')
+
+
+def load_profiles(path=None):
+    """ {nombre: DesiredState} desde un fichero JSON; ValueError si no es válido """
+    path = path or profiles_path()
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except OSError as e:
+        raise ValueError(f"No se pudo leer el fichero de perfiles {path}: {e.strerror}")
+    except ValueError as e:
+        raise ValueError(f"Fichero de perfiles inválido {path}: {e}")
+    if not isinstance(data, dict):
+        raise ValueError(f"Fichero de perfiles inválido {path}: se esperaba un objeto")
+
+    profiles = {}
+    for name, spec in data.items():
+        try:
+            profiles[name] = DesiredState.from_dict(spec)
+        except ValueError as e:
+            raise ValueError(f"Perfil '{name}': {e}")
+    return profiles
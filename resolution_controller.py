@@ -1,51 +1,212 @@
 # resolution_controller.py
-import subprocess
+from topology import TopologyCache, Topology
+from backends import BackendError, OutputChange, get_backend
+from journal import get_journal
+from layout import arrange, predicted_outputs, scale_for_target
+from planner import plan_scales
+from profiling import span
 
 
 
 
 
 class ResolutionController:
-    @staticmethod
-    def get_output_name():
-        """ Obtener el nombre de la pantalla conectada """
+    def __init__(self, backend=None, ttl=None, journal=None):
+        self.backend = backend or get_backend()
+        self.cache = TopologyCache(self._query) if ttl is None else TopologyCache(self._query, ttl)
+        self.journal = journal or get_journal(self.backend.display, self.backend.name)
+        self.touched = set()
+        self.filters = {}  # Último filtro aplicado, para backends que no lo informan
+
+    def _query(self):
+        """ Única consulta al backend; todo lo demás se deriva de la topología """
+        with span('query', backend=self.backend.name) as s:
+            try:
+                topology = self.backend.query()
+            except BackendError as e:
+                s.ok = False
+                print("Error consultando la configuración de pantallas:", e)
+                return Topology()
+            # xrandr --query no informa del filtro: usar el último aplicado (aquí o en otra invocación)
+            journaled = None
+            for out in topology.outputs.values():
+                if out.filter is None:
+                    if journaled is None:
+                        journaled = self.journal.entries()[0]
+                    out.filter = self.filters.get(out.name) or journaled.get(out.name, {}).get('applied_filter')
+            return topology
+
+    def get_topology(self, refresh=False):
+        """ Obtener la topología en caché (una consulta como máximo por TTL) """
+        return self.cache.get(refresh)
+
+    def invalidate(self):
+        """ Descartar la topología en caché tras modificar la configuración """
+        self.cache.invalidate()
+
+    def watch_hotplug(self):
+        """ Observador de conexión/desconexión de monitores (None si el backend no emite eventos) """
         try:
-            result = subprocess.check_output(["xrandr"]).decode("utf-8")
-            for line in result.splitlines():
-                if " connected" in line:
-                    return line.split()[0]
-        except Exception as e:
-            print("Error obteniendo la salida de video:", e)
+            return self.backend.watch()
+        except BackendError as e:
+            print("No se pudieron suscribir los eventos de pantalla:", e)
             return None
 
-    @staticmethod
-    def get_all_outputs():
+    def process_hotplug(self, watcher):
+        """ Incorporar los eventos pendientes a la topología; None si no cambió nada """
+        try:
+            change = watcher.drain()
+        except BackendError as e:
+            print("Error procesando eventos de pantalla:", e)
+            self.invalidate()
+            return None
+        if change is None:
+            return None
+        topology = self.cache.update(*change)
+        # Una salida desconectada ya no se puede (ni debe) restaurar
+        for output in list(self.touched):
+            out = topology.get(output)
+            if out is None or not out.connected:
+                self.touched.discard(output)
+        return topology
+
+    def get_output_name(self):
+        """ Obtener el nombre de la pantalla principal conectada """
+        return self.get_topology().default_output()
+
+    def get_all_outputs(self):
         """ Obtener lista de todas las pantallas conectadas """
+        return self.get_topology().connected_names()
+
+    def plan(self, scales):
+        """ Coste y validez de {salida: factor} sobre la topología en caché, sin aplicar nada """
+        return plan_scales(self.get_topology(), scales)
+
+    def apply_scales(self, scales, filter=None):
+        """ Aplicar {salida: factor} en una sola reconfiguración (todo o nada) """
+        return self._apply([OutputChange(output, factor, filter=filter) for output, factor in scales.items()],
+                           'apply')
+
+    def apply_changes(self, changes):
+        """ Aplicar una lista de OutputChange en una sola reconfiguración """
+        return self._apply(changes, 'apply')
+
+    def original_change(self, output):
+        """ Estado anterior a la primera modificación, según el journal """
+        entry = self.journal.original(output)
+        if not entry:
+            return OutputChange(output, 1.0)
+        return OutputChange(output, *entry['scale'], entry.get('filter'))
+
+    def track(self, names):
+        """ Registrar el estado original y marcar las salidas antes de modificarlas """
+        # Estado original a disco antes de tocar nada: sobrevive a un SIGKILL
+        pending = [output for output in names if not self.journal.recorded(output)]
+        if pending:
+            topology = self.get_topology()
+            self.journal.record_outputs([topology.get(output) for output in pending])
+        # Marcar antes de aplicar: una interrupción a mitad también se restaura
+        added = set(names) - self.touched
+        self.touched.update(names)
+        return added
+
+    def arrange(self, changes):
+        """ Completar el lote con la posición de todas las salidas y el tamaño del framebuffer.
+
+        Se calcula sobre la topología en caché para que escalas, posiciones y --fb vayan en la
+        misma reconfiguración. Devuelve (cambios, tamaño o None, layout); BackendError si el
+        framebuffer no cabe en el máximo del servidor.
+        """
+        topology = self.get_topology()
+        arranged, layout = arrange(topology, changes)
+        if not layout.geometry:
+            return changes, None, layout
+        if not layout.fits:
+            (width, height), (max_w, max_h) = layout.screen_size, layout.max_size
+            raise BackendError(f"El framebuffer {width}x{height} excede el máximo {max_w}x{max_h}")
+        return arranged, layout.screen_size, layout
+
+    def apply_frame(self, changes):
+        """ Paso intermedio de una transición: sin journal ni traza (ver track) """
         try:
-            result = subprocess.check_output(["xrandr"]).decode("utf-8")
-            outputs = []
-            for line in result.splitlines():
-                if " connected" in line:
-                    outputs.append(line.split()[0])
-            return outputs
-        except Exception as e:
-            print("Error obteniendo las salidas de video:", e)
-            return []
-
-    @staticmethod
-    def apply_scale(output, scale_factor):
-        """ Aplicar un factor de escala a la resolución """
-        if output:
-            cmd = f"xrandr --output {output} --scale {scale_factor}x{scale_factor}"
-            subprocess.run(cmd, shell=True)
+            arranged, screen_size, layout = self.arrange(changes)
+            self.backend.apply(arranged, screen_size)
+        except BackendError as e:
+            print(f"Error aplicando escala en {', '.join(c.name for c in changes)}:", e)
+            self.invalidate()
+            return False
+        self._settle(screen_size, layout)
+        return True
+
+    def _settle(self, screen_size, layout, filters=None):
+        """ Dejar en caché la geometría recién aplicada en lugar de volver a consultarla """
+        topology = self.cache.peek()
+        if screen_size and topology is not None:
+            # La reconfiguración es atómica: si no falló, el servidor quedó justo así
+            self.cache.update(predicted_outputs(topology, layout, filters), screen_size)
+        else:
+            self.invalidate()
+
+    def _apply(self, changes, operation):
+        changes = [change for change in changes if change.name]
+        if not changes:
+            return False
+        names = [change.name for change in changes]
+        with span(operation, output=','.join(names), backend=self.backend.name,
+                  scales={change.name: change.scale_x for change in changes}) as s:
+            added = self.track(names)
+            try:
+                arranged, screen_size, layout = self.arrange(changes)
+                s.record['moved'] = len(arranged) - len(changes)
+                self.backend.apply(arranged, screen_size)
+            except BackendError as e:
+                s.ok = False
+                print(f"Error aplicando escala en {', '.join(names)}:", e)
+                self.touched -= added
+                self.invalidate()
+                return False
+            filters = {change.name: change.filter for change in changes if change.filter}
+            self._settle(screen_size, layout, filters)
+            self.filters.update(filters)
+            self.journal.annotate('outputs', {name: {'applied_filter': f} for name, f in filters.items()})
+            restored = []
+            for change in changes:
+                original = self.original_change(change.name)
+                if (change.scale_x, change.scale_y) == (original.scale_x, original.scale_y):
+                    restored.append(change.name)
+            self.touched.difference_update(restored)
+            self.journal.forget_outputs(restored)
             return True
-        return False
 
-    @staticmethod
-    def restore_scale(output):
-        """ Restaurar la resolución original """
-        if output:
-            cmd = f"xrandr --output {output} --scale 1x1"
-            subprocess.run(cmd, shell=True)
+    def restore_scales(self, outputs=None):
+        """ Volver en lote al estado original de las salidas (por defecto, las modificadas) """
+        outputs = list(self.touched) if outputs is None else list(outputs)
+        if not outputs:
             return True
-        return False
\ No newline at end of file
+        return self._apply([self.original_change(output) for output in outputs], 'restore')
+
+    def recover(self, entries):
+        """ Reponer en una sola reconfiguración las salidas registradas en el journal """
+        connected = set(self.get_topology(refresh=True).connected_names())
+        self.journal.forget_outputs([output for output in entries if output not in connected])
+        changes = [OutputChange(output, *entry['scale'], entry.get('filter'))
+                   for output, entry in entries.items() if output in connected]
+        if not changes:
+            return True
+        return self._apply(changes, 'recover')
+
+    def apply_scale(self, output, scale_factor, filter=None):
+        """ Aplicar un factor de escala a la resolución (filter: 'nearest' o 'bilinear') """
+        return self._apply([OutputChange(output, scale_factor, filter=filter)], 'apply')
+
+    def apply_target(self, output, width, height, filter=None):
+        """ Escalar la salida hasta ocupar width x height en el framebuffer (--scale-from) """
+        out = self.get_topology().get(output)
+        if out is None or not out.active:
+            print(f"Error aplicando escala en {output}: la salida no está activa")
+            return False
+        return self._apply([OutputChange(output, *scale_for_target(out, width, height), filter)], 'apply')
+
+    def restore_scale(self, output):
+        """ Restaurar la resolución original """
+        return self._apply([self.original_change(output)], 'restore')
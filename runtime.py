@@ -0,0 +1,36 @@
+# runtime.py
+import os
+import stat
+
+
+
+
+
+'''
+>>> Directorio de ejecución privado
+'''
+def ensure_private_dir(directory):
+    """ Crear el directorio del socket/journal con modo 0700 y comprobar que es seguro usarlo.
+
+    Otro usuario local podría crear antes /tmp/simures-<uid> y leer o suplantar el socket: se
+    exige que sea un directorio (no un enlace) del propio usuario sin acceso para los demás. Un
+    directorio compartido con sticky bit y de root (/tmp, elegido con SIMURES_SOCKET o
+    SIMURES_JOURNAL) también se admite: nadie más puede borrar ni renombrar lo que se cree en él.
+    """
+    parent = os.path.dirname(directory)
+    if parent and not os.path.isdir(parent):
+        os.makedirs(parent, mode=0o700, exist_ok=True)
+    try:
+        os.mkdir(directory, 0o700)
+    except FileExistsError:
+        pass
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode):
+        raise OSError(f"{directory} no es un directorio")
+    mode = stat.S_IMODE(info.st_mode)
+    if info.st_uid == os.getuid() and not mode & 0o077:
+        return directory
+    if info.st_uid == 0 and mode & stat.S_ISVTX:
+        return directory
+    raise OSError(f"{directory} no es privado (propietario {info.st_uid}, permisos {mode:o}): "
+                  f"debe pertenecer al usuario {os.getuid()} con permisos 700")
@@ -0,0 +1,415 @@
+# sim_backend.py
+import os
+import json
+import math
+import time
+import array
+import base64
+import random
+import threading
+
+from backends import BackendError
+from topology import Mode, OutputState, Topology
+
+
+
+
+
+'''
+>>> Configuración
+'''
+DEFAULT_OUTPUTS = 'HDMI-1:1920x1080,DP-1:2560x1440,DP-2:1920x1080,VIRTUAL-1:off'
+DEFAULT_MIN_SIZE = (320, 200)
+DEFAULT_MAX_SIZE = (16384, 16384)
+DEFAULT_GAMMA_SIZE = 1024
+OPERATIONS = ('query', 'apply', 'get_gamma', 'set_gamma')
+ROTATIONS = ('normal', 'left', 'inverted', 'right')
+
+
+def parse_size(text):
+    width, sep, height = text.lower().partition('x')
+    try:
+        if not sep:
+            raise ValueError
+        return int(width), int(height)
+    except ValueError:
+        raise BackendError(f"Tamaño inválido para el backend simulado: '{text}'")
+
+
+def parse_outputs(spec):
+    """ Salidas desde 'nombre:ANCHOxALTO[@hz][:rotación],...'; 'nombre:off' la deja desconectada """
+    outputs, x = [], 0
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, rest = item.partition(':')
+        mode, _, rotation = rest.partition(':')
+        if mode == 'off':
+            outputs.append(SimOutput(name, connected=False))
+            continue
+        size, _, rate = mode.partition('@')
+        width, height = parse_size(size)
+        rotation = rotation or 'normal'
+        if rotation not in ROTATIONS:
+            raise BackendError(f"Rotación inválida para {name}: '{rotation}'")
+        try:
+            rate = float(rate) if rate else 60.0
+        except ValueError:
+            raise BackendError(f"Frecuencia inválida para {name}: '{rate}'")
+        modes = [(width, height, rate)] + [m for m in ((1280, 720, 60.0),) if m[:2] != (width, height)]
+        out = SimOutput(name, modes=modes, mode=0, x=x, primary=not outputs, rotation=rotation)
+        outputs.append(out)
+        x += out.size()[0]
+    if not outputs:
+        raise BackendError("El backend simulado necesita al menos una salida")
+    return outputs
+
+
+def parse_failures(spec):
+    """ Probabilidad de fallo por operación desde 'apply=0.1,set_gamma=1' (un número solo es apply) """
+    failures = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        op, sep, value = item.rpartition('=') if '=' in item else ('apply', '=', item)
+        if op not in OPERATIONS:
+            raise BackendError(f"Operación desconocida en SIMURES_SIM_FAIL: '{op}'")
+        try:
+            failures[op] = min(max(float(value), 0.0), 1.0)
+        except ValueError:
+            raise BackendError(f"Probabilidad inválida en SIMURES_SIM_FAIL: '{value}'")
+    return failures
+
+
+def identity_ramp(size):
+    """ Rampa lineal de size entradas uint16, como la que carga el servidor al arrancar """
+    step = 65535 / max(size - 1, 1)
+    return array.array('H', (int(round(i * step)) for i in range(size))).tobytes()
+
+
+
+
+
+'''
+>>> Estado en memoria
+'''
+class SimOutput:
+    """ Una salida y su CRTC: modo, posición, rotación, transform y rampa gamma """
+
+    def __init__(self, name, connected=True, modes=None, mode=None, x=0, y=0, primary=False,
+                 rotation='normal', scale=(1.0, 1.0), filter=None, gamma=None):
+        self.name = name
+        self.connected = connected
+        self.modes = modes or []  # [(ancho, alto, hz)]; el primero es el preferido
+        self.mode = mode  # Índice del modo actual (None sin CRTC)
+        self.x, self.y = x, y
+        self.primary = primary
+        self.rotation = rotation
+        self.scale = tuple(scale)
+        self.filter = filter  # None hasta que se fija un transform, como informa el servidor
+        self.gamma = gamma
+
+    @property
+    def active(self):
+        return self.connected and self.mode is not None
+
+    def size(self, scale=None):
+        """ Tamaño del CRTC en el framebuffer con la escala dada (la actual por defecto) """
+        scale_x, scale_y = scale or self.scale
+        width, height, _ = self.modes[self.mode]
+        if self.rotation in ('left', 'right'):
+            width, height = height, width
+        return int(math.ceil(width * scale_x - 1e-6)), int(math.ceil(height * scale_y - 1e-6))
+
+    def state(self):
+        """ OutputState con los mismos campos que rellena el backend nativo """
+        out = OutputState(name=self.name, connected=self.connected, primary=self.primary)
+        if self.active:
+            out.width, out.height = self.size()
+            out.x, out.y, out.rotation = self.x, self.y, self.rotation
+            out.scale_x, out.scale_y = round(self.scale[0], 4), round(self.scale[1], 4)
+            out.filter = self.filter
+        for index, (width, height, rate) in enumerate(self.modes):
+            mode = Mode(width, height, rates=[rate], current=(index == self.mode), preferred=(index == 0))
+            out.modes.append(mode)
+            if mode.current:
+                out.current_mode = mode
+        return out
+
+    def to_dict(self):
+        record = {'name': self.name, 'connected': self.connected, 'modes': self.modes, 'mode': self.mode,
+                  'x': self.x, 'y': self.y, 'primary': self.primary, 'rotation': self.rotation,
+                  'scale': list(self.scale), 'filter': self.filter}
+        if self.gamma:
+            record['gamma'] = [base64.b64encode(channel).decode() for channel in self.gamma]
+        return record
+
+    @classmethod
+    def from_dict(cls, record):
+        record = dict(record, modes=[tuple(mode) for mode in record['modes']])
+        if record.get('gamma'):
+            record['gamma'] = tuple(base64.b64decode(channel) for channel in record['gamma'])
+        return cls(**record)
+
+
+
+
+
+'''
+>>> Backend simulado
+'''
+class SimBackend:
+    """ Servidor RandR simulado en memoria: sin X ni procesos, con latencia y fallos configurables.
+
+    Se configura con SIMURES_SIM_OUTPUTS, SIMURES_SIM_MAX, SIMURES_SIM_GAMMA_SIZE,
+    SIMURES_SIM_LATENCY_MS, SIMURES_SIM_FAIL y SIMURES_SIM_SEED. Con SIMURES_SIM_STATE el estado
+    se guarda en un fichero (uno por display) para que varias invocaciones de la CLI lo compartan.
+    """
+    name = 'sim'
+    supports_gamma = True
+    simulated = True
+
+    def __init__(self, display=None, outputs=None, max_size=None, gamma_size=None, latency_ms=None,
+                 failures=None, seed=None):
+        env = os.environ
+        self.display = display
+        self.min_size = DEFAULT_MIN_SIZE
+        self.max_size = max_size or (parse_size(env['SIMURES_SIM_MAX']) if env.get('SIMURES_SIM_MAX')
+                                     else DEFAULT_MAX_SIZE)
+        self.gamma_size = gamma_size or int(env.get('SIMURES_SIM_GAMMA_SIZE', DEFAULT_GAMMA_SIZE))
+        self.latency = (latency_ms if latency_ms is not None
+                        else float(env.get('SIMURES_SIM_LATENCY_MS', 0))) / 1000
+        self.failures = failures if failures is not None else parse_failures(env.get('SIMURES_SIM_FAIL', ''))
+        seed = seed if seed is not None else env.get('SIMURES_SIM_SEED')
+        self.random = random.Random(int(seed) if seed is not None else None)
+        self.forced = {}  # Operación -> fallos pendientes de fail_next()
+        self.counters = dict.fromkeys(OPERATIONS, 0)
+        self.lock = threading.RLock()
+        self.watchers = []
+
+        self.path = env.get('SIMURES_SIM_STATE')
+        if self.path and display:
+            self.path += display.replace('/', '_')
+        self.outputs, self.screen_size = None, None
+        if self.path and os.path.exists(self.path):
+            self._load()
+        if self.outputs is None:
+            outputs = outputs or parse_outputs(env.get('SIMURES_SIM_OUTPUTS', DEFAULT_OUTPUTS))
+            self.outputs = {out.name: out for out in outputs}
+            self.screen_size = self._union(self.outputs.values())
+
+    # Utilidades internas
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.outputs = {record['name']: SimOutput.from_dict(record) for record in data['outputs']}
+            self.screen_size = tuple(data['screen_size'])
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise BackendError(f"Estado simulado inválido en {self.path}: {e}")
+
+    def _save(self):
+        if self.path:
+            data = {'outputs': [out.to_dict() for out in self.outputs.values()],
+                    'screen_size': list(self.screen_size)}
+            with open(self.path, 'w') as f:
+                json.dump(data, f)
+
+    def _union(self, outputs, sizes=None, positions=None):
+        sizes, positions = sizes or {}, positions or {}
+        width = height = 0
+        for out in outputs:
+            if out.active:
+                x, y = positions.get(out.name, (out.x, out.y))
+                w, h = sizes.get(out.name) or out.size()
+                width, height = max(width, x + w), max(height, y + h)
+        return max(width, self.min_size[0]), max(height, self.min_size[1])
+
+    def _request(self, op):
+        """ Una petición al servidor: latencia simulada y fallo inyectado si toca """
+        self.counters[op] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if self.forced.get(op):
+            self.forced[op] -= 1
+            raise BackendError(f"Fallo simulado en {op}")
+        probability = self.failures.get(op)
+        if probability and self.random.random() < probability:
+            raise BackendError(f"Fallo simulado en {op}")
+
+    def _active(self, names):
+        missing = [name for name in names if name not in self.outputs or not self.outputs[name].active]
+        if missing:
+            raise BackendError(f"Salidas sin CRTC activo: {', '.join(missing)}")
+        return [self.outputs[name] for name in names]
+
+    def _ramp(self, out):
+        if out.gamma is None:
+            ramp = identity_ramp(self.gamma_size)
+            out.gamma = (ramp, ramp, ramp)
+        return out.gamma
+
+    def _notify(self, names, screen=False):
+        for watcher in list(self.watchers):
+            watcher.notify(names, screen)
+
+    # Interfaz pública
+    def query(self):
+        with self.lock:
+            self._request('query')
+            topology = Topology(screen_width=self.screen_size[0], screen_height=self.screen_size[1],
+                                min_width=self.min_size[0], min_height=self.min_size[1],
+                                max_width=self.max_size[0], max_height=self.max_size[1])
+            for out in self.outputs.values():
+                topology.outputs[out.name] = out.state()
+            return topology
+
+    def apply(self, changes, screen_size=None):
+        """ Aplicar todos los cambios (escala, posición y framebuffer) de forma atómica, como el nativo """
+        if not changes:
+            return
+        with self.lock:
+            sizes, positions = {}, {}
+            for change in changes:
+                out = self.outputs.get(change.name)
+                if out is None:
+                    raise BackendError(f"La salida '{change.name}' no existe")
+                if not out.active:
+                    raise BackendError(f"La salida '{change.name}' no tiene un CRTC activo")
+                sizes[change.name] = out.size((change.scale_x, change.scale_y))
+                if change.x is not None:
+                    positions[change.name] = (change.x, change.y)
+
+            fb_w, fb_h = self._union(self.outputs.values(), sizes, positions)
+            if screen_size:
+                fb_w, fb_h = max(fb_w, screen_size[0]), max(fb_h, screen_size[1])
+            max_w, max_h = self.max_size
+            if fb_w > max_w or fb_h > max_h:
+                raise BackendError(f"El framebuffer {fb_w}x{fb_h} excede el máximo {max_w}x{max_h}")
+            # El fallo inyectado llega antes de tocar nada: equivale al rollback del nativo
+            self._request('apply')
+
+            for change in changes:
+                out = self.outputs[change.name]
+                out.scale = (change.scale_x, change.scale_y)
+                out.filter = change.filter or out.filter or 'bilinear'
+                out.x, out.y = positions.get(change.name, (out.x, out.y))
+            resized = (fb_w, fb_h) != self.screen_size
+            self.screen_size = (fb_w, fb_h)
+            self._save()
+            self._notify([change.name for change in changes], resized)
+
+    def gamma_sizes(self):
+        """ Tamaño de la rampa gamma de cada salida activa """
+        with self.lock:
+            return {out.name: len(self._ramp(out)[0]) // 2 for out in self.outputs.values() if out.active}
+
+    def get_gamma(self, output):
+        """ Rampa actual de la salida como tres buffers de uint16 (rojo, verde, azul) """
+        with self.lock:
+            out, = self._active([output])
+            self._request('get_gamma')
+            return self._ramp(out)
+
+    def set_gamma(self, ramps):
+        """ Cargar {salida: (rojo, verde, azul)}; todas o ninguna """
+        with self.lock:
+            outputs = self._active(list(ramps))
+            buffers = {}
+            for out in outputs:
+                channels = tuple(bytes(memoryview(channel)) for channel in ramps[out.name])
+                if len(channels) != 3 or any(len(c) != len(self._ramp(out)[0]) for c in channels):
+                    raise BackendError(f"Rampa gamma de tamaño inválido para {out.name}")
+                buffers[out.name] = channels
+            self._request('set_gamma')
+            for name, channels in buffers.items():
+                self.outputs[name].gamma = channels
+            self._save()
+
+    def watch(self):
+        """ Observador de los cambios simulados (aplicaciones y conexiones) """
+        watcher = SimWatcher(self)
+        self.watchers.append(watcher)
+        return watcher
+
+    def close(self):
+        for watcher in list(self.watchers):
+            watcher.close()
+
+    # Control de la simulación
+    def fail_next(self, op, count=1):
+        """ Forzar el fallo de las próximas count peticiones de la operación """
+        if op not in OPERATIONS:
+            raise ValueError(f"Operación desconocida: {op}")
+        with self.lock:
+            self.forced[op] = self.forced.get(op, 0) + count
+
+    def set_connected(self, name, connected=True, mode=None):
+        """ Conectar o desconectar una salida (hotplug), como al enchufar un monitor.
+
+        Al conectarla se activa su modo preferido (o mode=(ancho, alto)) a la derecha del resto.
+        """
+        with self.lock:
+            out = self.outputs.get(name)
+            if out is None:
+                out = self.outputs[name] = SimOutput(name, connected=False)
+            if mode and tuple(mode) not in [m[:2] for m in out.modes]:
+                out.modes.insert(0, (mode[0], mode[1], 60.0))
+            out.connected = connected
+            if connected:
+                if not out.modes:
+                    raise BackendError(f"La salida '{name}' no tiene modos; indica mode=(ancho, alto)")
+                out.mode = [m[:2] for m in out.modes].index(tuple(mode)) if mode else 0
+                others = [o for o in self.outputs.values() if o.active and o is not out]
+                out.x, out.y = max((o.x + o.size()[0] for o in others), default=0), 0
+            else:
+                out.mode, out.scale, out.filter, out.gamma = None, (1.0, 1.0), None, None
+                out.x = out.y = 0
+            self.screen_size = self._union(self.outputs.values())
+            self._save()
+            self._notify([name], True)
+
+
+
+
+
+'''
+>>> Eventos simulados
+'''
+class SimWatcher:
+    """ Equivalente al HotplugWatcher nativo: un descriptor legible cuando hay cambios pendientes """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.read_fd, self.write_fd = os.pipe()
+        os.set_blocking(self.read_fd, False)
+        os.set_blocking(self.write_fd, False)
+        self.pending, self.screen = set(), False
+
+    def notify(self, names, screen):
+        self.pending.update(names)
+        self.screen = self.screen or screen
+        try:
+            os.write(self.write_fd, b'!')
+        except BlockingIOError:
+            pass  # Ya hay un aviso sin leer
+
+    def fileno(self):
+        return self.read_fd
+
+    def drain(self):
+        """ Devuelve None si no hay cambios, o (salidas, tamaño de pantalla, completo) """
+        with self.backend.lock:
+            try:
+                while os.read(self.read_fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+            if not self.pending and not self.screen:
+                return None
+            outputs = {name: self.backend.outputs[name].state() for name in self.pending}
+            screen_size = self.backend.screen_size if self.screen else None
+            self.pending, self.screen = set(), False
+            return outputs, screen_size, False
+
+    def close(self):
+        if self in self.backend.watchers:
+            self.backend.watchers.remove(self)
+            os.close(self.read_fd)
+            os.close(self.write_fd)
@@ -16,7 +16,9 @@ a = Analysis(
         ('Storage/Icons/*.png', 'Storage/Icons'),
         ('_ascii.py', '.')
     ],
+    # La GUI se importa de forma diferida (solo en modo GUI); se declara para el bundle
     hiddenimports=[
+        'ui',
         'PyQt5.QtCore',
         'PyQt5.QtGui',
         'PyQt5.QtWidgets',
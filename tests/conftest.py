@@ -0,0 +1,44 @@
+# conftest.py
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import backends  # noqa: E402
+import journal  # noqa: E402
+
+
+
+
+
+'''
+>>> Entorno aislado sobre el backend simulado
+'''
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    """ Journal, socket y estado simulado en un directorio temporal; sin backends compartidos """
+    for name in list(os.environ):
+        if name.startswith(('SIMURES_SIM_', 'SIMURES_FAKE_')):
+            monkeypatch.delenv(name)
+    monkeypatch.setenv('SIMURES_JOURNAL', str(tmp_path / 'journal'))
+    monkeypatch.setenv('SIMURES_SOCKET', str(tmp_path / 'sock'))
+    monkeypatch.setenv('SIMURES_BACKEND', 'sim')
+    monkeypatch.setattr(backends, '_shared', {})
+    monkeypatch.setattr(journal, '_shared', {})
+    yield tmp_path
+
+
+@pytest.fixture
+def sim():
+    from sim_backend import SimBackend
+    return SimBackend(seed=0)
+
+
+@pytest.fixture
+def controllers(sim):
+    from colors_controller import ColorsController
+    from resolution_controller import ResolutionController
+    return ResolutionController(sim), ColorsController(sim)
@@ -0,0 +1,27 @@
+# test_backends.py
+import threading
+import time
+
+import backends
+
+
+def test_get_backend_creates_each_display_once(monkeypatch):
+    created = []
+
+    def create(name, display):
+        created.append(display)
+        time.sleep(0.05)  # Ventana en la que otro hilo pediría el mismo display
+        return object()
+
+    monkeypatch.setattr(backends, 'create_backend', create)
+    results = []
+    threads = [threading.Thread(target=lambda d=display: results.append((d, backends.get_backend('sim', d))))
+               for display in (':0', ':1') * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(created) == [':0', ':1']
+    for display in (':0', ':1'):
+        assert len({id(backend) for d, backend in results if d == display}) == 1
@@ -0,0 +1,93 @@
+# test_batch.py
+import io
+import json
+
+from batch import BatchRunner
+
+
+def run_batch(controllers, *requests):
+    out = io.StringIO()
+    code = BatchRunner(*controllers, out=out).run(io.StringIO(''.join(json.dumps(r) + '\n' for r in requests)))
+    return code, [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def scale_of(res, name):
+    out = res.backend.query().get(name)
+    return out.scale_x, out.scale_y
+
+
+def test_apply_on_distinct_outputs_is_merged(controllers):
+    res, _ = controllers
+    code, results = run_batch(controllers,
+                              {'cmd': 'apply', 'scale': 2, 'output': 'HDMI-1'},
+                              {'cmd': 'apply', 'scale': 1.5, 'output': 'DP-1'})
+    assert code == 0
+    assert [r['merged'] for r in results] == [2, 2]
+    assert scale_of(res, 'HDMI-1') == (2.0, 2.0) and scale_of(res, 'DP-1') == (1.5, 1.5)
+
+
+def test_same_output_is_not_merged(controllers):
+    res, _ = controllers
+    code, results = run_batch(controllers,
+                              {'cmd': 'apply', 'scale': 2, 'output': 'HDMI-1'},
+                              {'cmd': 'apply', 'scale': 3, 'output': 'HDMI-1'})
+    assert code == 0
+    assert all('merged' not in r for r in results)
+    assert scale_of(res, 'HDMI-1') == (3.0, 3.0)
+
+
+def test_restore_without_output_sees_preceding_apply(controllers):
+    """ Regresión: el restore sin salida se resolvía antes de ejecutar el apply anterior """
+    res, _ = controllers
+    code, results = run_batch(controllers,
+                              {'cmd': 'apply', 'scale': 2, 'output': 'HDMI-1'},
+                              {'cmd': 'restore'})
+    assert code == 0
+    assert all('merged' not in r for r in results)
+    assert results[1]['applied'] == ['HDMI-1']
+    assert scale_of(res, 'HDMI-1') == (1.0, 1.0)
+
+
+def test_apply_with_per_output_factor_needs_no_scale(controllers):
+    res, _ = controllers
+    code, results = run_batch(controllers, {'cmd': 'apply', 'output': 'HDMI-1=1.5,DP-1=2'})
+    assert code == 0, results
+    assert scale_of(res, 'HDMI-1') == (1.5, 1.5) and scale_of(res, 'DP-1') == (2.0, 2.0)
+
+
+def test_apply_without_scale_for_plain_output_fails(controllers):
+    code, results = run_batch(controllers, {'cmd': 'apply', 'output': 'HDMI-1'})
+    assert code == 1
+    assert 'Escala inválida' in results[0]['error']
+
+
+def test_capture_is_refused_on_simulated_backend(controllers):
+    code, results = run_batch(controllers, {'cmd': 'capture', 'output': 'HDMI-1'})
+    assert code == 1
+    assert 'backend simulado' in results[0]['lines'][0]
+
+
+def test_passthrough_command_closes_the_group(controllers):
+    code, results = run_batch(controllers,
+                              {'cmd': 'apply', 'scale': 2, 'output': 'HDMI-1'},
+                              {'cmd': 'list'},
+                              {'cmd': 'apply', 'scale': 2, 'output': 'DP-1'})
+    assert code == 0
+    assert all('merged' not in r for r in results)
+
+
+def test_animated_apply_is_never_merged(controllers):
+    res, _ = controllers
+    code, results = run_batch(controllers,
+                              {'cmd': 'apply', 'scale': 2, 'output': 'HDMI-1', 'animate': '50ms'},
+                              {'cmd': 'apply', 'scale': 2, 'output': 'DP-1'})
+    assert code == 0
+    assert all('merged' not in r for r in results)
+    assert scale_of(res, 'HDMI-1') == (2.0, 2.0) and scale_of(res, 'DP-1') == (2.0, 2.0)
+
+
+def test_cneg_without_mode_or_spec_fails_alone(controllers):
+    code, results = run_batch(controllers, {'cmd': 'cneg'}, {'cmd': 'list'})
+    assert code == 1
+    assert not results[0]['ok'] and 'modo negativo' in results[0]['lines'][0]
+    assert results[1]['ok']
@@ -0,0 +1,32 @@
+# test_capture.py
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('numpy')
+
+import capture  # noqa: E402
+
+
+def test_get_capture_opens_each_display_once(monkeypatch):
+    opened = []
+
+    class FakeCapture:
+        def __init__(self, display):
+            opened.append(display)
+            time.sleep(0.05)  # Ventana en la que otro hilo pediría el mismo display
+
+    monkeypatch.setattr(capture, 'ScreenCapture', FakeCapture)
+    monkeypatch.setattr(capture, '_captures', {})
+    results = []
+    threads = [threading.Thread(target=lambda d=display: results.append((d, capture.get_capture(d))))
+               for display in (':0', ':1') * 4]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(opened) == [':0', ':1']
+    for display in (':0', ':1'):
+        assert len({id(screen) for d, screen in results if d == display}) == 1
@@ -0,0 +1,65 @@
+# test_color_filters.py
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from color_filters import PRESETS, parse_filter_spec  # noqa: E402
+from gamma import build_ramp, linear_ramp, negative_ramp  # noqa: E402
+
+
+def test_classic_negative_is_inverted_identity():
+    ramp = negative_ramp(1, 256).astype(np.int64)
+    assert (ramp == linear_ramp(256)[:, ::-1]).all()
+
+
+@pytest.mark.parametrize('mode, strong, weak', [(2, 2, 0), (3, 0, 2)])
+def test_tinted_negatives_invert_and_tint(mode, strong, weak):
+    """ Frío (2) deja dominar el azul y cálido (3) el rojo, sobre la imagen invertida """
+    ramp = negative_ramp(mode, 256).astype(np.int64)
+    assert (np.diff(ramp, axis=1) <= 0).all()  # Invierte en los tres canales
+    assert ramp[strong, 0] > ramp[weak, 0]
+
+
+def test_presets_are_parsable_chains():
+    for spec in PRESETS.values():
+        assert build_ramp(parse_filter_spec(spec), 16).shape == (3, 16)
+
+
+def xcalib_ramp(steps, size):
+    """ Tabla resultante de xcalib -c seguido de los pasos: -i invierte la tabla y, con -a,
+    -<canal> gamma brillo% contraste% lleva cada valor v a brillo + (contraste - brillo) * v^(1/gamma) """
+    y = np.tile(np.linspace(0.0, 1.0, size), (3, 1))
+    for args in steps:
+        if '-i' in args:
+            y = 1.0 - y
+        for channel, flag in enumerate(('-red', '-green', '-blue')):
+            if flag in args:
+                gamma, low, high = (float(v) for v in args[args.index(flag) + 1:args.index(flag) + 4])
+                y[channel] = low / 100 + (high - low) / 100 * np.power(y[channel], 1.0 / gamma)
+    return np.rint(y * 65535.0)
+
+
+@pytest.mark.parametrize('mode', sorted(PRESETS))
+def test_xcalib_fallback_matches_presets(mode):
+    from colors_controller import XCALIB_MODES
+    ramp = build_ramp(parse_filter_spec(PRESETS[mode]), 256)
+    assert np.abs(xcalib_ramp(XCALIB_MODES[mode], 256) - ramp).max() <= 1
+
+
+def test_xcalib_fallback_runs_each_step(isolated, monkeypatch):
+    import json
+    import os
+
+    from backends import XrandrBackend
+    from colors_controller import XCALIB_MODES, ColorsController
+    from conftest import ROOT
+
+    log = isolated / 'fake.log'
+    monkeypatch.setenv('PATH', os.path.join(ROOT, 'Benchmarks', 'fakes') + os.pathsep + os.environ['PATH'])
+    monkeypatch.setenv('SIMURES_FAKE_LOG', str(log))
+    monkeypatch.setenv('SIMURES_FAKE_STATE', str(isolated / 'fake-state'))
+    colors = ColorsController(XrandrBackend())
+    assert colors.engine is None
+    assert colors.apply_negative(2) == (True, "Efecto aplicado correctamente")
+    calls = [json.loads(line)['argv'] for line in log.read_text().splitlines()]
+    assert calls == [['-c']] + XCALIB_MODES[2]
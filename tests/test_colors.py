@@ -0,0 +1,35 @@
+# test_colors.py
+import pytest
+
+
+def test_unknown_negative_mode_is_an_error(controllers):
+    _, colors = controllers
+    ok, msg = colors.apply_negative(7)
+    assert not ok and 'Modo negativo inválido: 7' in msg
+
+
+def hotplug(res, colors, watcher):
+    """ Lo que hacen la GUI y el daemon al recibir un evento de conexión """
+    if res.process_hotplug(watcher) is not None:
+        colors.outputs_changed()
+
+
+def test_color_modes_follow_hotplug(controllers, sim):
+    pytest.importorskip('numpy')
+    res, colors = controllers
+    watcher = res.watch_hotplug()
+    assert colors.apply_negative(1)[0]
+    assert colors.restore_colors()[0]
+
+    sim.set_connected('DP-2', False)
+    hotplug(res, colors, watcher)
+    ok, msg = colors.apply_negative(1)
+    assert ok, msg
+    assert 'DP-2' not in colors.engine.sizes()
+
+    sim.set_connected('DP-2', True, mode=(1920, 1080))
+    hotplug(res, colors, watcher)
+    ok, msg = colors.apply_negative(2)
+    assert ok, msg
+    assert 'DP-2' in colors.engine.sizes()  # La salida reconectada también recibe su rampa
+    watcher.close()
@@ -0,0 +1,114 @@
+# test_commands.py
+import pytest
+
+from commands import parse_output_spec, parse_resolution, run_start
+from layout import scale_for_target
+from sim_backend import SimBackend, parse_outputs
+
+
+def scale_of(sim, name):
+    out = sim.query().get(name)
+    return out.scale_x, out.scale_y
+
+
+@pytest.mark.parametrize('spec, expected', [
+    (None, {'HDMI-1': 2.0}),  # La principal
+    ('all', {'HDMI-1': 2.0, 'DP-1': 2.0, 'DP-2': 2.0}),
+    ('DP-1', {'DP-1': 2.0}),
+    (' DP-1 , DP-2', {'DP-1': 2.0, 'DP-2': 2.0}),
+    ('HDMI-1=1.5,DP-2', {'HDMI-1': 1.5, 'DP-2': 2.0}),
+])
+def test_output_spec_selects_by_name(sim, spec, expected):
+    assert parse_output_spec(spec, sim.query(), 2.0) == expected
+
+
+@pytest.mark.parametrize('spec, error', [
+    ('HDMI-2', "La pantalla 'HDMI-2' no existe"),
+    ('VIRTUAL-1', "La pantalla 'VIRTUAL-1' no existe"),  # Desconectada
+    ('DP-*', "La pantalla 'DP-*' no existe"),  # Sin comodines: solo nombres exactos
+    ('hdmi-1', "La pantalla 'hdmi-1' no existe"),
+    ('DP-1=x', "Factor de escala inválido para 'DP-1': x"),
+])
+def test_output_spec_rejects_unknown_names(sim, spec, error):
+    with pytest.raises(ValueError, match=error.replace('*', r'\*')):
+        parse_output_spec(spec, sim.query(), 2.0)
+
+
+def test_start_on_unknown_output_lists_available(controllers):
+    res, _ = controllers
+    code, lines = run_start(res, 2.0, 'HDMI-2')
+    assert code == 1
+    assert lines == ["[ERROR] La pantalla 'HDMI-2' no existe", "Pantallas disponibles: HDMI-1, DP-1, DP-2"]
+    assert res.backend.counters['apply'] == 0
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('3840x2160', (3840, 2160)),
+    (' 2560 X 1440 ', (2560, 1440)),
+])
+def test_parse_resolution(text, expected):
+    assert parse_resolution(text) == expected
+
+
+@pytest.mark.parametrize('text', ['3840', '3840x', 'x2160', '0x2160', '-1x2160', '3840x2160x1', '4k'])
+def test_parse_resolution_rejects_invalid(text):
+    with pytest.raises(ValueError, match="Resolución inválida"):
+        parse_resolution(text)
+
+
+@pytest.mark.parametrize('outputs, target, expected', [
+    ('A:1920x1080', (3840, 2160), (2.0, 2.0)),
+    ('A:2560x1440', (3840, 2160), (1.5, 1.5)),
+    ('A:1920x1080', (3840, 1080), (2.0, 1.0)),
+    # Rotada, el objetivo se interpreta en coordenadas de pantalla
+    ('A:1920x1080:left', (2160, 3840), (2.0, 2.0)),
+])
+def test_scale_for_target(outputs, target, expected):
+    out = SimBackend(outputs=parse_outputs(outputs), seed=0).query().get('A')
+    assert scale_for_target(out, *target) == expected
+
+
+def test_start_with_target_scales_each_output_to_it(controllers):
+    res, _ = controllers
+    code, lines = run_start(res, None, 'HDMI-1,DP-1', target=(3840, 2160))
+    assert code == 0, lines
+    assert lines == ["[OK] Resolución 3840x2160 (2x2) aplicada en HDMI-1",
+                     "[OK] Resolución 3840x2160 (1.5x1.5) aplicada en DP-1"]
+    assert scale_of(res.backend, 'HDMI-1') == (2.0, 2.0)
+    assert scale_of(res.backend, 'DP-1') == (1.5, 1.5)
+    geometry = res.backend.query().get('DP-1')
+    assert (geometry.width, geometry.height) == (3840, 2160)
+
+
+def test_target_below_mode_is_rejected(controllers):
+    res, _ = controllers
+    code, lines = run_start(res, None, 'DP-1', target=(1920, 1080))
+    assert code == 1
+    assert lines == ["[ERROR] La resolución objetivo debe estar entre 1x y 20x el modo de cada pantalla"]
+    assert res.backend.counters['apply'] == 0
+
+
+@pytest.mark.parametrize('filter', ['nearest', 'bilinear'])
+def test_start_applies_filter(controllers, filter):
+    res, _ = controllers
+    code, lines = run_start(res, 2.0, 'DP-2', filter=filter)
+    assert code == 0
+    assert lines == [f"[OK] Escala 2.0x ({filter}) aplicada en DP-2"]
+    assert res.backend.query().get('DP-2').filter == filter
+
+
+def test_changing_only_the_filter_reapplies(controllers):
+    res, _ = controllers
+    run_start(res, 2.0, 'DP-2', filter='nearest')
+    code, lines = run_start(res, 2.0, 'DP-2', filter='bilinear')
+    assert code == 0
+    assert lines == ["[OK] Escala 2.0x (bilinear) aplicada en DP-2"]
+    assert res.backend.counters['apply'] == 2
+
+
+def test_invalid_filter_is_rejected(controllers):
+    res, _ = controllers
+    code, lines = run_start(res, 2.0, 'DP-2', filter='cubic')
+    assert code == 1
+    assert lines == ["[ERROR] Filtro de escalado inválido: cubic (opciones: nearest, bilinear)"]
+    assert res.backend.counters['apply'] == 0
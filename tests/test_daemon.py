@@ -0,0 +1,100 @@
+# test_daemon.py
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from daemon import DaemonClient, SimuresDaemon, socket_path
+
+
+@pytest.fixture
+def daemon(controllers):
+    server = SimuresDaemon(*controllers, socket_path(None, 'sim'))
+    thread = threading.Thread(target=server.serve, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    thread.join(5)
+
+
+def send(server, request):
+    client = DaemonClient.connect(server.path)
+    try:
+        return client.request(request)
+    finally:
+        client.close()
+
+
+def animate_in_background(server, output, duration=0.8):
+    """ Lanzar una transición animada y esperar a que esté en curso """
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(response=send(server, {
+        'cmd': 'start', 'factor': 2.0, 'output': output, 'animate': duration})))
+    thread.start()
+    deadline = time.monotonic() + 5
+    while server.running == set() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return thread, result
+
+
+def test_list_does_not_interrupt_transition(daemon):
+    thread, result = animate_in_background(daemon, 'HDMI-1')
+    assert send(daemon, {'cmd': 'list'})[0] == 0
+    assert send(daemon, {'cmd': 'plan', 'factor': 1.5, 'output': 'HDMI-1'})[0] == 0
+    thread.join(5)
+    code, lines = result['response']
+    assert code == 0, lines
+    assert daemon.res_controller.backend.query().get('HDMI-1').scale_x == 2.0
+
+
+def test_other_output_does_not_interrupt_transition(daemon):
+    thread, result = animate_in_background(daemon, 'HDMI-1')
+    assert send(daemon, {'cmd': 'start', 'factor': 1.5, 'output': 'DP-1'})[0] == 0
+    thread.join(5)
+    assert result['response'][0] == 0
+
+
+def test_overlapping_start_interrupts_transition(daemon):
+    thread, result = animate_in_background(daemon, 'HDMI-1', duration=5)
+    started = time.monotonic()
+    assert send(daemon, {'cmd': 'start', 'factor': 3.0, 'output': 'HDMI-1,DP-1'})[0] == 0
+    thread.join(5)
+    code, lines = result['response']
+    assert code != 0 and 'interrumpida' in lines[0]
+    assert time.monotonic() - started < 4
+    assert daemon.res_controller.backend.query().get('HDMI-1').scale_x == 3.0
+
+
+def test_stop_interrupts_transition(daemon):
+    thread, result = animate_in_background(daemon, 'HDMI-1', duration=5)
+    assert send(daemon, {'cmd': 'stop'})[0] == 0
+    thread.join(5)
+    assert result['response'][0] != 0
+    assert daemon.res_controller.backend.query().get('HDMI-1').scale_x == 1.0
+
+
+def test_daemon_picks_up_hotplug_before_color_requests(daemon):
+    pytest.importorskip('numpy')
+    sim = daemon.res_controller.backend
+    assert send(daemon, {'cmd': 'cneg', 'mode': 1})[0] == 0
+    sim.set_connected('DP-2', False)
+    code, lines = send(daemon, {'cmd': 'cneg', 'mode': 2})
+    assert code == 0, lines
+    sim.set_connected('DP-2', True, mode=(1920, 1080))
+    code, lines = send(daemon, {'cmd': 'cneg', 'mode': 3})
+    assert code == 0, lines
+    assert 'DP-2' in daemon.color_controller.engine.sizes()
+
+
+def test_socket_is_private(daemon):
+    assert stat.S_IMODE(os.stat(daemon.path).st_mode) == 0o600
+
+
+def test_refuses_socket_directory_open_to_others(controllers, isolated):
+    directory = isolated / 'shared'
+    directory.mkdir()
+    directory.chmod(0o777)
+    with pytest.raises(OSError):
+        SimuresDaemon(*controllers, str(directory / 'simures.sock'))
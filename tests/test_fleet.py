@@ -0,0 +1,105 @@
+# test_fleet.py
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import fleet
+from conftest import ROOT
+from fleet import Host, LocalTransport, fleet_report, load_inventory, run_fleet
+
+
+class SimHostsTransport(LocalTransport):
+    """ LocalTransport con variables propias por máquina (otras salidas simuladas, latencia...) """
+    def __init__(self, envs=None):
+        super().__init__()
+        self.envs = envs or {}
+
+    def env(self, host):
+        return {**super().env(host), **self.envs.get(host.name, {})}
+
+
+def run(hosts, requests, transport, timeout=30.0, parallel=4):
+    results = asyncio.run(run_fleet(hosts, requests, transport, parallel, timeout))
+    return {result.host: result for result in results}
+
+
+APPLY = [{'cmd': 'apply', 'scale': 2, 'output': 'HDMI-1'}, {'cmd': 'list'}]
+
+
+def test_all_hosts_succeed():
+    hosts = [Host(f'sim-{index}', display=f':{index}') for index in range(3)]
+    results = run(hosts, APPLY, SimHostsTransport())
+    assert all(result.ok and result.code == 0 for result in results.values())
+    listed = results['sim-0'].results[1]['outputs']
+    assert [out['scale'] for out in listed if out['name'] == 'HDMI-1'] == [[2.0, 2.0]]
+    report = fleet_report(list(results.values()), 1.0)
+    assert report['ok'] and report['succeeded'] == 3 and report['failed'] == []
+
+
+def test_one_failing_host_fails_the_fleet():
+    # sim-b no tiene HDMI-1: su apply falla y el resto sigue
+    transport = SimHostsTransport({'sim-b': {'SIMURES_SIM_OUTPUTS': 'DP-1:2560x1440'}})
+    results = run([Host('sim-a'), Host('sim-b'), Host('sim-c')], APPLY, transport)
+    assert results['sim-a'].ok and results['sim-c'].ok
+    failed = results['sim-b']
+    assert not failed.ok and failed.code == 1
+    assert failed.error.startswith('apply:') and 'HDMI-1' in failed.error
+    report = fleet_report(list(results.values()), 1.0)
+    assert not report['ok'] and report['failed'] == ['sim-b'] and report['succeeded'] == 2
+
+
+def test_unresponsive_host_times_out():
+    transport = SimHostsTransport({'slow': {'SIMURES_SIM_LATENCY_MS': '60000'}})
+    results = run([Host('fast'), Host('slow')], APPLY, transport, timeout=5.0)
+    assert results['fast'].ok
+    slow = results['slow']
+    assert not slow.ok and slow.code is None and slow.error == 'Sin respuesta en 5 s'
+    assert slow.duration_ms < 10000
+
+
+def test_missing_transport_binary_is_reported():
+    transport = LocalTransport(command=['/nonexistent/simures'])
+    result = run([Host('sim-a')], APPLY, transport)['sim-a']
+    assert not result.ok and result.error.startswith('No se pudo iniciar el transporte local')
+
+
+@pytest.mark.parametrize('outputs, exit_code', [(None, 0), ('DP-1:2560x1440', 1)])
+def test_cli_exit_status_aggregates_hosts(isolated, monkeypatch, outputs, exit_code):
+    """ Código 0 solo si todas las máquinas terminan bien (sin HDMI-1, todas fallan) """
+    if outputs:
+        monkeypatch.setenv('SIMURES_SIM_OUTPUTS', outputs)
+    path = isolated / 'inventory.txt'
+    path.write_text('sim-a display=:1\nsim-b display=:2\n')
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), '--fleet', str(path),
+                             '--fleet-transport', 'local', '--start', '2', '--output', 'HDMI-1'],
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == exit_code, result.stderr
+    report = json.loads(result.stdout)
+    assert report['hosts'] == 2 and report['ok'] == (exit_code == 0)
+    assert report['succeeded'] == (2 if exit_code == 0 else 0)
+
+
+def test_inventory_formats(isolated):
+    text = isolated / 'hosts.txt'
+    text.write_text('# Laboratorio\nlab-1 address=ana@10.0.0.1 port=2222\nlab-2 display=:1  # segundo\n')
+    hosts = load_inventory(str(text))
+    assert [(h.name, h.address, h.port, h.display) for h in hosts] == [
+        ('lab-1', 'ana@10.0.0.1', 2222, None), ('lab-2', 'lab-2', None, ':1')]
+
+    data = isolated / 'hosts.json'
+    data.write_text(json.dumps({'defaults': {'command': 'python3 main.py'}, 'hosts': ['a', {'name': 'b'}]}))
+    assert [h.command for h in load_inventory(str(data))] == ['python3 main.py'] * 2
+
+    text.write_text('a\na\n')
+    with pytest.raises(ValueError, match='dos veces'):
+        load_inventory(str(text))
+
+
+def test_ssh_command_runs_batch_remotely():
+    command = fleet.SSHTransport().command(Host('lab', address='ana@lab', display=':1', port=2222))
+    assert command[-2:] == ['ana@lab', 'simures --batch - --display :1']
+    assert command[command.index('-p') + 1] == '2222'
@@ -0,0 +1,85 @@
+# test_journal.py
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import ROOT
+from journal import journal_path
+from sim_backend import SimBackend
+
+# Un proceso tipo GUI que aplica una escala y muere sin restaurar (como con SIGKILL)
+CRASHING_GUI = """
+import os, sys
+sys.path.insert(0, sys.argv[1])
+import journal
+from backends import get_backend
+from resolution_controller import ResolutionController
+journal.set_session('gui')
+assert ResolutionController(get_backend('sim')).apply_scale('DP-1', 2.0)
+os._exit(0)
+"""
+
+
+@pytest.fixture
+def sim_state(isolated, monkeypatch):
+    """ Estado simulado en fichero: sobrevive entre procesos, y el journal también """
+    monkeypatch.setenv('SIMURES_SIM_STATE', str(isolated / 'sim-state'))
+    return journal_path(None, 'sim')
+
+
+def cli(*args):
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'main.py'), '--backend', 'sim', *args],
+                            capture_output=True, text=True, timeout=60)
+    return result.returncode, result.stdout
+
+
+def read(path):
+    with open(path) as f:
+        return json.load(f)['outputs']
+
+
+def test_cli_records_then_stop_restores_in_another_process(sim_state):
+    code, stdout = cli('--start', '2', '--output', 'HDMI-1')
+    assert code == 0, stdout
+    entry = read(sim_state)['HDMI-1']
+    assert entry['scale'] == [1.0, 1.0] and entry['session'] == 'cli'
+
+    code, stdout = cli('--stop')
+    assert code == 0, stdout
+    assert not os.path.exists(sim_state)
+    assert SimBackend().query().get('HDMI-1').scale_x == 1.0
+
+
+def test_first_recorded_state_wins(sim_state):
+    assert cli('--start', '2', '--output', 'HDMI-1')[0] == 0
+    assert cli('--start', '3', '--output', 'HDMI-1')[0] == 0
+    assert read(sim_state)['HDMI-1']['scale'] == [1.0, 1.0]
+    assert SimBackend().query().get('HDMI-1').scale_x == 3.0
+
+
+def test_stale_gui_session_is_recovered_by_next_process(sim_state):
+    subprocess.run([sys.executable, '-c', CRASHING_GUI, ROOT], check=True, timeout=60)
+    entry = read(sim_state)['DP-1']
+    assert entry['session'] == 'gui' and entry['scale'] == [1.0, 1.0]
+
+    # Cualquier invocación de la CLI corrige primero lo que dejó la GUI muerta
+    code, stdout = cli('--list-outputs')
+    assert code == 0, stdout
+    assert not os.path.exists(sim_state)
+    assert SimBackend().query().get('DP-1').scale_x == 1.0
+
+
+def test_journal_is_not_written_to_a_shared_directory(isolated, capsys):
+    from journal import Journal
+    from topology import OutputState
+
+    directory = isolated / 'shared'
+    directory.mkdir()
+    directory.chmod(0o777)
+    journal = Journal(str(directory / 'simures.journal'))
+    journal.record_outputs([OutputState('HDMI-1', True)])
+    assert not os.path.exists(journal.path)
+    assert 'no es privado' in capsys.readouterr().out
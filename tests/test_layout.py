@@ -0,0 +1,59 @@
+# test_layout.py
+from backends import OutputChange
+from layout import arrange, compute_layout
+from topology import parse_xrandr_query
+
+MODES = """\
+   1920x1080     60.00*+
+   2560x1440     60.00 +
+"""
+
+
+def query(*outputs, screen='6400 x 1440'):
+    """ Salida de `xrandr --query` con las salidas (nombre, geometría) indicadas, todas a 1920x1080 """
+    lines = [f"Screen 0: minimum 320 x 200, current {screen}, maximum 8192 x 8192"]
+    for index, (name, geometry) in enumerate(outputs):
+        primary = ' primary' if index == 0 else ''
+        lines.append(f"{name} connected{primary} {geometry} (normal left inverted right x axis y axis)")
+        lines.append(MODES.rstrip('\n'))
+    return parse_xrandr_query('\n'.join(lines) + '\n')
+
+
+def positions(changes):
+    return {change.name: (change.x, change.y) for change in changes}
+
+
+def test_side_by_side_neighbours_shift_right():
+    topology = query(('A', '1920x1080+0+0'), ('B', '1920x1080+1920+0'), ('C', '1920x1080+3840+0'))
+    changes, layout = arrange(topology, [OutputChange('A', 2.0)])
+    assert positions(changes) == {'A': (0, 0), 'B': (3840, 0), 'C': (5760, 0)}
+    # Las vecinas solo se mueven, conservando su escala
+    assert [(c.scale_x, c.filter) for c in changes[1:]] == [(1.0, None), (1.0, None)]
+    assert layout.screen_size == (7680, 2160)
+
+
+def test_shrinking_pulls_right_neighbour_back():
+    topology = query(('A', '3840x2160+0+0'), ('B', '1920x1080+3840+0'))
+    changes, _ = arrange(topology, [OutputChange('A', 1.0)])
+    assert positions(changes) == {'A': (0, 0), 'B': (1920, 0)}
+
+
+def test_stacked_neighbour_moves_down_only():
+    topology = query(('A', '1920x1080+0+0'), ('B', '1920x1080+0+1080'), screen='1920 x 2160')
+    changes, layout = arrange(topology, [OutputChange('A', 1.5)])
+    assert positions(changes) == {'A': (0, 0), 'B': (0, 1620)}
+    assert layout.geometry['A'] == (0, 0, 2880, 1620)
+    assert layout.screen_size == (2880, 2700)
+
+
+def test_output_to_the_left_keeps_its_place():
+    topology = query(('A', '1920x1080+1920+0'), ('B', '1920x1080+0+0'))
+    changes, _ = arrange(topology, [OutputChange('A', 2.0)])
+    # B está antes en el eje: no se mueve y no genera cambio
+    assert positions(changes) == {'A': (1920, 0)}
+
+
+def test_layout_reports_framebuffer_limit():
+    topology = query(('A', '1920x1080+0+0'), ('B', '1920x1080+1920+0'))
+    assert compute_layout(topology, {'A': (2.0, 2.0)}).fits
+    assert not compute_layout(topology, {'A': (4.0, 4.0)}).fits  # 7680 + 1920 > 8192
@@ -0,0 +1,30 @@
+# test_native_backend.py
+import types
+
+import pytest
+
+from backends import BackendError
+from native_backend import XID, NativeBackend
+
+
+def backend_with_status(status):
+    """ NativeBackend sin servidor X: las llamadas de Xlib/XRandR se sustituyen por funciones locales """
+    backend = NativeBackend.__new__(NativeBackend)
+    backend.dpy = object()
+    backend.x11 = types.SimpleNamespace(XSync=lambda dpy, discard: None)
+    backend.xrandr = types.SimpleNamespace(XRRSetCrtcTransform=lambda *args: None,
+                                           XRRSetCrtcConfig=lambda *args: status)
+    return backend
+
+
+CRTC = {'x': 0, 'y': 0, 'mode': 1, 'rotation': 1, 'outputs': (XID * 1)(1), 'noutput': 1}
+
+
+def test_set_crtc_accepts_success_status():
+    backend_with_status(0)._set_crtc(None, 7, CRTC, 2.0, 2.0, None)
+
+
+@pytest.mark.parametrize('status, reason', [(2, 'InvalidTime'), (3, 'Failed')])
+def test_set_crtc_rejected_status_raises(status, reason):
+    with pytest.raises(BackendError, match=f"RRSetConfig{reason}"):
+        backend_with_status(status)._set_crtc(None, 7, CRTC, 2.0, 2.0, None)
@@ -0,0 +1,124 @@
+# test_planner.py
+import pytest
+
+from commands import run_plan, run_start
+from planner import BYTES_PER_PIXEL, MAX_SCALE, max_scale, plan_scales
+from resolution_controller import ResolutionController
+from sim_backend import SimBackend, parse_outputs
+
+# Un monitor 1080p a 60 Hz a la izquierda de un 4K a 30 Hz, con un servidor limitado a 8192x8192
+OUTPUTS = 'A:1920x1080,B:3840x2160@30'
+MAX_SIZE = (8192, 8192)
+
+
+def backend(outputs=OUTPUTS, max_size=MAX_SIZE):
+    return SimBackend(outputs=parse_outputs(outputs), max_size=max_size, seed=0)
+
+
+def costs(plan):
+    return {out.name: (out.geometry, out.frame_bytes, out.samples, out.bandwidth) for out in plan.outputs}
+
+
+@pytest.mark.parametrize('scales, screen, expected', [
+    # Sin escalado no hay coste de transform, aunque el framebuffer se lea igual
+    ({}, (5760, 2160), {
+        'A': ((0, 0, 1920, 1080), 1920 * 1080 * 4, 0, 0.0),
+        'B': ((1920, 0, 3840, 2160), 3840 * 2160 * 4, 0, 0.0),
+    }),
+    # A 2x: la vecina se desplaza y el muestreo bilineal cuesta 4 taps por píxel del monitor
+    ({'A': 2.0}, (7680, 2160), {
+        'A': ((0, 0, 3840, 2160), 3840 * 2160 * 4, 1920 * 1080 * 4, 3840 * 2160 * 4 * 60.0),
+        'B': ((3840, 0, 3840, 2160), 3840 * 2160 * 4, 0, 0.0),
+    }),
+    # Escala no uniforme; el ancho de banda usa el refresco de cada salida (30 Hz en B)
+    ({'A': (1.5, 2.0), 'B': 1.5}, (8640, 3240), {
+        'A': ((0, 0, 2880, 2160), 2880 * 2160 * 4, 1920 * 1080 * 4, 2880 * 2160 * 4 * 60.0),
+        'B': ((2880, 0, 5760, 3240), 5760 * 3240 * 4, 3840 * 2160 * 4, 5760 * 3240 * 4 * 30.0),
+    }),
+])
+def test_plan_costs(scales, screen, expected):
+    plan = plan_scales(backend(max_size=(16384, 16384)).query(), scales)
+    assert plan.ok
+    assert plan.screen_size == screen
+    assert plan.framebuffer_bytes == screen[0] * screen[1] * BYTES_PER_PIXEL
+    assert costs(plan) == expected
+
+
+def test_nearest_filter_samples_once_per_pixel():
+    sim = backend()
+    assert ResolutionController(sim).apply_scales({'A': 2.0}, filter='nearest')
+    # Las salidas no indicadas conservan su escala y su filtro
+    out, = [out for out in plan_scales(sim.query(), {}).outputs if out.name == 'A']
+    assert out.filter == 'nearest'
+    assert out.samples == 1920 * 1080
+
+
+@pytest.mark.parametrize('scales, problem', [
+    ({'B': 2.0}, "El framebuffer 9600x4320 excede el máximo del servidor 8192x8192"),
+    ({'A': 5.0}, "El framebuffer 13440x5400 excede el máximo del servidor 8192x8192"),
+    ({'A': 0.5}, "Escala de A fuera de rango (1 a 20)"),
+    ({'A': 21.0}, "Escala de A fuera de rango (1 a 20)"),
+    ({'C': 2.0}, "La pantalla 'C' no está conectada"),
+])
+def test_plan_problems(scales, problem):
+    plan = plan_scales(backend().query(), scales)
+    assert not plan.ok
+    assert plan.problems == [problem]
+
+
+@pytest.mark.parametrize('outputs, max_size, output, expected', [
+    # 1920*s + 3840 <= 8192
+    (OUTPUTS, MAX_SIZE, 'A', 2.2),
+    # 1920 + 3840*s <= 8192
+    (OUTPUTS, MAX_SIZE, 'B', 1.6),
+    # Una sola salida: limita la dimensión mayor (3840*s <= 8192)
+    ('B:3840x2160', MAX_SIZE, 'B', 2.1),
+    # Rotada, el lado corto del modo pasa a ser el ancho (2160*s <= 4096)
+    ('B:3840x2160:left', (4096, 8192), 'B', 1.8),
+    # Si cabe a la escala máxima, no hay más límite que MAX_SCALE (640*20 <= 16384)
+    ('A:640x480', (16384, 16384), 'A', MAX_SCALE),
+])
+def test_max_scale(outputs, max_size, output, expected):
+    topology = backend(outputs, max_size).query()
+    assert max_scale(topology, output) == expected
+    assert plan_scales(topology, {output: expected}).ok
+    if expected < MAX_SCALE:
+        assert not plan_scales(topology, {output: round(expected + 0.1, 6)}).ok
+
+
+def test_max_scale_reads_server_limit_from_environment(monkeypatch):
+    monkeypatch.setenv('SIMURES_SIM_OUTPUTS', OUTPUTS)
+    monkeypatch.setenv('SIMURES_SIM_MAX', '6000x6000')
+    # 1920*s + 3840 <= 6000
+    assert max_scale(SimBackend(seed=0).query(), 'A') == 1.1
+
+
+def test_guard_refuses_over_budget_plan():
+    sim = backend()
+    code, lines = run_start(ResolutionController(sim), 2.0, 'B')
+    assert code == 1
+    assert lines == ["[ERROR] El framebuffer 9600x4320 excede el máximo del servidor 8192x8192"]
+    # No se envía nada al servidor
+    assert sim.counters['apply'] == 0
+    assert sim.query().get('B').scale_x == 1.0
+
+
+def test_guard_lets_plan_within_budget_through():
+    sim = backend()
+    code, lines = run_start(ResolutionController(sim), 1.6, 'B')
+    assert code == 0, lines
+    assert sim.counters['apply'] == 1
+
+
+@pytest.mark.parametrize('spec, code', [
+    ('A=2.2', 0),
+    ('A=2.3', 1),
+    ('A=2,B=1.5', 1),
+])
+def test_run_plan_exit_status(spec, code):
+    sim = backend()
+    result, lines = run_plan(ResolutionController(sim), output_spec=spec)
+    assert result == code
+    assert lines[0].startswith("Framebuffer: ") and "(máximo 8192x8192)" in lines[0]
+    assert any(line.startswith("[ERROR] El framebuffer") for line in lines) == bool(code)
+    assert sim.counters['apply'] == 0
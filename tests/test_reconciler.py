@@ -0,0 +1,60 @@
+# test_reconciler.py
+import pytest
+
+from reconciler import DesiredState, OutputTarget, Reconciler
+
+
+@pytest.fixture
+def reconciler(controllers):
+    return Reconciler(*controllers)
+
+
+def test_only_differing_outputs_are_planned(reconciler):
+    plan = reconciler.plan(DesiredState({'HDMI-1': OutputTarget(1.0), 'DP-1': OutputTarget(1.5, 1.25)}))
+    assert plan.unchanged == ['HDMI-1']
+    assert [(c.name, c.scale_x, c.scale_y) for c in plan.changes] == [('DP-1', 1.5, 1.25)]
+    assert plan.color_mode is None and not plan.missing
+
+
+def test_applied_state_plans_nothing(reconciler):
+    desired = DesiredState({'DP-1': OutputTarget(2.0, filter='nearest')})
+    assert reconciler.reconcile(desired)
+    plan = reconciler.plan(desired)
+    assert plan.empty and plan.unchanged == ['DP-1']
+    # Misma escala con otro filtro sí es un cambio; sin filtro el filtro no importa
+    assert len(reconciler.plan(DesiredState({'DP-1': OutputTarget(2.0, filter='bilinear')})).changes) == 1
+    assert reconciler.plan(DesiredState({'DP-1': OutputTarget(2.0)})).empty
+
+
+def test_original_target_comes_from_journal(reconciler, sim):
+    assert reconciler.reconcile(DesiredState({'HDMI-1': OutputTarget(2.0)}))
+    plan = reconciler.plan(DesiredState({'HDMI-1': OutputTarget()}))
+    assert [(c.name, c.scale_x) for c in plan.changes] == [('HDMI-1', 1.0)]
+    assert reconciler.execute(plan)
+    assert sim.query().get('HDMI-1').scale_x == 1.0
+
+
+def test_missing_and_disconnected_outputs(reconciler):
+    plan = reconciler.plan(DesiredState({'VIRTUAL-1': OutputTarget(2.0), 'NOPE': OutputTarget(2.0)}))
+    assert plan.missing == ['VIRTUAL-1', 'NOPE']
+    assert plan.empty
+    assert not reconciler.execute(plan)  # Lo que no existe cuenta como fallo
+
+
+def test_color_is_planned_only_when_it_differs(reconciler):
+    pytest.importorskip('numpy')
+    assert reconciler.plan(DesiredState(color_mode=0)).color_mode is None
+    assert reconciler.reconcile(DesiredState(color_mode=1))
+    assert reconciler.plan(DesiredState(color_mode='clasico')).color_mode is None
+    assert reconciler.plan(DesiredState(color_mode=0)).color_mode == 0
+
+
+def test_desired_state_from_profile():
+    state = DesiredState.from_dict({'outputs': {'A': 1.5, 'B': [2, 1.5], 'C': 'original',
+                                                'D': {'scale': 2, 'filter': 'nearest'}}, 'color': 'frio'})
+    assert state.outputs['A'] == OutputTarget(1.5, 1.5)
+    assert state.outputs['B'] == OutputTarget(2.0, 1.5)
+    assert state.outputs['C'].scale_x is None
+    assert state.outputs['D'] == OutputTarget(2.0, 2.0, 'nearest')
+    with pytest.raises(ValueError):
+        DesiredState.from_dict({'outputs': {'A': 'x'}})
@@ -0,0 +1,43 @@
+# test_runtime.py
+import os
+import stat
+
+import pytest
+
+from runtime import ensure_private_dir
+
+
+def mode_of(path):
+    return stat.S_IMODE(os.lstat(path).st_mode)
+
+
+def test_creates_missing_directory_private(tmp_path):
+    directory = str(tmp_path / 'run' / 'simures')
+    assert ensure_private_dir(directory) == directory
+    assert mode_of(directory) == 0o700
+
+
+def test_rejects_directory_open_to_others(tmp_path):
+    directory = tmp_path / 'shared'
+    directory.mkdir()
+    directory.chmod(0o755)
+    with pytest.raises(OSError, match='no es privado'):
+        ensure_private_dir(str(directory))
+
+
+def test_rejects_symlink(tmp_path):
+    target = tmp_path / 'target'
+    target.mkdir(mode=0o700)
+    link = tmp_path / 'link'
+    link.symlink_to(target)
+    with pytest.raises(OSError, match='no es un directorio'):
+        ensure_private_dir(str(link))
+
+
+@pytest.mark.skipif(os.getuid() != 0, reason='cambiar el propietario requiere root')
+def test_rejects_directory_of_another_user(tmp_path):
+    directory = tmp_path / 'other'
+    directory.mkdir(mode=0o700)
+    os.chown(directory, 65534, 65534)
+    with pytest.raises(OSError, match='no es privado'):
+        ensure_private_dir(str(directory))
@@ -0,0 +1,56 @@
+# test_topology.py
+from topology import parse_xrandr_query
+
+# `xrandr --query` de un portátil con un monitor externo girado y escalado a 1.5x
+RECORDED = """\
+Screen 0: minimum 320 x 200, current 4800 x 2560, maximum 16384 x 16384
+eDP-1 connected primary 2880x1800+0+0 (normal left inverted right x axis y axis) 302mm x 189mm
+   1920x1200     60.00*+  59.88    48.00
+   1920x1080     60.01    59.97    59.96    59.93
+   1280x800      60.00    59.81
+HDMI-1 connected 1440x2560+2880+0 left (normal left inverted right x axis y axis) 597mm x 336mm
+   2560x1440     59.95*+
+   1920x1080     60.00    50.00    59.94
+   1920x1080i    60.00    50.00    59.94
+DP-1 disconnected (normal left inverted right x axis y axis)
+DP-2 connected (normal left inverted right x axis y axis)
+   1920x1080     60.00 +
+"""
+
+
+def test_screen_limits():
+    topology = parse_xrandr_query(RECORDED)
+    assert (topology.screen_width, topology.screen_height) == (4800, 2560)
+    assert (topology.min_width, topology.min_height) == (320, 200)
+    assert (topology.max_width, topology.max_height) == (16384, 16384)
+
+
+def test_outputs_and_geometry():
+    topology = parse_xrandr_query(RECORDED)
+    assert list(topology.outputs) == ['eDP-1', 'HDMI-1', 'DP-1', 'DP-2']
+    assert topology.connected_names() == ['eDP-1', 'HDMI-1', 'DP-2']
+    assert topology.default_output() == 'eDP-1'
+
+    edp = topology.get('eDP-1')
+    assert edp.primary and edp.active
+    assert (edp.x, edp.y, edp.width, edp.height) == (0, 0, 2880, 1800)
+    assert edp.current_mode.name == '1920x1200' and edp.current_mode.preferred
+    assert (edp.scale_x, edp.scale_y) == (1.5, 1.5)
+
+
+def test_rotated_output_scale_uses_swapped_mode():
+    hdmi = parse_xrandr_query(RECORDED).get('HDMI-1')
+    assert hdmi.rotation == 'left'
+    assert (hdmi.x, hdmi.y) == (2880, 0)
+    assert (hdmi.scale_x, hdmi.scale_y) == (1.0, 1.0)
+    assert not hdmi.is_scaled
+    assert [mode.name for mode in hdmi.modes] == ['2560x1440', '1920x1080', '1920x1080i']
+    assert hdmi.modes[2].interlaced and hdmi.modes[1].rates == [60.0, 50.0, 59.94]
+
+
+def test_connected_without_crtc_is_inactive():
+    topology = parse_xrandr_query(RECORDED)
+    assert not topology.get('DP-1').connected
+    dp2 = topology.get('DP-2')
+    assert dp2.connected and not dp2.active and dp2.current_mode is None
+    assert dp2.modes[0].preferred and not dp2.modes[0].current
@@ -0,0 +1,28 @@
+# test_ui.py
+import os
+
+import pytest
+
+pytest.importorskip('PyQt5')
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+
+@pytest.fixture(scope='module')
+def app():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
+
+
+def test_monitor_combo_starts_on_primary(app, sim, isolated, monkeypatch):
+    from ui import MainWindow
+
+    monkeypatch.setenv('SIMURES_ICON_CACHE', str(isolated / 'icons'))
+    sim.outputs['HDMI-1'].primary = False
+    sim.outputs['DP-1'].primary = True
+    window = MainWindow(sim)
+    try:
+        assert window.output == 'DP-1'
+        assert window.res_tab.monitor_combo.currentText() == 'DP-1'
+        assert sim.counters['apply'] == 0  # Seleccionar la principal no dispara un restore
+    finally:
+        window.close()
@@ -0,0 +1,214 @@
+# topology.py
+import os
+import re
+import time
+import threading
+from dataclasses import dataclass, field
+
+
+
+
+
+'''
+>>> Modelo de topología
+'''
+DEFAULT_TTL = float(os.environ.get('SIMURES_TOPOLOGY_TTL', '2.0'))
+
+_SCREEN_RE = re.compile(
+    r'^Screen (\d+): minimum (\d+) x (\d+), current (\d+) x (\d+), maximum (\d+) x (\d+)'
+)
+_OUTPUT_RE = re.compile(
+    r'^(\S+) (connected|disconnected|unknown connection)'
+    r'(?: (primary))?'
+    r'(?: (\d+)x(\d+)\+(-?\d+)\+(-?\d+))?'
+    r'(?: (normal|left|inverted|right))?'
+)
+_MODE_RE = re.compile(r'^\s+(\d+)x(\d+)(i?)\s+(.*)$')
+_RATE_RE = re.compile(r'(\d+(?:\.\d+)?)([ *]?)([ +]?)')
+
+
+@dataclass
+class Mode:
+    width: int
+    height: int
+    rates: list = field(default_factory=list)
+    current: bool = False
+    preferred: bool = False
+    interlaced: bool = False
+
+    @property
+    def name(self):
+        return f"{self.width}x{self.height}{'i' if self.interlaced else ''}"
+
+
+@dataclass
+class OutputState:
+    name: str
+    connected: bool
+    primary: bool = False
+    x: int = 0
+    y: int = 0
+    width: int = 0
+    height: int = 0
+    rotation: str = 'normal'
+    modes: list = field(default_factory=list)
+    current_mode: Mode = None
+    scale_x: float = 1.0
+    scale_y: float = 1.0
+    filter: str = None  # None si el backend no lo informa (xrandr --query)
+
+    @property
+    def active(self):
+        """ La salida tiene un CRTC asignado (geometría válida) """
+        return self.current_mode is not None and self.width > 0 and self.height > 0
+
+    @property
+    def scale(self):
+        """ Escala uniforme aproximada (la mayor de ambos ejes) """
+        return max(self.scale_x, self.scale_y)
+
+    @property
+    def is_scaled(self):
+        return abs(self.scale_x - 1.0) > 1e-3 or abs(self.scale_y - 1.0) > 1e-3
+
+
+@dataclass
+class Topology:
+    outputs: dict = field(default_factory=dict)
+    screen_width: int = 0
+    screen_height: int = 0
+    min_width: int = 0
+    min_height: int = 0
+    max_width: int = 0
+    max_height: int = 0
+    timestamp: float = field(default_factory=time.monotonic)
+
+    def get(self, name):
+        return self.outputs.get(name)
+
+    def connected(self):
+        return [out for out in self.outputs.values() if out.connected]
+
+    def connected_names(self):
+        return [out.name for out in self.connected()]
+
+    def default_output(self):
+        """ Salida principal, o la primera conectada si no hay principal """
+        connected = self.connected()
+        for out in connected:
+            if out.primary:
+                return out.name
+        return connected[0].name if connected else None
+
+    def merged(self, outputs, screen_size=None, complete=False):
+        """ Nueva topología con las salidas indicadas actualizadas (o sustituidas si complete) """
+        merged = Topology(
+            outputs=dict(outputs) if complete else {**self.outputs, **outputs},
+            screen_width=self.screen_width, screen_height=self.screen_height,
+            min_width=self.min_width, min_height=self.min_height,
+            max_width=self.max_width, max_height=self.max_height,
+        )
+        if screen_size:
+            merged.screen_width, merged.screen_height = screen_size
+        return merged
+
+
+def _apply_scale_from_geometry(out):
+    """ Deducir la escala comparando la geometría del CRTC con el modo actual """
+    mode = out.current_mode
+    if not out.active:
+        return
+    mode_w, mode_h = mode.width, mode.height
+    if out.rotation in ('left', 'right'):
+        mode_w, mode_h = mode_h, mode_w
+    out.scale_x = round(out.width / mode_w, 4)
+    out.scale_y = round(out.height / mode_h, 4)
+
+
+def parse_xrandr_query(text):
+    """ Construir una Topology a partir de la salida de `xrandr --query` """
+    topology = Topology()
+    current = None
+
+    for line in text.splitlines():
+        match = _SCREEN_RE.match(line)
+        if match:
+            values = [int(v) for v in match.groups()[1:]]
+            (topology.min_width, topology.min_height,
+             topology.screen_width, topology.screen_height,
+             topology.max_width, topology.max_height) = values
+            continue
+
+        match = _OUTPUT_RE.match(line)
+        if match:
+            if current is not None:
+                _apply_scale_from_geometry(current)
+            name, status, primary, w, h, x, y, rotation = match.groups()
+            current = OutputState(
+                name=name,
+                connected=(status == 'connected'),
+                primary=bool(primary),
+                rotation=rotation or 'normal'
+            )
+            if w is not None:
+                current.width, current.height = int(w), int(h)
+                current.x, current.y = int(x), int(y)
+            topology.outputs[name] = current
+            continue
+
+        match = _MODE_RE.match(line)
+        if match and current is not None:
+            width, height, interlaced, rest = match.groups()
+            mode = Mode(int(width), int(height), interlaced=bool(interlaced))
+            for rate, star, plus in _RATE_RE.findall(rest):
+                mode.rates.append(float(rate))
+                if star == '*':
+                    mode.current = True
+                if plus == '+':
+                    mode.preferred = True
+            current.modes.append(mode)
+            if mode.current and current.current_mode is None:
+                current.current_mode = mode
+
+    if current is not None:
+        _apply_scale_from_geometry(current)
+    return topology
+
+
+
+
+
+'''
+>>> Caché con TTL
+'''
+class TopologyCache:
+    def __init__(self, loader, ttl=DEFAULT_TTL):
+        self.loader = loader
+        self.ttl = ttl
+        self._topology = None
+        self._lock = threading.Lock()
+
+    def get(self, refresh=False):
+        """ Obtener la topología, consultando de nuevo solo si caducó o se invalidó """
+        with self._lock:
+            if (refresh or self._topology is None
+                    or time.monotonic() - self._topology.timestamp > self.ttl):
+                self._topology = self.loader()
+            return self._topology
+
+    def peek(self):
+        """ Topología en caché sin forzar consulta (puede ser None) """
+        return self._topology
+
+    def update(self, outputs, screen_size=None, complete=False):
+        """ Incorporar cambios recibidos por eventos sin repetir la consulta completa """
+        with self._lock:
+            if self._topology is None:
+                self._topology = self.loader()
+            else:
+                self._topology = self._topology.merged(outputs, screen_size, complete)
+            return self._topology
+
+    def invalidate(self):
+        with self._lock:
+            self._topology = None
@@ -1,14 +1,24 @@
 # ui.py
 import os
-import sys
-from PyQt5.QtGui import QFont, QPixmap, QIcon
-from PyQt5.QtCore import Qt, QTimer, QSize
-from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
+import json
+import time
+import resource
+from PyQt5.QtGui import QFont, QPixmap
+from PyQt5.QtCore import Qt, QTimer, QSize, QSocketNotifier, QObject, QEvent
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                             QLabel, QPushButton, QSlider, QFrame, 
-                            QComboBox, QTabWidget)
+                            QComboBox, QTabWidget, QCheckBox, QGridLayout)
 
 from resolution_controller import ResolutionController
 from colors_controller import ColorsController
+from preview import CoalescingApplier
+from async_controller import AsyncController
+from animation import DEFAULT_DURATION
+from planner import MAX_SCALE, format_bytes, max_scale, plan_scales
+from color_filters import PRESETS, parse_filter_spec
+import assets
+import commands
+import profiling
 
 
 
@@ -23,6 +33,129 @@ VERSION = "1.1.1"
 
 
 
+'''
+>>> Estilos
+'''
+# Una sola hoja de estilos a nivel de aplicación: Qt la analiza una vez en lugar de por widget
+APP_STYLESHEET = """
+    QMainWindow {
+        background-color: #1a1a1a;
+    }
+    QFrame#statusFrame {
+        background-color: #252525;
+        border-radius: 8px;
+        padding: 12px;
+    }
+    QTabWidget::pane {
+        border: none;
+    }
+    QTabBar::tab {
+        background: #252525;
+        color: #888888;
+        padding: 12px 30px;
+        border: none;
+        font-size: 12px;
+        border-top-left-radius: 5px;
+        border-top-right-radius: 5px;
+    }
+    QTabBar::tab:selected {
+        background: #2d2d2d;
+        color: #ffffff;
+        border-bottom: 3px solid #00ff99;
+    }
+    QTabBar::tab:hover {
+        background: #333333;
+    }
+    QComboBox {
+        background: #2d2d2d;
+        color: white;
+        padding: 5px 10px;
+        border: 1px solid #404040;
+        border-radius: 4px;
+    }
+    QComboBox::drop-down {
+        width: 25px;
+        border-left: 1px solid #404040;
+    }
+    QLabel#title, QLabel#valueLabel {
+        color: #00ff99;
+    }
+    QLabel#latencyLabel, QLabel#planLabel, QLabel#previewCaption {
+        color: #888888;
+    }
+    QLabel#planLabel[state="limited"] {
+        color: #ffaa00;
+    }
+    QLabel#statusMsg {
+        font-weight: 500;
+        padding: 3px;
+    }
+    QLabel#statusMsg[state="success"] {
+        color: #00ff99;
+    }
+    QLabel#statusMsg[state="error"] {
+        color: #ff4444;
+    }
+    QCheckBox {
+        color: #cccccc;
+    }
+    QSlider::groove:horizontal {
+        height: 8px;
+        background: #404040;
+        border-radius: 4px;
+    }
+    QSlider::handle:horizontal {
+        background: #00ff99;
+        width: 18px;
+        margin: -6px 0;
+        border-radius: 9px;
+    }
+    QSlider::sub-page:horizontal {
+        background: #00ff99;
+        border-radius: 4px;
+    }
+    QPushButton {
+        background-color: #2d2d2d;
+        color: white;
+        border: none;
+        padding: 10px 20px;
+        border-radius: 5px;
+        font-size: 13px;
+    }
+    QPushButton:hover {
+        background-color: #3d3d3d;
+    }
+    QPushButton:pressed {
+        background-color: #4d4d4d;
+    }
+    QPushButton#colorRestore {
+        padding: 12px 30px;
+    }
+    QPushButton#imageButton {
+        background: #2d2d2d;
+        border: 2px solid #404040;
+        border-radius: 10px;
+        padding: 0;
+    }
+    QPushButton#imageButton:hover {
+        background: #3d3d3d;
+        border-color: #505050;
+    }
+    QPushButton#imageButton:pressed {
+        background: #4d4d4d;
+    }
+"""
+
+STATUS_ICONS = {
+    'normal': 'favicon_01.png',
+    'active': 'favicon_02.png',
+    'error': 'favicon_03.png',
+}
+
+
+
+
+
 '''
 >>> UI
 '''
@@ -45,9 +178,9 @@ class ResolutionTab(QWidget):
         screen_layout.setSpacing(15)
 
         icon_label = QLabel()
-        icon_path = self.parent.resource_path(os.path.join('Storage', 'Icons', 'monitor_01.png'))
-        if os.path.exists(icon_path):
-            icon_label.setPixmap(QPixmap(icon_path).scaled(28, 28, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        icon = assets.icon('monitor_01.png', 28)
+        if not icon.isNull():
+            icon_label.setPixmap(icon)
         icon_label.setAlignment(Qt.AlignVCenter)
         
         screen_text = QLabel('Monitor:')
@@ -70,7 +203,7 @@ class ResolutionTab(QWidget):
         self.value_label = QLabel('Resolución actual: 1.0x')
         self.value_label.setFont(QFont('Segoe UI', 12, QFont.Bold))
         self.value_label.setAlignment(Qt.AlignCenter)
-        self.value_label.setStyleSheet("color: #00ff99;")
+        self.value_label.setObjectName("valueLabel")
         layout.addWidget(self.value_label)
 
         self.slider = QSlider(Qt.Horizontal)
@@ -79,55 +212,53 @@ class ResolutionTab(QWidget):
         self.slider.setValue(10)
         self.slider.setTickPosition(QSlider.TicksBelow)
         self.slider.setTickInterval(10)
-        self.slider.setStyleSheet("""
-            QSlider::groove:horizontal {
-                height: 8px;
-                background: #404040;
-                border-radius: 4px;
-            }
-            QSlider::handle:horizontal {
-                background: #00ff99;
-                width: 18px;
-                margin: -6px 0;
-                border-radius: 9px;
-            }
-            QSlider::sub-page:horizontal {
-                background: #00ff99;
-                border-radius: 4px;
-            }
-        """)
         self.slider.valueChanged.connect(self.parent.update_res_label)
+        self.slider.sliderReleased.connect(self.parent.on_slider_released)
         layout.addWidget(self.slider)
 
+        # Framebuffer y memoria de la escala seleccionada (calculado sin consultar al servidor)
+        self.plan_label = QLabel()
+        self.plan_label.setFont(QFont('Segoe UI', 9))
+        self.plan_label.setAlignment(Qt.AlignCenter)
+        self.plan_label.setObjectName("planLabel")
+        layout.addWidget(self.plan_label)
+
+        # Vista previa en vivo (aplica mientras se arrastra, con límite de tasa), transición y filtro
+        options_layout = QHBoxLayout()
+        options_layout.setSpacing(20)
+        self.live_check = QCheckBox('Vista previa en vivo')
+        self.live_check.setFont(QFont('Segoe UI', 10))
+        self.live_check.setCursor(Qt.PointingHandCursor)
+
+        self.animate_check = QCheckBox('Transición animada')
+        self.animate_check.setFont(QFont('Segoe UI', 10))
+        self.animate_check.setCursor(Qt.PointingHandCursor)
+
+        # Filtro de muestreo: nearest es exacto al píxel y más barato por fotograma
+        self.filter_combo = QComboBox()
+        self.filter_combo.setFont(QFont('Segoe UI', 10))
+        self.filter_combo.addItem('Filtro bilineal', 'bilinear')
+        self.filter_combo.addItem('Filtro nítido (nearest)', 'nearest')
+        self.filter_combo.setToolTip('Nearest: muestreo exacto al píxel, más barato por fotograma')
+        self.filter_combo.currentIndexChanged.connect(self.parent.on_filter_changed)
+
+        options_layout.addStretch()
+        options_layout.addWidget(self.live_check)
+        options_layout.addWidget(self.animate_check)
+        options_layout.addWidget(self.filter_combo)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+
         # Botones
         btn_layout = QHBoxLayout()
         btn_layout.setSpacing(15)
         
-        button_style = """
-            QPushButton {
-                background-color: #2d2d2d;
-                color: white;
-                border: none;
-                padding: 10px 20px;
-                border-radius: 5px;
-                font-size: 13px;
-            }
-            QPushButton:hover {
-                background-color: #3d3d3d;
-            }
-            QPushButton:pressed {
-                background-color: #4d4d4d;
-            }
-        """
-        
         self.apply_btn = QPushButton('Aplicar cambios')
         self.apply_btn.clicked.connect(self.parent.apply_resolution)
-        self.apply_btn.setStyleSheet(button_style)
         self.apply_btn.setCursor(Qt.PointingHandCursor)
         
         self.restore_btn = QPushButton('Restaurar valores')
         self.restore_btn.clicked.connect(self.parent.restore_resolution)
-        self.restore_btn.setStyleSheet(button_style)
         self.restore_btn.setCursor(Qt.PointingHandCursor)
         
         btn_layout.addWidget(self.apply_btn)
@@ -135,6 +266,8 @@ class ResolutionTab(QWidget):
         layout.addLayout(btn_layout)
 
 class ColorTab(QWidget):
+    PREVIEW_SIZE = QSize(136, 77)
+
     def __init__(self, parent):
         super().__init__()
         self.parent = parent
@@ -142,109 +275,142 @@ class ColorTab(QWidget):
 
     def init_ui(self):
         layout = QVBoxLayout(self)
-        layout.setContentsMargins(20, 20, 20, 20)
-        layout.setSpacing(25)
+        layout.setContentsMargins(20, 15, 20, 15)
+        layout.setSpacing(12)
 
         # Descripción
-        desc = QLabel(
-            "Seleccione un modo de color negativo:\n"
-            "1. Clásico - Inversión RGB estándar\n"
-            "2. Azul - Tonalidades frías\n"
-            "3. Rojo - Tonalidades cálidas"
-        )
-        desc.setFont(QFont('Segoe UI', 12))
+        desc = QLabel("Vista previa sobre una captura de la pantalla: pulse un modo para aplicarlo")
+        desc.setFont(QFont('Segoe UI', 11))
         desc.setAlignment(Qt.AlignCenter)
         desc.setWordWrap(True)
         layout.addWidget(desc)
 
-        # Botones de modo
+        # Botones de modo: icono estático hasta que llega la primera captura
         btn_container = QHBoxLayout()
         btn_container.setSpacing(20)
         
-        def create_image_button(icon_path, size=QSize(160, 160)):
+        def create_image_button(icon_name, caption, size=QSize(160, 120)):
             btn = QPushButton()
+            btn.setObjectName("imageButton")
             btn.setFixedSize(size)
-            full_path = self.parent.resource_path(icon_path)
-            
-            if os.path.exists(full_path):
-                pixmap = QPixmap(full_path)
-                if not pixmap.isNull():
-                    scaled = pixmap.scaled(80, 80, Qt.KeepAspectRatio, Qt.SmoothTransformation)
-                    icon = QLabel(btn)
-                    icon.setPixmap(scaled)
-                    icon.setAlignment(Qt.AlignCenter)
-                    layout = QVBoxLayout(btn)
-                    layout.setContentsMargins(0, 0, 0, 0)
-                    layout.addWidget(icon)
-
-            btn.setStyleSheet("""
-                QPushButton {
-                    background: #2d2d2d;
-                    border: 2px solid #404040;
-                    border-radius: 10px;
-                }
-                QPushButton:hover {
-                    background: #3d3d3d;
-                    border-color: #505050;
-                }
-                QPushButton:pressed {
-                    background: #4d4d4d;
-                }
-            """)
+            btn.setCursor(Qt.PointingHandCursor)
+            btn_layout = QVBoxLayout(btn)
+            btn_layout.setContentsMargins(6, 8, 6, 6)
+            btn_layout.setSpacing(4)
+            btn.preview = QLabel()
+            btn.preview.setAlignment(Qt.AlignCenter)
+            btn.preview.setFixedSize(self.PREVIEW_SIZE)
+            pixmap = assets.icon(icon_name, 70)
+            if not pixmap.isNull():
+                btn.preview.setPixmap(pixmap)
+            text = QLabel(caption)
+            text.setObjectName("previewCaption")
+            text.setFont(QFont('Segoe UI', 9))
+            text.setAlignment(Qt.AlignCenter)
+            btn_layout.addWidget(btn.preview, 0, Qt.AlignCenter)
+            btn_layout.addWidget(text)
             return btn
 
         # Crear botones con imágenes
-        self.btn_classic = create_image_button(os.path.join('Storage', 'Icons', 'negative_01.png'))
+        self.btn_classic = create_image_button('negative_01.png', 'Clásico')
         self.btn_classic.clicked.connect(lambda: self.parent.apply_color_mode(1))
         
-        self.btn_blue = create_image_button(os.path.join('Storage', 'Icons', 'negative_02.png'))
+        self.btn_blue = create_image_button('negative_02.png', 'Azul (frío)')
         self.btn_blue.clicked.connect(lambda: self.parent.apply_color_mode(2))
         
-        self.btn_red = create_image_button(os.path.join('Storage', 'Icons', 'negative_03.png'))
+        self.btn_red = create_image_button('negative_03.png', 'Rojo (cálido)')
         self.btn_red.clicked.connect(lambda: self.parent.apply_color_mode(3))
+        self.mode_buttons = {1: self.btn_classic, 2: self.btn_blue, 3: self.btn_red}
         
         btn_container.addWidget(self.btn_classic)
         btn_container.addWidget(self.btn_blue)
         btn_container.addWidget(self.btn_red)
         layout.addLayout(btn_container)
 
+        # Filtro personalizado: la miniatura sigue a los controles y la gamma solo cambia al aplicar
+        custom = QFrame()
+        custom.setObjectName("statusFrame")
+        custom_layout = QHBoxLayout(custom)
+        custom_layout.setContentsMargins(10, 6, 10, 6)
+        custom_layout.setSpacing(12)
+        self.custom_preview = QLabel()
+        self.custom_preview.setAlignment(Qt.AlignCenter)
+        self.custom_preview.setFixedSize(self.PREVIEW_SIZE)
+        custom_layout.addWidget(self.custom_preview)
+
+        controls = QGridLayout()
+        controls.setHorizontalSpacing(10)
+        controls.setVerticalSpacing(2)
+        self.invert_check = QCheckBox('Invertir')
+        self.invert_check.setFont(QFont('Segoe UI', 9))
+        self.invert_check.setCursor(Qt.PointingHandCursor)
+        self.invert_check.toggled.connect(self.parent.update_custom_preview)
+        controls.addWidget(self.invert_check, 0, 0, 1, 2)
+
+        # Operación -> slider; (etiqueta, mínimo, máximo, neutro, divisor) en unidades del slider
+        self.custom_sliders = {}
+        for row, (operation, name, minimum, maximum, neutral, divisor) in enumerate((
+                ('contrast', 'Contraste', 50, 200, 100, 100),
+                ('brightness', 'Brillo', -50, 50, 0, 100),
+                ('temperature', 'Temperatura', 2000, 10000, 6500, 1)), 1):
+            label = QLabel(name)
+            label.setFont(QFont('Segoe UI', 9))
+            slider = QSlider(Qt.Horizontal)
+            slider.setRange(minimum, maximum)
+            slider.setValue(neutral)
+            slider.neutral, slider.divisor = neutral, divisor
+            slider.valueChanged.connect(self.parent.update_custom_preview)
+            controls.addWidget(label, row, 0)
+            controls.addWidget(slider, row, 1)
+            self.custom_sliders[operation] = slider
+        custom_layout.addLayout(controls, 1)
+
+        self.apply_custom_btn = QPushButton('Aplicar')
+        self.apply_custom_btn.setCursor(Qt.PointingHandCursor)
+        self.apply_custom_btn.clicked.connect(self.parent.apply_custom_filter)
+        custom_layout.addWidget(self.apply_custom_btn)
+        layout.addWidget(custom)
+        self.custom_frame = custom
+
         # Botón de restauración
         self.restore_btn = QPushButton('Restaurar Colores')
         self.restore_btn.clicked.connect(self.parent.restore_colors)
-        self.restore_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2d2d2d;
-                color: white;
-                border: none;
-                padding: 12px 30px;
-                border-radius: 5px;
-                font-size: 13px;
-            }
-            QPushButton:hover {
-                background-color: #3d3d3d;
-            }
-        """)
+        self.restore_btn.setObjectName("colorRestore")
         self.restore_btn.setCursor(Qt.PointingHandCursor)
         self.restore_btn.setFixedSize(200, 40)
         layout.addWidget(self.restore_btn, 0, Qt.AlignCenter)
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, backend=None):
         super().__init__()
-        self.res_controller = ResolutionController()
-        self.color_controller = ColorsController()
-        self.outputs = self.res_controller.get_all_outputs()
-        self.output = self.outputs[0] if self.outputs else None
+        self.res_controller = ResolutionController(backend)
+        self.color_controller = ColorsController(backend)
+        self.color_controller.prepare()
+        recovered = self.recover_interrupted_session()
+        self.topology = self.res_controller.get_topology()
+        self.outputs = self.topology.connected_names()
+        self.output = self.topology.default_output()
         self.current_scale = 1.0
+        self.scale_limit = MAX_SCALE
+        self.color_preview = None  # Módulo color_preview, cargado al abrir la pestaña de color
+        self.color_snapshot = None
+        self.async_controller = AsyncController(self.res_controller, self.color_controller, self)
+        self.preview = CoalescingApplier(self.preview_scale, parent=self)
         self.init_ui()
+        if self.output:
+            # El combo empieza en la primera salida; mostrar la principal sin disparar un restore
+            combo = self.res_tab.monitor_combo
+            combo.blockSignals(True)
+            combo.setCurrentText(self.output)
+            combo.blockSignals(False)
+        self.update_scale_limit()
+        self.init_hotplug()
+        if recovered:
+            self.show_status(*recovered)
     
     def resource_path(self, relative_path):
         """ Maneja rutas de recursos para desarrollo y versiones empaquetadas """
-        if getattr(sys, 'frozen', False):
-            base_path = sys._MEIPASS
-        else:
-            base_path = os.path.dirname(os.path.abspath(__file__))
-        return os.path.join(base_path, *relative_path.split('/'))
+        return assets.resource_path(relative_path)
 
     def init_ui(self):
         self.setWindowTitle(f'SimuRES - v{VERSION}')
@@ -260,11 +426,12 @@ class MainWindow(QMainWindow):
         # Título
         title = QLabel('SimuRES')
         title.setFont(QFont('Segoe UI', 28, QFont.Bold))
-        title.setStyleSheet('color: #00ff99;')
+        title.setObjectName("title")
         title.setAlignment(Qt.AlignCenter)
         main_layout.addWidget(title)
 
         # Icono de estado
+        self.status_state = None
         self.status_icon = QLabel()
         self.status_icon.setAlignment(Qt.AlignCenter)
         self.update_status_icon('normal')
@@ -278,7 +445,13 @@ class MainWindow(QMainWindow):
         
         tabs.addTab(self.res_tab, "Resoluciones")
         tabs.addTab(self.color_tab, "Negativos")
+        tabs.currentChanged.connect(self.on_tab_changed)
         main_layout.addWidget(tabs)
+        self.tabs = tabs
+        if self.color_controller.engine is None:
+            # Con xcalib solo existen los modos 1-3
+            self.color_tab.custom_frame.setEnabled(False)
+            self.color_tab.custom_frame.setToolTip("Los filtros personalizados requieren el backend nativo y NumPy")
 
         # Barra de estado
         self.status_bar = QFrame()
@@ -286,10 +459,19 @@ class MainWindow(QMainWindow):
         status_layout = QVBoxLayout(self.status_bar)
         status_layout.setContentsMargins(15, 10, 15, 10)
         self.status_msg = QLabel()
+        self.status_msg.setObjectName("statusMsg")
         self.status_msg.setFont(QFont('Segoe UI', 11))
         self.status_msg.setAlignment(Qt.AlignCenter)
         self.status_msg.setWordWrap(True)
         status_layout.addWidget(self.status_msg)
+
+        # Lectura opcional de la latencia de la última operación
+        self.latency_label = QLabel()
+        self.latency_label.setFont(QFont('Segoe UI', 9))
+        self.latency_label.setAlignment(Qt.AlignCenter)
+        self.latency_label.setObjectName("latencyLabel")
+        self.latency_label.setVisible(profiling.enabled() or bool(os.environ.get('SIMURES_LATENCY_READOUT')))
+        status_layout.addWidget(self.latency_label)
         main_layout.addWidget(self.status_bar)
 
         # Temporizador de estado
@@ -302,118 +484,321 @@ class MainWindow(QMainWindow):
             self.update_status_icon('error')
             self.status_msg.setText("Error: No se detectaron monitores")
 
-        # Estilos globales
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #1a1a1a;
-            }
-            QFrame#statusFrame {
-                background-color: #252525;
-                border-radius: 8px;
-                padding: 12px;
-            }
-            QTabWidget::pane {
-                border: none;
-            }
-            QTabBar::tab {
-                background: #252525;
-                color: #888888;
-                padding: 12px 30px;
-                border: none;
-                font-size: 12px;
-                border-top-left-radius: 5px;
-                border-top-right-radius: 5px;
-            }
-            QTabBar::tab:selected {
-                background: #2d2d2d;
-                color: #ffffff;
-                border-bottom: 3px solid #00ff99;
-            }
-            QTabBar::tab:hover {
-                background: #333333;
-            }
-            QComboBox {
-                background: #2d2d2d;
-                color: white;
-                padding: 5px 10px;
-                border: 1px solid #404040;
-                border-radius: 4px;
-            }
-            QComboBox::drop-down {
-                width: 25px;
-                border-left: 1px solid #404040;
-            }
-        """)
+    def recover_interrupted_session(self):
+        """ Reponer lo que dejó aplicado una sesión GUI anterior que murió sin restaurar """
+        if not any(self.res_controller.journal.entries(stale_only=True)):
+            return None
+        code, lines = commands.run_recover(self.res_controller, self.color_controller, stale_only=True)
+        message = "Sesión anterior interrumpida: estado original recuperado" if code == 0 else lines[0]
+        return message, "success" if code == 0 else "error"
+
+    def init_hotplug(self):
+        """ Seguir la conexión/desconexión de monitores con eventos RandR (sin sondeo) """
+        self.hotplug = self.res_controller.watch_hotplug()
+        if self.hotplug is None:
+            return
+        self.hotplug_notifier = QSocketNotifier(self.hotplug.fileno(), QSocketNotifier.Read, self)
+        self.hotplug_notifier.activated.connect(self.on_hotplug)
+
+    def on_hotplug(self):
+        topology = self.res_controller.process_hotplug(self.hotplug)
+        if topology is None:
+            return
+        self.color_controller.outputs_changed()
+        self.topology = topology
+        outputs = topology.connected_names()
+        if outputs == self.outputs:
+            return
+
+        added = [name for name in outputs if name not in self.outputs]
+        removed = [name for name in self.outputs if name not in outputs]
+        self.outputs = outputs
+        combo = self.res_tab.monitor_combo
+        combo.blockSignals(True)
+        for name in removed:
+            combo.removeItem(combo.findText(name))
+        if added and combo.findText("No hay monitores detectados") >= 0:
+            combo.clear()
+        for name in added:
+            combo.addItem(name)
+        if not outputs:
+            combo.addItem("No hay monitores detectados")
+        combo.setEnabled(bool(outputs))
+
+        # Si desaparece la salida seleccionada se pasa a la principal, sin restaurar nada
+        if self.output not in outputs:
+            self.output = topology.default_output()
+            self.current_scale = 1.0
+            self.preview.reset(1.0)
+            self.res_tab.slider.setValue(10)
+        if self.output:
+            combo.setCurrentText(self.output)
+        combo.blockSignals(False)
+
+        self.update_scale_limit()
+        if removed:
+            self.show_status(f"Monitor desconectado: {', '.join(removed)}", "error")
+        else:
+            self.show_status(f"Monitor conectado: {', '.join(added)}", "success")
+        self.update_status_icon('error' if not outputs else 'normal' if self.current_scale == 1.0 else 'active')
 
     def update_status_icon(self, state):
-        icons = {
-            'normal': os.path.join('Storage', 'Icons', 'favicon_01.png'),
-            'active': os.path.join('Storage', 'Icons', 'favicon_02.png'),
-            'error': os.path.join('Storage', 'Icons', 'favicon_03.png')
-        }
-        icon_path = self.resource_path(icons[state])
-        if os.path.exists(icon_path):
-            pixmap = QPixmap(icon_path)
-            if not pixmap.isNull():
-                self.status_icon.setPixmap(pixmap.scaled(100, 100, Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        if state == self.status_state:
+            return
+        pixmap = assets.icon(STATUS_ICONS[state], 100)
+        if not pixmap.isNull():
+            self.status_icon.setPixmap(pixmap)
+            self.status_state = state
 
     def on_monitor_changed(self, name):
         self.output = name
+        self.update_scale_limit()
         self.restore_resolution()
 
+    def planning_topology(self):
+        """ Topología en caché (tras aplicar refleja la geometría prevista) sin bloquear la interfaz """
+        return self.res_controller.cache.peek() or self.topology
+
+    def update_scale_limit(self):
+        """ Limitar el slider a la mayor escala cuyo framebuffer acepta el servidor """
+        self.scale_limit = max_scale(self.planning_topology(), self.output) if self.output else MAX_SCALE
+        slider = self.res_tab.slider
+        previous = slider.value()
+        slider.blockSignals(True)
+        slider.setMaximum(int(round(self.scale_limit * 10)))
+        slider.blockSignals(False)
+        if slider.value() != previous:
+            self.res_tab.value_label.setText(f'Resolución seleccionada: {slider.value() / 10:.1f}x')
+        self.update_plan_label(slider.value() / 10)
+
+    def update_plan_label(self, value):
+        label = self.res_tab.plan_label
+        if not self.output:
+            label.setText('')
+            return
+        plan = plan_scales(self.planning_topology(), {self.output: value})
+        width, height = plan.screen_size
+        text = f"Framebuffer {width}x{height} · {format_bytes(plan.framebuffer_bytes)}"
+        limited = self.scale_limit < MAX_SCALE
+        if limited:
+            max_w, max_h = plan.max_size
+            text += f" · máximo {self.scale_limit:.1f}x (límite del servidor {max_w}x{max_h})"
+        label.setText(text)
+        if label.property('state') != ('limited' if limited else ''):
+            label.setProperty('state', 'limited' if limited else '')
+            label.style().unpolish(label)
+            label.style().polish(label)
+
     def update_res_label(self):
         value = self.res_tab.slider.value() / 10
         self.res_tab.value_label.setText(f'Resolución seleccionada: {value:.1f}x')
+        self.update_plan_label(value)
+        if self.res_tab.live_check.isChecked():
+            self.preview.submit(value)
+
+    def on_slider_released(self):
+        if self.res_tab.live_check.isChecked():
+            self.preview.finish(self.res_tab.slider.value() / 10)
+
+    def preview_scale(self, scale):
+        """ Aplicación de la vista previa en vivo (llamada por el CoalescingApplier) """
+        def done(success):
+            if success:
+                self.current_scale = scale
+                self.update_status_icon('normal' if scale == 1.0 else 'active')
+            else:
+                self.show_status("Error al aplicar escala", "error")
+                self.update_status_icon('error')
+        self.async_controller.apply_scale(self.output, scale, self.traced('preview', done, self.output),
+                                          filter=self.scale_filter())
 
     def apply_resolution(self):
         scale = self.res_tab.slider.value() / 10
         if scale == 1.0 and self.current_scale != 1.0:
-            if self.res_controller.apply_scale(self.output, scale):
-                self.show_status("Resolución base restaurada", "success")
+            def restored(success):
+                if success:
+                    self.show_status("Resolución base restaurada", "success")
+                    self.current_scale = 1.0
+                    self.update_status_icon('normal')
+                else:
+                    self.show_status("Error al restaurar resolución", "error")
+            self.async_controller.apply_scale(self.output, scale, self.traced('apply', restored, self.output),
+                                              animate=self.animation_duration())
+            return
+
+        def applied(success):
+            if success:
+                self.show_status(f"Escala {scale}x aplicada", "success")
+                self.current_scale = scale
+                self.update_status_icon('active')
+            else:
+                self.show_status("Error al aplicar escala", "error")
+                self.update_status_icon('error')
+        self.show_status(f"Aplicando escala {scale}x...", "success")
+        self.async_controller.apply_scale(self.output, scale, self.traced('apply', applied, self.output),
+                                          animate=self.animation_duration(), filter=self.scale_filter())
+
+    def restore_resolution(self):
+        def restored(success):
+            if success:
+                self.preview.reset(1.0)
+                self.res_tab.slider.setValue(10)
+                self.show_status("Resolución original restaurada", "success")
                 self.current_scale = 1.0
                 self.update_status_icon('normal')
             else:
                 self.show_status("Error al restaurar resolución", "error")
-            return
+        self.async_controller.restore_scale(self.output, self.traced('restore', restored, self.output),
+                                            animate=self.animation_duration())
 
-        if self.res_controller.apply_scale(self.output, scale):
-            self.show_status(f"Escala {scale}x aplicada", "success")
-            self.current_scale = scale
-            self.update_status_icon('active')
-        else:
-            self.show_status("Error al aplicar escala", "error")
-            self.update_status_icon('error')
+    def scale_filter(self):
+        return self.res_tab.filter_combo.currentData()
 
-    def restore_resolution(self):
-        if self.res_controller.restore_scale(self.output):
+    def on_filter_changed(self):
+        # Con una escala aplicada, el nuevo filtro se aplica en el acto
+        if self.current_scale != 1.0 and self.output:
+            self.apply_resolution()
+
+    def animation_duration(self):
+        return DEFAULT_DURATION if self.res_tab.animate_check.isChecked() else None
+
+    def restore_all_resolutions(self):
+        """ Restaurar en un solo paso todas las salidas modificadas (síncrono, para el cierre) """
+        self.async_controller.shutdown()
+        if self.res_controller.restore_scales():
+            self.preview.reset(1.0)
             self.res_tab.slider.setValue(10)
-            self.show_status("Resolución original restaurada", "success")
             self.current_scale = 1.0
             self.update_status_icon('normal')
+            return True
+        return False
+
+    def on_tab_changed(self, index):
+        if self.tabs.widget(index) is self.color_tab:
+            self.load_color_previews()
+
+    def load_color_previews(self):
+        """ Capturar (en el hilo de trabajo) una miniatura de la salida cada vez que se abre la pestaña """
+        if self.color_preview is None:
+            try:
+                import color_preview  # NumPy solo se importa si se va a usar
+            except ImportError:
+                return  # Sin NumPy se quedan los iconos estáticos
+            self.color_preview = color_preview
+        topology = self.planning_topology()
+        out = topology.get(self.output) if self.output else None
+        self.async_controller.submit('snapshot', self.color_preview.take_snapshot, self.res_controller.backend,
+                                     out, topology, callback=self.on_color_snapshot)
+
+    def on_color_snapshot(self, snapshot):
+        if snapshot is None:
+            return
+        self.color_snapshot = snapshot
+        for mode, btn in self.color_tab.mode_buttons.items():
+            btn.preview.setPixmap(self.color_preview_pixmap(parse_filter_spec(PRESETS[mode])))
+        self.update_custom_preview()
+
+    def color_preview_pixmap(self, chain):
+        """ Miniatura con la cadena aplicada por LUT sobre la captura (la gamma no se toca) """
+        if chain:
+            image = self.color_preview.render(self.color_snapshot, chain)
         else:
-            self.show_status("Error al restaurar resolución", "error")
-
-    def apply_color_mode(self, mode):
-        success, msg = self.color_controller.apply_negative(mode)
+            image = self.color_preview.to_qimage(self.color_snapshot)
+        return QPixmap.fromImage(image).scaled(ColorTab.PREVIEW_SIZE, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+    def custom_filter_spec(self):
+        """ Cadena de los controles personalizados ('' si todos están en su valor neutro) """
+        tab = self.color_tab
+        parts = ['invert'] if tab.invert_check.isChecked() else []
+        for operation, slider in tab.custom_sliders.items():
+            if slider.value() != slider.neutral:
+                parts.append(f"{operation}={slider.value() / slider.divisor:g}")
+        return ','.join(parts)
+
+    def update_custom_preview(self):
+        spec = self.custom_filter_spec()
+        self.color_tab.apply_custom_btn.setEnabled(bool(spec))
+        if self.color_snapshot is not None:
+            chain = parse_filter_spec(spec) if spec else ()
+            self.color_tab.custom_preview.setPixmap(self.color_preview_pixmap(chain))
+
+    def on_color_applied(self, result):
+        success, msg = result or (False, "Error inesperado")
         self.show_status(msg, "success" if success else "error")
         self.update_status_icon('active' if success else 'error')
 
+    def apply_color_mode(self, mode):
+        self.async_controller.apply_negative(mode, self.traced('color_mode', self.on_color_applied))
+
+    def apply_custom_filter(self):
+        spec = self.custom_filter_spec()
+        if spec:
+            self.async_controller.apply_filter(spec, self.traced('color_filter', self.on_color_applied))
+
     def restore_colors(self):
-        success, msg = self.color_controller.restore_colors()
-        self.show_status(msg, "success" if success else "error")
-        self.update_status_icon('normal' if success else 'error')
+        def restored(result):
+            success, msg = result or (False, "Error inesperado")
+            self.show_status(msg, "success" if success else "error")
+            self.update_status_icon('normal' if success else 'error')
+        self.async_controller.restore_colors(self.traced('restore_colors', restored))
+
+    def traced(self, operation, callback, output=None):
+        """ Envolver un callback para medir la acción de la GUI de principio a fin """
+        s = profiling.span(f'gui:{operation}', output=output, backend=self.res_controller.backend.name)
+
+        def finish(result):
+            callback(result)
+            ok = result[0] if isinstance(result, tuple) else bool(result)
+            self.update_latency_readout(s.finish(ok=ok))
+        return finish
+
+    def update_latency_readout(self, record):
+        spawns = record['spawns']
+        spawns_text = f" · {spawns} procesos" if spawns is not None else ""
+        self.latency_label.setText(
+            f"Última operación: {record['op']} {record['duration_ms']:.1f} ms{spawns_text} · {record['backend']}"
+        )
 
     def show_status(self, message, msg_type):
-        color = "#00ff99" if msg_type == "success" else "#ff4444"
-        self.status_msg.setStyleSheet(f"""
-            color: {color}; 
-            font-weight: 500;
-            padding: 3px;
-        """)
+        state = "success" if msg_type == "success" else "error"
+        if self.status_msg.property("state") != state:
+            # Re-aplicar la hoja global para el nuevo valor de la propiedad
+            self.status_msg.setProperty("state", state)
+            self.status_msg.style().unpolish(self.status_msg)
+            self.status_msg.style().polish(self.status_msg)
         self.status_msg.setText(message)
         self.status_timer.start(3000)
 
     def closeEvent(self, event):
-        self.restore_resolution()
-        self.color_controller.restore_colors()
-        event.accept()
\ No newline at end of file
+        self.restore_all_resolutions()
+        if self.color_controller.current_mode() != 0:
+            self.color_controller.restore_colors()
+        if self.hotplug is not None:
+            self.hotplug_notifier.setEnabled(False)
+            self.hotplug.close()
+        event.accept()
+
+
+
+
+
+'''
+>>> Medición de arranque
+'''
+class FirstPaintProbe(QObject):
+    """ En el primer repintado de la ventana anota el instante y el pico de RSS y cierra la
+    aplicación (SIMURES_FIRST_PAINT_REPORT, usado por Benchmarks/bench_gui_startup.py) """
+    def __init__(self, window, path):
+        super().__init__(window)
+        self.path = path
+        self.done = False
+        window.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint and not self.done:
+            self.done = True
+            with open(self.path, 'w') as f:
+                json.dump({'paint_ts': time.time(), 'process_ms': profiling.process_age_ms(),
+                           'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}, f)
+            QTimer.singleShot(0, QApplication.instance().quit)
+        return False